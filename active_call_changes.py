@@ -0,0 +1,150 @@
+import os
+from datetime import datetime
+from results_index import extract_call_number, get_connection
+
+DEFAULT_CHANGE_LIMIT = 100
+# Bu kadar denemede analiz edilemeyen yeni çağrı bekleyenlerden çıkarılır
+MAX_PENDING_ATTEMPTS = int(os.getenv("TUBITAK_MAX_PENDING_ATTEMPTS", "3"))
+
+CHANGE_OPENED = "opened"
+CHANGE_CLOSED = "closed"
+CHANGE_RENAMED = "renamed"
+
+
+def diff_active_calls(previous, current):
+    """Önceki ve güncel aktif çağrı kümelerini karşılaştırır.
+
+    previous ve current, url -> çağrı adı sözlükleridir. Aynı url farklı adla
+    gelirse ya da kapanan ve açılan çağrı aynı çağrı numarasını taşıyorsa
+    değişiklik "renamed" olarak raporlanır.
+    """
+    changes = []
+    opened = {url: name for url, name in current.items() if url not in previous}
+    closed = {url: name for url, name in previous.items() if url not in current}
+
+    for url, name in current.items():
+        if url in previous and previous[url] != name:
+            changes.append({"change_type": CHANGE_RENAMED, "url": url, "name": name, "previous_name": previous[url]})
+
+    # Adresi değişen ama numarası aynı kalan çağrıları yeniden adlandırma say
+    closed_by_number = {extract_call_number(name): url for url, name in closed.items() if extract_call_number(name)}
+    for url, name in list(opened.items()):
+        old_url = closed_by_number.pop(extract_call_number(name), None) if extract_call_number(name) else None
+        if old_url:
+            changes.append({"change_type": CHANGE_RENAMED, "url": url, "name": name, "previous_name": closed.pop(old_url), "previous_url": old_url})
+            del opened[url]
+
+    changes.extend({"change_type": CHANGE_OPENED, "url": url, "name": name, "previous_name": None} for url, name in opened.items())
+    changes.extend({"change_type": CHANGE_CLOSED, "url": url, "name": name, "previous_name": None} for url, name in closed.items())
+    return changes
+
+
+def record_active_calls(active_calls):
+    """Güncel aktif çağrıları son bilinen kümeyle karşılaştırır ve yalnızca farkları kaydeder.
+
+    Yeni açılan çağrılar analiz edilene kadar bekleyen olarak işaretlenir
+    (ilk kayıt hariç). Kapanan çağrıların bekleyen işareti kaldırılır.
+    Değişiklik listesini döndürür; küme aynıysa boş liste döner.
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    current = {call["url"]: call["name"] for call in active_calls}
+
+    conn = get_connection()
+    try:
+        with conn:
+            # İlk kayıtta tüm çağrılar "açıldı" görünür; bunlar analiz kuyruğuna alınmaz
+            baseline = conn.execute("SELECT 1 FROM active_calls LIMIT 1").fetchone() is None
+            previous = {row["url"]: row["name"] for row in conn.execute("SELECT url, name FROM active_calls WHERE is_open = 1")}
+            changes = diff_active_calls(previous, current)
+
+            for change in changes:
+                change["call_number"] = extract_call_number(change["name"])
+                change["detected_at"] = now
+                conn.execute(
+                    "INSERT INTO active_call_changes (change_type, url, name, previous_name, call_number, detected_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (change["change_type"], change["url"], change["name"], change["previous_name"], change["call_number"], now),
+                )
+                if change["change_type"] == CHANGE_CLOSED or change.get("previous_url"):
+                    conn.execute("UPDATE active_calls SET is_open = 0 WHERE url = ?", (change.get("previous_url") or change["url"],))
+                if change["change_type"] == CHANGE_OPENED and not baseline:
+                    conn.execute("INSERT OR IGNORE INTO pending_active_calls (url, name, detected_at) VALUES (?, ?, ?)", (change["url"], change["name"], now))
+                elif change["change_type"] == CHANGE_CLOSED:
+                    conn.execute("DELETE FROM pending_active_calls WHERE url = ?", (change["url"],))
+                elif change.get("previous_url"):
+                    conn.execute("UPDATE pending_active_calls SET url = ?, name = ? WHERE url = ?", (change["url"], change["name"], change["previous_url"]))
+
+            for url, name in current.items():
+                conn.execute(
+                    """
+                    INSERT INTO active_calls (url, name, call_number, first_seen, last_seen, is_open) VALUES (?, ?, ?, ?, ?, 1)
+                    ON CONFLICT(url) DO UPDATE SET name = excluded.name, call_number = excluded.call_number, last_seen = excluded.last_seen, is_open = 1
+                    """,
+                    (url, name, extract_call_number(name), now, now),
+                )
+    finally:
+        conn.close()
+
+    return changes
+
+
+def get_changes(since_id=None, limit=DEFAULT_CHANGE_LIMIT):
+    """Değişiklik akışını döndürür; since_id verilirse yalnızca daha yeni kayıtlar gelir."""
+    conn = get_connection()
+    if since_id is None:
+        # İlk istekte en yeni kayıtları getir
+        rows = conn.execute("SELECT * FROM active_call_changes ORDER BY id DESC LIMIT ?", (limit,)).fetchall()[::-1]
+    else:
+        rows = conn.execute("SELECT * FROM active_call_changes WHERE id > ? ORDER BY id LIMIT ?", (since_id, limit)).fetchall()
+    conn.close()
+
+    changes = [dict(row) for row in rows]
+    return {"changes": changes, "last_id": changes[-1]["id"] if changes else since_id}
+
+
+def get_open_calls():
+    """Şu an açık bilinen aktif çağrıları döndürür."""
+    conn = get_connection()
+    rows = conn.execute("SELECT url, name, call_number, first_seen, last_seen FROM active_calls WHERE is_open = 1 ORDER BY first_seen DESC").fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def get_pending_calls():
+    """Açıldığı kaydedilmiş fakat henüz başarıyla analiz edilmemiş çağrıları döndürür."""
+    conn = get_connection()
+    rows = conn.execute("SELECT url, name, detected_at, attempts FROM pending_active_calls ORDER BY detected_at").fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def mark_calls_analyzed(urls):
+    """Analizi tamamlanan çağrıların bekleyen işaretini kaldırır."""
+    if not urls:
+        return
+    conn = get_connection()
+    with conn:
+        conn.executemany("DELETE FROM pending_active_calls WHERE url = ?", [(url,) for url in urls])
+    conn.close()
+
+
+def record_failed_attempts(urls, max_attempts=MAX_PENDING_ATTEMPTS):
+    """Analiz edilemeyen çağrıların deneme sayısını artırır.
+
+    Deneme sınırına ulaşan çağrılar bekleyenlerden çıkarılır ve döndürülür;
+    böylece başvuru koşulları hiç bulunamayan çağrı her turda yeniden kazınmaz.
+    """
+    if not urls:
+        return []
+    conn = get_connection()
+    try:
+        with conn:
+            conn.executemany("UPDATE pending_active_calls SET attempts = attempts + 1 WHERE url = ?", [(url,) for url in urls])
+            placeholders = ",".join("?" * len(urls))
+            given_up = [
+                dict(row)
+                for row in conn.execute(f"SELECT url, name, attempts FROM pending_active_calls WHERE attempts >= ? AND url IN ({placeholders})", (max_attempts, *urls))
+            ]
+            conn.executemany("DELETE FROM pending_active_calls WHERE url = ?", [(call["url"],) for call in given_up])
+    finally:
+        conn.close()
+    return given_up
@@ -1,10 +1,12 @@
-import requests
 from bs4 import BeautifulSoup
 import time
 import re
 import json
 import os
 from datetime import datetime
+from page_cache import fetch_page
+from profiler import stage
+import event_log
 
 BASE_URL = "https://tubitak.gov.tr"
 ACTIVE_CALLS_URL = f"{BASE_URL}/tr/destekler/sanayi/ulusal-destek-programlari"
@@ -19,19 +21,25 @@ def clean_text(text):
 
 
 def get_active_calls():
-    """Aktif çağrıları çeker ve döndürür."""
+    """Aktif çağrıları çeker ve döndürür.
+
+    Sayfa çekilemez veya çağrı bölümü bulunamazsa None döner; boş liste,
+    sayfada hiç aktif çağrı olmadığı anlamına gelir.
+    """
     print("🔍 Aktif çağrılar kontrol ediliyor...")
 
     try:
-        r = requests.get(ACTIVE_CALLS_URL, headers=headers)
-        soup = BeautifulSoup(r.text, "html.parser")
+        with stage("scrape.fetch"):
+            html = fetch_page(ACTIVE_CALLS_URL, headers=headers)
+        with stage("scrape.parse"):
+            soup = BeautifulSoup(html, "html.parser")
 
         # Aktif çağrılar container'ını bul
         active_calls_container = soup.select_one("#block-feza-gursey-views-block-cagrilar-block-2")
 
         if not active_calls_container:
             print("⚠️ Aktif çağrılar container'ı bulunamadı.")
-            return []
+            return None
 
         # Çağrı linklerini bul
         call_links = active_calls_container.select(".views-row a[href]")
@@ -51,14 +59,16 @@ def get_active_calls():
 
     except Exception as e:
         print(f"❌ Aktif çağrılar çekilirken hata: {str(e)}")
-        return []
+        return None
 
 
 def get_call_details(url):
     """Çağrı detay sayfasından 'Kimler Başvurabilir' bilgisini çeker."""
     try:
-        r = requests.get(url, headers=headers)
-        soup = BeautifulSoup(r.text, "html.parser")
+        with stage("scrape.fetch"):
+            html = fetch_page(url, headers=headers)
+        with stage("scrape.parse"):
+            soup = BeautifulSoup(html, "html.parser")
 
         # "Kimler Başvurabilir" başlığını bul
         basliklar = soup.select(".field--name-field-baslik.field__item")
@@ -102,7 +112,7 @@ def get_call_details(url):
         return None
 
     except Exception as e:
-        print(f"❌ Çağrı detayları çekilirken hata: {str(e)}")
+        event_log.error("scrape.detail_error", f"❌ Çağrı detayları çekilirken hata: {str(e)}", url=url)
         return None
 
 
@@ -121,7 +131,7 @@ def scrape_active_calls():
     rag_data = {"source": "TÜBİTAK Aktif Çağrılar", "url": ACTIVE_CALLS_URL, "extraction_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "programs": []}
 
     for i, call in enumerate(active_calls, 1):
-        print(f"[{i}/{len(active_calls)}] {call['name']}")
+        event_log.item("active_calls.found", f"[{i}/{len(active_calls)}] {call['name']}", index=i, total=len(active_calls), active_call=call["name"], url=call["url"])
 
         program_data = {
             "program_name": call["name"],
@@ -2,6 +2,10 @@ import requests
 import json
 import re
 import os
+import event_log
+from file_lock import file_lock, write_json_atomic
+from score_history import migrate_legacy_scores, record_score
+from response_parser import JSON_RESPONSE_MODE, JSON_CONTRACT_INSTRUCTION, build_reask_message, extract_score_from_response, extract_verdict_from_response
 
 # AnythingLLM API ayarları
 API_KEY = os.getenv("ANYTHINGLLM_API_KEY", "R212Y2R-Z494M7R-J8Q01DP-JY4DV4N")
@@ -11,6 +15,9 @@ headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/js
 
 FINAL_MEAN_FILE = "FINAL_ai_results_mean.json"
 
+# Varsayılan şirket profili (profil matrisi kullanılmadığında)
+DEFAULT_COMPANY_PROFILE = "büyük ölçekli kurumsal bir Ar-Ge Merkezi"
+
 
 def extract_text(text: str) -> str:
     """<document_metadata> bloklarını temizler ve satır sonlarını düzleştirir."""
@@ -40,98 +47,95 @@ def clean_response(raw, import_sources=False):
     return result
 
 
-def extract_score_from_response(response_text: str) -> float:
-    """AI yanıtından uygunluk skorunu çıkarır."""
-    if not response_text:
-        return None
-
-    # "Uygunluk Skoru" veya "Skor" kelimelerini ara
-    score_patterns = [
-        r"Uygunluk Skoru[:\s]*(\d+(?:\.\d+)?)",
-        r"Skor[:\s]*(\d+(?:\.\d+)?)",
-        r"(\d+(?:\.\d+)?)\s*\/\s*1",  # X/1 formatı
-        r"(\d+(?:\.\d+)?)\s*\/\s*10",  # X/10 formatı
-        r"(\d+(?:\.\d+)?)\s*\/\s*100",  # X/100 formatı
-    ]
-
-    for pattern in score_patterns:
-        match = re.search(pattern, response_text, re.IGNORECASE)
-        if match:
-            score = float(match.group(1))
-            # Eğer skor 1'den büyükse, 1'e normalize et
-            if score > 1:
-                if score <= 10:
-                    score = score / 10
-                elif score <= 100:
-                    score = score / 100
-                else:
-                    score = 1.0
-            return score
-
-    return None
-
-
 def update_final_mean_file(program_name: str, score: float):
-    """FINAL_ai_results_mean.json dosyasını günceller."""
-    # Mevcut dosyayı oku
-    if os.path.exists(FINAL_MEAN_FILE):
-        try:
-            with open(FINAL_MEAN_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            data = {}
-    else:
-        data = {}
-
-    # Program için skor listesini güncelle
-    if program_name not in data:
-        data[program_name] = {"scores": [], "mean": 0.0}
-
-    # Yeni skoru ekle
-    data[program_name]["scores"].append(score)
-
-    # Ortalamayı hesapla
-    scores = data[program_name]["scores"]
-    mean_score = sum(scores) / len(scores)
-    data[program_name]["mean"] = round(mean_score, 3)
-
-    # Dosyayı kaydet
+    """FINAL_ai_results_mean.json dosyasını günceller.
+
+    Okuma-değiştirme-yazma kilit altında yapılır ve dosya atomik olarak
+    değiştirilir; eşzamanlı güncellemeler birbirinin skorunu silmez.
+    """
+    # Eski skorlar geçmişe bu skor eklenmeden taşınır; yoksa iki kez sayılırdı
+    migrate_legacy_scores()
     try:
-        with open(FINAL_MEAN_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"Ortalama güncellendi: {program_name} - Yeni skor: {score}, Ortalama: {mean_score}")
+        with file_lock(FINAL_MEAN_FILE):
+            # Mevcut dosyayı oku
+            if os.path.exists(FINAL_MEAN_FILE):
+                try:
+                    with open(FINAL_MEAN_FILE, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (json.JSONDecodeError, FileNotFoundError):
+                    data = {}
+            else:
+                data = {}
+
+            # Program için skor listesini güncelle
+            if program_name not in data:
+                data[program_name] = {"scores": [], "mean": 0.0}
+
+            # Yeni skoru ekle
+            data[program_name]["scores"].append(score)
+
+            # Ortalamayı hesapla
+            scores = data[program_name]["scores"]
+            mean_score = sum(scores) / len(scores)
+            data[program_name]["mean"] = round(mean_score, 3)
+
+            # Dosyayı kaydet
+            write_json_atomic(FINAL_MEAN_FILE, data)
+        event_log.item("score.mean_updated", f"Ortalama güncellendi: {program_name} - Yeni skor: {score}, Ortalama: {mean_score}", program=program_name, score=score, mean=round(mean_score, 3))
     except Exception as e:
-        print(f"Ortalama dosyası kaydedilemedi: {str(e)}")
+        event_log.error("score.mean_save_failed", f"Ortalama dosyası kaydedilemedi: {str(e)}", program=program_name)
+
+    # Zaman damgalı skor geçmişine de ekle
+    record_score(program_name, score)
 
 
-def send_program_to_anythingllm(program_name, applicant_requirements, program_index, workspace_slug):
+def send_program_to_anythingllm(program_name, applicant_requirements, program_index, workspace_slug, company_profile=DEFAULT_COMPANY_PROFILE, base_url=BASE_URL):
     """Tek bir programı AnythingLLM'e gönderir ve yanıtı döndürür."""
     message = f"""
 Program Adı: {program_name}
 
 Başvuru Koşulları: {applicant_requirements}
 
-Bu program büyük ölçekli kurumsal bir Ar-Ge Merkezi için uygun mu?
+Bu program {company_profile} için uygun mu?
 """
+    if JSON_RESPONSE_MODE:
+        message += JSON_CONTRACT_INSTRUCTION
     data = {"message": message, "reset": False, "mode": "chat"}
 
     try:
-        print(f"[{program_index}] Gönderiliyor: {program_name}")
-        response = requests.post(f"{BASE_URL}/workspace/{workspace_slug}/chat", headers=headers, json=data, timeout=60)
+        event_log.item("llm.request", f"[{program_index}] Gönderiliyor: {program_name}", index=program_index, program=program_name, workspace=workspace_slug)
+        response = requests.post(f"{base_url}/workspace/{workspace_slug}/chat", headers=headers, json=data, timeout=60)
 
         if response.status_code == 200:
             raw = response.json()
             cleaned = clean_response(raw, import_sources=True)
 
-            print(f"[{program_index}] Başarılı: {program_name}")
-            print(f"Yanıt: {cleaned['response'][:100]}...")  # sadece özet
-            print("-" * 80)
+            # Yanıt özeti yalnızca JSON kaydında tutulur
+            event_log.item("llm.response", f"[{program_index}] Başarılı: {program_name}", index=program_index, program=program_name, preview=(cleaned["response"] or "")[:100], metrics=cleaned["metrics"])
             return cleaned
         else:
-            print(f"[{program_index}] Hata: {program_name} - Status Code: {response.status_code}")
-            print(f"Hata mesajı: {response.text}")
+            event_log.error("llm.error", f"[{program_index}] Hata: {program_name} - Status Code: {response.status_code}", index=program_index, program=program_name, status_code=response.status_code, body=response.text[:1000])
             return None
 
     except Exception as e:
-        print(f"[{program_index}] Exception: {program_name} - {str(e)}")
+        event_log.error("llm.exception", f"[{program_index}] Exception: {program_name} - {str(e)}", index=program_index, program=program_name)
+        return None
+
+
+def send_reask_to_anythingllm(response_text, program_index, workspace_slug, base_url=BASE_URL):
+    """Ayrıştırılamayan yanıtı tam analizi tekrarlamadan yapılandırılmış biçimde yeniden ister."""
+    data = {"message": build_reask_message(response_text), "reset": False, "mode": "chat"}
+
+    try:
+        event_log.item("llm.reask", f"[{program_index}] Yanıt yeniden soruluyor (skor ayrıştırılamadı)", index=program_index)
+        response = requests.post(f"{base_url}/workspace/{workspace_slug}/chat", headers=headers, json=data, timeout=60)
+
+        if response.status_code == 200:
+            return clean_response(response.json())
+
+        event_log.error("llm.reask_error", f"[{program_index}] Yeniden sorma hatası: Status Code: {response.status_code}", index=program_index, status_code=response.status_code)
+        return None
+
+    except Exception as e:
+        event_log.error("llm.reask_exception", f"[{program_index}] Yeniden sorma exception: {str(e)}", index=program_index)
         return None
@@ -3,22 +3,111 @@
 TÜBİTAK Analiz FastAPI Uygulaması
 """
 
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+import time
+
+# Soğuk başlangıç süresini ölçmek için modül yüklenmeye başladığı an
+APP_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 import threading
-import time
 import json
 import os
+import sys
 from datetime import datetime
 from typing import Dict, List, Optional
 import asyncio
-from scheduler import analyze_active_calls
-from main import main as run_full_analysis
+from results_index import query_results, list_indexed_runs, sync_result_files, VERDICTS, DEFAULT_PAGE_SIZE
+import leader_election
+import run_registry
+from active_call_changes import get_changes, get_open_calls
+from retention import ACTIVE_CALLS_OUTPUT_DIR, compact, get_retention_status, read_archived_snapshot
+from page_cache import get_page_cache_stats
+from program_selector import normalize_selection, resolve_selection
+from profiler import get_profile, get_profile_status, list_profiles, request_profile
+from event_log import get_log_status
+from response_parser import get_parse_stats
+from run_diff import CHANGE_UNCHANGED, DiffSummary, iter_run_diff, latest_run_pair, run_exists, summarize_run_diff
+from run_metrics import get_metrics_status
+from single_flight import SingleFlight
+from work_queue import get_queue_status
+
+# Başlangıç ayarları
+SCHEDULER_ENABLED = os.getenv("TUBITAK_SCHEDULER_ENABLED", "1") == "1"
+SCHEDULER_LEASE = "scheduler"
+STARTUP_BUDGET_SECONDS = float(os.getenv("TUBITAK_STARTUP_BUDGET_SECONDS", "1.0"))
+
+
+def run_full_analysis():
+    """Tam analizi çalıştırır; pipeline modülleri ilk kullanımda yüklenir."""
+    from main import main
+
+    return main()
+
+
+def run_selected_analysis(selection):
+    """Seçimle eşleşen programları analiz eder; pipeline modülleri ilk kullanımda yüklenir."""
+    from main import run_selected
+
+    return run_selected(selection)
+
+
+def get_analysis_worker():
+    """Sıcak worker'ı döndürür; ilk çağrıda oluşturur."""
+    from warm_worker import get_worker
+
+    return get_worker()
+
+
+def get_worker_status():
+    """Sıcak worker'ın durumunu döndürür; worker henüz başlamadıysa None."""
+    # Durum sorgusu worker'ı (ve scheduler/pipeline modüllerini) başlatmasın
+    warm_worker = sys.modules.get("warm_worker")
+    return warm_worker.get_worker_status() if warm_worker else None
+
+
+def get_llm_concurrency():
+    """LLM havuzunun eşzamanlılık durumunu döndürür; havuz henüz yüklenmediyse boş liste."""
+    # Durum sorgusu havuzu (ve sağlık kontrolü iş parçacığını) başlatmasın
+    backend_pool = sys.modules.get("backend_pool")
+    return backend_pool.get_concurrency_status() if backend_pool else []
+
+
+def analyze_active_calls():
+    """Aktif çağrı analizini sıcak worker'da çalıştırır ve bitmesini bekler.
+
+    Katalog, skor deposu ve eşleşme indeksi işler arasında bellekte kalır.
+    """
+    from scheduler import analyze_active_calls as run_active_calls_analysis
+
+    return get_analysis_worker().submit(run_active_calls_analysis).result()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Uygulama yaşam döngüsü: zamanlayıcıyı başlatır ve kapanışta durdurur."""
+    system_state.startup_seconds = round(time.perf_counter() - APP_IMPORT_STARTED, 3)
+    if system_state.startup_seconds > STARTUP_BUDGET_SECONDS:
+        print(f"⚠️ Başlangıç süresi bütçeyi aştı: {system_state.startup_seconds}s > {STARTUP_BUDGET_SECONDS}s")
+    else:
+        print(f"⚡ Uygulama {system_state.startup_seconds}s içinde hazır")
+
+    if SCHEDULER_ENABLED:
+        start_scheduler_loop()
+
+    # Sıcak worker modüllerini arka planda yükler; başlangıç süresine eklenmez
+    threading.Thread(target=get_analysis_worker, daemon=True).start()
+
+    yield
+
+    stop_scheduler_loop()
+
 
 # FastAPI uygulaması
-app = FastAPI(title="TÜBİTAK Analiz Sistemi", description="TÜBİTAK program analizi ve aktif çağrı takibi", version="1.0.0")
+app = FastAPI(title="TÜBİTAK Analiz Sistemi", description="TÜBİTAK program analizi ve aktif çağrı takibi", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -35,56 +124,181 @@ class SystemState:
     def __init__(self):
         self.is_scheduler_running = False
         self.is_analysis_running = False
+        # is_analysis_running'i açan özel çalıştırmanın adı (ör. profil matrisi)
+        self.running_analysis = None
         self.scheduler_thread = None
         self.analysis_thread = None
         self.last_analysis_time = None
         self.last_active_analysis_time = None
         self.analysis_status = "Hazır"
         self.scheduler_status = "Durduruldu"
+        self.scheduler_role = "Yedek"
+        self.stop_scheduler_loop = False
+        self.startup_seconds = None
 
 
 # Global sistem durumu
 system_state = SystemState()
 
-# Zamanlayıcı saatleri - dinamik liste
-SCHEDULER_TIMES = ["08:00", "12:00", "17:00", "00:00"]
+# İş türü başına tek çalıştırma: aynı türden tetiklemeler devam eden işe katılır
+JOB_FULL = "full"
+JOB_ACTIVE = "active"
+JOB_SELECTED = "selected"
+jobs = SingleFlight()
 
 
-# Zamanlayıcı başlatma fonksiyonu
-def start_scheduler():
-    """Zamanlayıcıyı başlatır."""
-    system_state.is_scheduler_running = True
-    system_state.scheduler_status = "Çalışıyor"
+def run_full_job():
+    run_full_analysis()
+    system_state.last_analysis_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def run_active_job():
+    analyze_active_calls()
+    system_state.last_active_analysis_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    def run_scheduler():
-        import schedule
 
-        while system_state.is_scheduler_running:
-            # Her döngüde zamanlayıcıları temizle ve yeniden oluştur
-            schedule.clear()
+def run_selected_job(selection):
+    run_selected_analysis(selection)
+
+
+JOB_FUNCTIONS = {JOB_FULL: run_full_job, JOB_ACTIVE: run_active_job, JOB_SELECTED: run_selected_job}
+JOB_LABELS = {JOB_FULL: "Tam analiz", JOB_ACTIVE: "Aktif çağrı analizi", JOB_SELECTED: "Seçimli analiz"}
+PROFILE_MATRIX_LABEL = "Profil matrisi analizi"
+
+
+def running_analysis_detail():
+    """Devam eden analizleri adlarıyla belirten hata mesajını döndürür."""
+    labels = []
+    if system_state.is_analysis_running:
+        labels.append(system_state.running_analysis or "Analiz işlemi")
+    for key in jobs.in_flight():
+        label = JOB_LABELS.get(key.split(":", 1)[0], "Analiz işlemi")
+        if label not in labels:
+            labels.append(label)
+    return f"{', '.join(labels) or 'Analiz işlemi'} zaten devam ediyor!"
 
-            # Mevcut saatlerle zamanlayıcıları oluştur
-            current_times = SCHEDULER_TIMES.copy()
-            # print(f"Zamanlayıcı saatleri: {current_times}")
 
-            for time_str in current_times:
-                schedule.every().day.at(time_str).do(analyze_active_calls)
-                # print(f"Zamanlayıcı eklendi: {time_str}")
+def trigger_job(job_type, reason, *args):
+    """İşi arka planda başlatır; aynı türden iş sürüyorsa ona katılır.
 
-            # 60 saniye boyunca zamanlayıcıları kontrol et
-            for i in range(60):
-                if not system_state.is_scheduler_running:
+    Zamanlayıcı tetiklemeleri ve API istekleri aynı yoldan geçer, böylece
+    çakışan tetiklemeler ikinci bir çalıştırma başlatmaz. Argümanlı işlerde
+    (ör. seçimli analiz) yalnızca aynı argümanlarla başlatılan işe katılınır.
+    Katılındıysa True döner.
+    """
+    key = f"{job_type}:{json.dumps(args, sort_keys=True, ensure_ascii=False)}" if args else job_type
+    future, joined = jobs.start(key, JOB_FUNCTIONS[job_type], *args)
+    if joined:
+        print(f"🔗 {reason}: devam eden '{key}' çalıştırmasına katıldı")
+        return True
+
+    print(f"▶️ {reason}: '{key}' çalıştırması başlatıldı ({leader_election.INSTANCE_ID})")
+
+    def report_error(done):
+        if done.exception():
+            print(f"Analiz hatası ({job_type}, {reason}): {str(done.exception())}")
+
+    future.add_done_callback(report_error)
+    return False
+
+
+def run_scheduled_slot(slot):
+    """Sahiplenilen slot için aktif çağrı analizini tetikler."""
+    trigger_job(JOB_ACTIVE, f"⏰ Zamanlanmış slot {slot}")
+
+
+def run_catch_up(current_times):
+    """Kesinti sırasında kaçırılan slotları tek bir telafi çalıştırmasında birleştirir."""
+    missed = leader_election.find_missed_slots(current_times)
+    # Başka bir lider aynı slotları sahiplenmiş olabilir; yalnızca alabildiklerimizi say
+    claimed = [slot for slot in missed if leader_election.claim_slot(slot)]
+    if claimed:
+        print(f"⏪ {len(claimed)} kaçırılan slot tek çalıştırmada telafi ediliyor: {', '.join(claimed)}")
+        trigger_job(JOB_ACTIVE, f"Telafi ({claimed[0]} - {claimed[-1]})")
+
+
+# Zamanlayıcı döngüsü
+def start_scheduler_loop():
+    """Lider seçimine katılan zamanlayıcı döngüsünü bu işlemde başlatır.
+
+    Her worker döngüyü çalıştırır fakat yalnızca paylaşılan kirayı tutan lider
+    slotları tetikler. Lider kapanırsa kira süresi dolunca başka bir worker
+    devralır; saatler ve açık/kapalı durumu paylaşılan veritabanından okunur.
+    """
+    if system_state.scheduler_thread and system_state.scheduler_thread.is_alive():
+        return
+
+    system_state.stop_scheduler_loop = False
+
+    def run_scheduler():
+        was_leader = False
+        while not system_state.stop_scheduler_loop:
+            try:
+                enabled = leader_election.is_scheduler_enabled()
+                is_leader = enabled and leader_election.try_acquire_lease(SCHEDULER_LEASE)
+                if not is_leader:
+                    leader_election.release_lease(SCHEDULER_LEASE)
+                current_times = leader_election.get_scheduler_times()
+            except Exception as e:
+                print(f"Zamanlayıcı durumu okunamadı: {str(e)}")
+                enabled, is_leader, current_times = False, False, []
+
+            system_state.is_scheduler_running = enabled
+            system_state.scheduler_status = "Çalışıyor" if enabled else "Durduruldu"
+            system_state.scheduler_role = "Lider" if is_leader else "Yedek"
+
+            # Liderlik yeni alındıysa kesinti sırasında kaçırılan slotları telafi et
+            if is_leader and not was_leader:
+                try:
+                    run_catch_up(current_times)
+                except Exception as e:
+                    print(f"Kaçırılan slotlar kontrol edilemedi: {str(e)}")
+            was_leader = is_leader
+
+            # Kira yenileme aralığı boyunca her saniye slotları kontrol et
+            for i in range(leader_election.LEASE_RENEW_SECONDS):
+                if system_state.stop_scheduler_loop:
                     break
-                schedule.run_pending()
+                if is_leader:
+                    now = datetime.now()
+                    time_str = now.strftime("%H:%M")
+                    slot = f"{now.strftime('%Y-%m-%d')} {time_str}"
+                    # Slot sahiplenme atomik olduğu için lider değişse bile her slot bir kez çalışır
+                    if time_str in current_times and leader_election.claim_slot(slot):
+                        run_scheduled_slot(slot)
                 time.sleep(1)
 
+        leader_election.release_lease(SCHEDULER_LEASE)
+
     system_state.scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
     system_state.scheduler_thread.start()
-    print("🚀 Zamanlayıcı başlatıldı")
+    print(f"🚀 Zamanlayıcı döngüsü başlatıldı ({leader_election.INSTANCE_ID})")
+
+
+def stop_scheduler_loop():
+    """Bu işlemdeki zamanlayıcı döngüsünü durdurur ve liderliği bırakır."""
+    system_state.stop_scheduler_loop = True
+    system_state.is_scheduler_running = False
+    system_state.scheduler_status = "Durduruldu"
+    system_state.scheduler_thread = None
+    leader_election.release_lease(SCHEDULER_LEASE)
+
+
+def start_scheduler():
+    """Zamanlayıcıyı tüm işlemler için başlatır."""
+    leader_election.set_scheduler_enabled(True)
+    system_state.is_scheduler_running = True
+    system_state.scheduler_status = "Çalışıyor"
+    start_scheduler_loop()
 
 
-# Uygulama başladığında zamanlayıcıyı otomatik başlat
-start_scheduler()
+def stop_scheduler():
+    """Zamanlayıcıyı tüm işlemler için durdurur."""
+    leader_election.set_scheduler_enabled(False)
+    leader_election.release_lease(SCHEDULER_LEASE)
+    system_state.is_scheduler_running = False
+    system_state.scheduler_status = "Durduruldu"
+    system_state.scheduler_role = "Yedek"
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -101,114 +315,168 @@ async def get_home():
 async def get_status():
     """Sistem durumunu döndürür."""
     # Log'u sadece durum değiştiğinde göster
+    running_jobs = jobs.in_flight()
+    is_analysis_running = system_state.is_analysis_running or bool(running_jobs)
     return {
-        "is_analysis_running": system_state.is_analysis_running,
+        "is_analysis_running": is_analysis_running,
         "is_scheduler_running": system_state.is_scheduler_running,
-        "analysis_status": system_state.analysis_status,
+        "analysis_status": "Çalışıyor" if is_analysis_running else system_state.analysis_status,
+        "running_jobs": running_jobs,
         "scheduler_status": system_state.scheduler_status,
         "last_analysis_time": system_state.last_analysis_time,
         "last_active_analysis_time": system_state.last_active_analysis_time,
+        "scheduler_role": system_state.scheduler_role,
+        "startup_seconds": system_state.startup_seconds,
+        "parse_stats": get_parse_stats(),
+        "token_usage": get_metrics_status(),
+        "worker": get_worker_status(),
+        "llm_concurrency": get_llm_concurrency(),
+        "page_cache": get_page_cache_stats(),
+        "work_queues": get_queue_status(),
+        "profile": get_profile_status(),
+        "logging": get_log_status(),
     }
 
 
 @app.get("/api/scheduler-times")
 async def get_scheduler_times():
     """Zamanlayıcı saatlerini döndürür."""
-    return {"times": SCHEDULER_TIMES, "count": len(SCHEDULER_TIMES)}
+    times = leader_election.get_scheduler_times()
+    return {"times": times, "count": len(times)}
 
 
 @app.get("/api/scheduler-debug")
 async def get_scheduler_debug():
     """Zamanlayıcı debug bilgilerini döndürür."""
-    import schedule
-
     return {
-        "current_times": SCHEDULER_TIMES,
+        "current_times": leader_election.get_scheduler_times(),
         "is_scheduler_running": system_state.is_scheduler_running,
-        "scheduled_jobs": len(schedule.jobs),
-        "jobs": [str(job) for job in schedule.jobs],
+        "scheduler_role": system_state.scheduler_role,
+        "instance_id": leader_election.INSTANCE_ID,
+        "leader": leader_election.get_lease_holder(SCHEDULER_LEASE),
+        "loop_alive": bool(system_state.scheduler_thread and system_state.scheduler_thread.is_alive()),
     }
 
 
 @app.post("/api/scheduler-times/add")
 async def add_scheduler_time(time_str: str):
     """Yeni zamanlayıcı saati ekler."""
-    global SCHEDULER_TIMES
-
-    # Saat formatını kontrol et (HH:MM)
-    import re
-
-    if not re.match(r"^([01]?[0-9]|2[0-3]):[0-5][0-9]$", time_str):
+    # Saat formatını kontrol et ve slot karşılaştırması için HH:MM biçimine getir
+    try:
+        time_str = leader_election.normalize_time(time_str)
+    except ValueError:
         raise HTTPException(status_code=400, detail="Geçersiz saat formatı! HH:MM formatında olmalı.")
 
-    if time_str in SCHEDULER_TIMES:
+    if not leader_election.add_scheduler_time(time_str):
         raise HTTPException(status_code=400, detail="Bu saat zaten mevcut!")
 
-    SCHEDULER_TIMES.append(time_str)
-    SCHEDULER_TIMES.sort()  # Saatleri sırala
-
-    return {"message": f"Saat {time_str} eklendi", "times": SCHEDULER_TIMES}
+    return {"message": f"Saat {time_str} eklendi", "times": leader_election.get_scheduler_times()}
 
 
 @app.delete("/api/scheduler-times/remove")
 async def remove_scheduler_time(time_str: str):
     """Zamanlayıcı saatini kaldırır."""
-    global SCHEDULER_TIMES
+    try:
+        time_str = leader_election.normalize_time(time_str)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz saat formatı! HH:MM formatında olmalı.")
 
-    if time_str not in SCHEDULER_TIMES:
+    if not leader_election.remove_scheduler_time(time_str):
         raise HTTPException(status_code=404, detail="Bu saat bulunamadı!")
 
-    SCHEDULER_TIMES.remove(time_str)
-
-    return {"message": f"Saat {time_str} kaldırıldı", "times": SCHEDULER_TIMES}
+    return {"message": f"Saat {time_str} kaldırıldı", "times": leader_election.get_scheduler_times()}
 
 
 @app.post("/api/start-full-analysis")
-async def start_full_analysis(background_tasks: BackgroundTasks):
-    """Tüm çağrıları analiz et işlemini başlatır."""
+async def start_full_analysis():
+    """Tüm çağrıları analiz et işlemini başlatır; sürmekte olan tam analize katılır."""
     if system_state.is_analysis_running:
-        raise HTTPException(status_code=400, detail="Analiz işlemi zaten devam ediyor!")
+        raise HTTPException(status_code=400, detail=running_analysis_detail())
 
-    system_state.is_analysis_running = True
-    system_state.analysis_status = "Çalışıyor"
+    if trigger_job(JOB_FULL, "API"):
+        return {"message": "Tam analiz zaten devam ediyor; mevcut çalıştırmaya katılındı", "joined": True}
+    return {"message": "Tam analiz başlatıldı", "joined": False}
 
-    def run_analysis():
-        try:
-            run_full_analysis()
-            system_state.last_analysis_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        except Exception as e:
-            print(f"Analiz hatası: {str(e)}")
-        finally:
-            system_state.is_analysis_running = False
-            system_state.analysis_status = "Hazır"
 
-    background_tasks.add_task(run_analysis)
+@app.post("/api/start-active-analysis")
+async def start_active_analysis():
+    """Aktif çağrıları analiz et işlemini başlatır; sürmekte olan aktif analize katılır."""
+    if system_state.is_analysis_running:
+        raise HTTPException(status_code=400, detail=running_analysis_detail())
+
+    if trigger_job(JOB_ACTIVE, "API"):
+        return {"message": "Aktif çağrı analizi zaten devam ediyor; mevcut çalıştırmaya katılındı", "joined": True}
+    return {"message": "Aktif çağrı analizi başlatıldı", "joined": False}
 
-    return {"message": "Tam analiz başlatıldı"}
 
+@app.post("/api/start-selected-analysis")
+async def start_selected_analysis(
+    call_numbers: List[str] = Query(default=[]), patterns: List[str] = Query(default=[]), stale_since: Optional[str] = None, failed_last_run: bool = False, dry_run: bool = False
+):
+    """Yalnızca seçilen programları analiz eder: çağrı numarası, ad kalıbı, eskime tarihi veya son analizde hata.
 
-@app.post("/api/start-active-analysis")
-async def start_active_analysis(background_tasks: BackgroundTasks):
-    """Aktif çağrıları analiz et işlemini başlatır."""
+    dry_run ile analiz başlatılmadan eşleşen programlar döndürülür.
+    """
     if system_state.is_analysis_running:
-        raise HTTPException(status_code=400, detail="Analiz işlemi zaten devam ediyor!")
+        raise HTTPException(status_code=400, detail=running_analysis_detail())
+
+    try:
+        selection = normalize_selection(call_numbers, patterns, stale_since, failed_last_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not selection:
+        raise HTTPException(status_code=400, detail="En az bir seçim ölçütü verilmeli!")
+
+    programs = resolve_selection(selection)
+    matched = [{"index": index, "program_name": program.get("program_name")} for index, program in programs]
+    if dry_run or not programs:
+        return {"message": f"{len(programs)} program seçimle eşleşti", "selection": selection, "programs": matched, "joined": False}
+
+    if trigger_job(JOB_SELECTED, "API", selection):
+        return {"message": "Aynı seçimle analiz zaten devam ediyor; mevcut çalıştırmaya katılındı", "selection": selection, "programs": matched, "joined": True}
+    return {"message": f"{len(programs)} program için seçimli analiz başlatıldı", "selection": selection, "programs": matched, "joined": False}
+
+
+@app.post("/api/start-profile-matrix")
+async def start_profile_matrix(background_tasks: BackgroundTasks, profiles: Optional[List[Dict[str, str]]] = None):
+    """Programlar × şirket profilleri matris analizini başlatır."""
+    if system_state.is_analysis_running or jobs.in_flight():
+        raise HTTPException(status_code=400, detail=running_analysis_detail())
+
+    if profiles and any("id" not in p or "description" not in p for p in profiles):
+        raise HTTPException(status_code=400, detail="Her profilde 'id' ve 'description' alanları olmalı!")
 
     system_state.is_analysis_running = True
+    system_state.running_analysis = PROFILE_MATRIX_LABEL
     system_state.analysis_status = "Çalışıyor"
 
-    def run_active_analysis():
+    def run_matrix():
+        from profile_matrix import run_profile_matrix
+
         try:
-            analyze_active_calls()
-            system_state.last_active_analysis_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            run_profile_matrix(profiles=profiles)
+            system_state.last_analysis_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         except Exception as e:
-            print(f"Aktif analiz hatası: {str(e)}")
+            print(f"Profil matrisi hatası: {str(e)}")
         finally:
             system_state.is_analysis_running = False
+            system_state.running_analysis = None
             system_state.analysis_status = "Hazır"
 
-    background_tasks.add_task(run_active_analysis)
+    background_tasks.add_task(run_matrix)
+
+    return {"message": "Profil matrisi analizi başlatıldı"}
+
 
-    return {"message": "Aktif çağrı analizi başlatıldı"}
+@app.get("/api/profile-matrix")
+async def get_profile_matrix():
+    """En son profil matrisini ve profil karşılaştırma özetini döndürür."""
+    from profile_matrix import load_latest_matrix
+
+    matrix = load_latest_matrix()
+    if not matrix:
+        raise HTTPException(status_code=404, detail="Henüz profil matrisi oluşturulmadı!")
+    return matrix
 
 
 @app.post("/api/toggle-scheduler")
@@ -216,10 +484,7 @@ async def toggle_scheduler():
     """Zamanlayıcıyı başlatır/durdurur."""
     if system_state.is_scheduler_running:
         # Zamanlayıcıyı durdur
-        system_state.is_scheduler_running = False
-        system_state.scheduler_status = "Durduruldu"
-        if system_state.scheduler_thread:
-            system_state.scheduler_thread = None
+        stop_scheduler()
         return {"message": "Zamanlayıcı durduruldu"}
     else:
         # Zamanlayıcıyı başlat
@@ -231,50 +496,268 @@ async def toggle_scheduler():
 async def stop_all():
     """Tüm işlemleri durdurur."""
     system_state.is_analysis_running = False
-    system_state.is_scheduler_running = False
+    system_state.running_analysis = None
     system_state.analysis_status = "Hazır"
-    system_state.scheduler_status = "Durduruldu"
-
-    if system_state.scheduler_thread:
-        system_state.scheduler_thread = None
+    stop_scheduler()
 
     return {"message": "Tüm işlemler durduruldu"}
 
 
+@app.get("/api/backends")
+async def get_backends():
+    """AnythingLLM backend havuzunun durumunu döndürür."""
+    from backend_pool import get_backend_pool
+
+    return {"backends": get_backend_pool().get_status()}
+
+
 @app.get("/api/results")
 async def get_results():
     """Analiz sonuçlarını döndürür."""
     try:
-        # Son analiz dosyalarını bul
-        html_files = []
-        json_files = []
-
-        if os.path.exists("ai_analyse_results_html"):
-            for file in os.listdir("ai_analyse_results_html"):
-                if file.endswith(".html"):
-                    html_files.append(file)
-
-        if os.path.exists("ai_analyse_results_json"):
-            for file in os.listdir("ai_analyse_results_json"):
-                if file.endswith(".json"):
-                    json_files.append(file)
+        # Son analiz dosyalarını çalıştırma kayıtlarından al (arşivlenmişler dahil)
+        runs = run_registry.list_runs(5, kind=run_registry.RUN_KIND_FULL)
+        html_files = [os.path.basename(run["html_file"]) for run in runs if run["html_file"]]
+        json_files = [os.path.basename(run["json_file"]) for run in runs if run["json_file"]]
 
-        # Aktif çağrı analiz sonuçları
+        # Aktif çağrı analiz sonuçları (saklama politikası klasörü sınırlı tutar)
         active_analysis_files = []
-        if os.path.exists("active_calls_analysis_output"):
-            for file in os.listdir("active_calls_analysis_output"):
+        if os.path.exists(ACTIVE_CALLS_OUTPUT_DIR):
+            for file in os.listdir(ACTIVE_CALLS_OUTPUT_DIR):
                 if file.endswith(".json"):
                     active_analysis_files.append(file)
 
         return {
-            "html_files": sorted(html_files, reverse=True)[:5],  # Son 5 dosya
-            "json_files": sorted(json_files, reverse=True)[:5],
+            "html_files": html_files,  # Son 5 dosya
+            "json_files": json_files,
             "active_analysis_files": sorted(active_analysis_files, reverse=True)[:5],
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Sonuçlar alınırken hata: {str(e)}")
 
 
+@app.get("/api/active-analysis/{file_name}")
+async def get_active_analysis(file_name: str):
+    """Aktif çağrı analiz çıktısını döndürür; dosya arşivlendiyse arşivden okunur."""
+    if os.path.basename(file_name) != file_name or not file_name.endswith(".json"):
+        raise HTTPException(status_code=400, detail="Geçersiz dosya adı")
+
+    path = os.path.join(ACTIVE_CALLS_OUTPUT_DIR, file_name)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    snapshot = read_archived_snapshot(file_name)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Analiz çıktısı bulunamadı")
+    return snapshot
+
+
+@app.get("/api/active-calls")
+async def get_active_calls_state():
+    """Son kontrolde açık olan aktif çağrıları döndürür."""
+    calls = get_open_calls()
+    return {"calls": calls, "count": len(calls)}
+
+
+@app.get("/api/active-calls/changes")
+async def get_active_call_changes(since: Optional[int] = None, limit: int = 100):
+    """Aktif çağrı değişiklik akışını (açılan, kapanan, yeniden adlandırılan) döndürür.
+
+    İstemci dönen "last_id" değerini bir sonraki istekte "since" olarak gönderir.
+    """
+    return get_changes(since, min(max(limit, 1), 500))
+
+
+@app.post("/api/profile/next-run")
+async def request_next_run_profile():
+    """Bir sonraki tam analiz, kazıma veya aktif çağrı analizini profil modunda çalıştırır."""
+    request_profile()
+    return {"message": "Bir sonraki çalıştırma profil modunda yapılacak", "profile": get_profile_status()}
+
+
+@app.get("/api/profiles")
+async def get_profiles(limit: int = 20):
+    """Kayıtlı profil özetlerini listeler."""
+    return {"profiles": list_profiles(limit), "status": get_profile_status()}
+
+
+@app.get("/api/profiles/{profile_id}")
+async def get_profile_summary(profile_id: int):
+    """Profil özetini (aşama süreleri ve en pahalı fonksiyonlar) döndürür."""
+    profile = get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail=f"Profil bulunamadı: {profile_id}")
+    return profile
+
+
+@app.get("/api/profiles/{profile_id}/flamegraph", response_class=PlainTextResponse)
+async def get_profile_flamegraph(profile_id: int):
+    """Katlanmış yığın (flamegraph.pl / speedscope) çıktısını döndürür."""
+    profile = get_profile(profile_id)
+    if not profile or not os.path.exists(profile["folded_file"]):
+        raise HTTPException(status_code=404, detail=f"Profil çıktısı bulunamadı: {profile_id}")
+    with open(profile["folded_file"], "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@app.get("/api/documents")
+async def get_documents():
+    """Referans belgeleri ve workspace'lere gömülü belge durumunu döndürür."""
+    from document_sync import get_document_status
+
+    return get_document_status()
+
+
+@app.get("/api/retention")
+async def get_retention():
+    """Saklama politikasının durumunu (açık/arşivlenmiş çıktılar, disk kullanımı) döndürür."""
+    return get_retention_status()
+
+
+@app.post("/api/retention/compact")
+async def compact_results():
+    """Saklama politikasını hemen uygular."""
+    return compact()
+
+
+@app.get("/api/results/query")
+async def query_analysis_results(
+    program: Optional[str] = None,
+    call_number: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    verdict: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    run_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    """Tüm çalıştırmalardaki sonuçları indeks üzerinden filtreler ve sayfalar."""
+    if verdict and verdict not in VERDICTS:
+        raise HTTPException(status_code=400, detail=f"Geçersiz sonuç! Geçerli değerler: {', '.join(VERDICTS)}")
+
+    try:
+        return query_results(
+            program=program,
+            call_number=call_number,
+            min_score=min_score,
+            max_score=max_score,
+            verdict=verdict,
+            date_from=date_from,
+            date_to=date_to,
+            run_id=run_id,
+            cursor=cursor,
+            limit=limit,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sonuçlar sorgulanırken hata: {str(e)}")
+
+
+@app.get("/api/results/runs")
+async def get_indexed_runs():
+    """İndeksteki çalıştırmaları listeler."""
+    return {"runs": list_indexed_runs()}
+
+
+@app.get("/api/results/runs/{run_id}/token-usage")
+async def get_run_token_usage(run_id: int):
+    """Çalıştırmanın program bazında token ve süre özetini döndürür."""
+    run = run_registry.get_run(run_id)
+    if run is None or run["token_summary"] is None:
+        raise HTTPException(status_code=404, detail="Bu çalıştırma için token kaydı bulunamadı")
+    return run["token_summary"]
+
+
+def resolve_diff_runs(run_a, run_b):
+    """Karşılaştırılacak çalıştırmaları doğrular; verilmezse indeksteki son iki çalıştırma kullanılır."""
+    if run_a is None and run_b is None:
+        pair = latest_run_pair()
+        if pair is None:
+            raise HTTPException(status_code=404, detail="Karşılaştırmak için en az iki çalıştırma gerekli")
+        return pair
+    if run_a is None or run_b is None:
+        raise HTTPException(status_code=400, detail="run_a ve run_b birlikte verilmeli!")
+    for run_id in (run_a, run_b):
+        if not run_exists(run_id):
+            raise HTTPException(status_code=404, detail=f"Çalıştırma {run_id} indekste bulunamadı")
+    return run_a, run_b
+
+
+@app.get("/api/results/diff")
+async def get_run_diff(run_a: Optional[int] = None, run_b: Optional[int] = None, include_unchanged: bool = False):
+    """İki çalıştırma arasındaki skor farklarını, sonuç değişimlerini ve eklenen/çıkan programları akış olarak döndürür.
+
+    Yanıt NDJSON'dur: her satır bir program farkı, son satır {"summary": ...} özetidir.
+    """
+    run_a, run_b = resolve_diff_runs(run_a, run_b)
+
+    def stream():
+        summary = DiffSummary(run_a, run_b)
+        for entry in iter_run_diff(run_a, run_b, include_unchanged=True):
+            summary.add(entry)
+            if include_unchanged or entry["change"] != CHANGE_UNCHANGED:
+                yield json.dumps(entry, ensure_ascii=False) + "\n"
+        yield json.dumps({"summary": summary.to_dict()}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/api/results/diff/summary")
+async def get_run_diff_summary(run_a: Optional[int] = None, run_b: Optional[int] = None):
+    """İki çalıştırma arasındaki farkın yalnızca özetini döndürür."""
+    run_a, run_b = resolve_diff_runs(run_a, run_b)
+    return summarize_run_diff(run_a, run_b)
+
+
+@app.get("/api/runs")
+async def get_runs(limit: int = 20):
+    """Çalıştırma kayıt defterindeki en yeni çalıştırmaları listeler."""
+    return {"runs": run_registry.list_runs(min(max(limit, 1), 200))}
+
+
+@app.get("/api/runs/{run_id}")
+async def get_run(run_id: int):
+    """Tek bir çalıştırmanın kaydını (başlangıç/bitiş, program sayısı, workspace, ayar özeti) döndürür."""
+    run = run_registry.get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Çalıştırma bulunamadı")
+    return run
+
+
+@app.post("/api/results/reindex")
+async def reindex_results():
+    """Sonuç dosyalarını yeniden tarayarak indeksi günceller."""
+    indexed_count = sync_result_files(force=True)
+    return {"message": "İndeks güncellendi", "indexed_count": indexed_count}
+
+
+@app.get("/api/score-stats")
+async def get_score_stats(program: Optional[str] = None):
+    """Program bazında skor istatistiklerini (ortalama, medyan, std, yüzdelikler, kayma) döndürür."""
+    from score_history import get_score_statistics
+
+    stats = get_score_statistics(program)
+    return {"programs": stats, "count": len(stats)}
+
+
+@app.get("/api/score-trends")
+async def get_score_trends(window: int = 3, threshold: float = 0.1, direction: Optional[str] = None):
+    """Uygunluk eğilimi yükselen veya düşen programları döndürür; direction "up" veya "down" olabilir."""
+    from score_history import TREND_DIRECTIONS, get_score_trends as compute_score_trends
+
+    if window < 1:
+        raise HTTPException(status_code=400, detail="Pencere en az 1 olmalı!")
+    if direction and direction not in TREND_DIRECTIONS:
+        raise HTTPException(status_code=400, detail=f"Geçersiz yön: {direction} (up veya down olmalı)")
+
+    trends = compute_score_trends(window, threshold)
+    if direction:
+        trends = [t for t in trends if t["direction"] == TREND_DIRECTIONS[direction]]
+    return {"trends": trends, "count": len(trends)}
+
+
 if __name__ == "__main__":
     import uvicorn
 
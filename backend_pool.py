@@ -0,0 +1,238 @@
+import os
+import threading
+import time
+import requests
+from ai_analyzer import BASE_URL, headers, send_program_to_anythingllm, send_reask_to_anythingllm, DEFAULT_COMPANY_PROFILE
+from workspace_manager import create_new_workspace
+from document_sync import sync_workspace_documents
+from profiler import stage
+from concurrency_controller import ADAPTIVE_CONCURRENCY, AdaptiveLimit
+
+# Backend havuzu ayarları (virgülle ayrılmış AnythingLLM API adresleri)
+BACKEND_URLS = [url.strip() for url in os.getenv("ANYTHINGLLM_BASE_URLS", BASE_URL).split(",") if url.strip()]
+MAX_CONCURRENCY_PER_BACKEND = int(os.getenv("ANYTHINGLLM_MAX_CONCURRENCY", "2"))
+HEALTH_CHECK_INTERVAL = 30
+MAX_CONSECUTIVE_FAILURES = 2
+ACQUIRE_TIMEOUT = 300
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class Backend:
+    """Tek bir AnythingLLM sunucusunun durumunu tutar."""
+
+    def __init__(self, url, max_concurrency=MAX_CONCURRENCY_PER_BACKEND):
+        self.url = url
+        self.max_concurrency = max_concurrency
+        # Sabit sınır yerine gecikmeye göre ayarlanan sınır (kapalıysa max_concurrency)
+        self.controller = AdaptiveLimit(max_concurrency) if ADAPTIVE_CONCURRENCY else None
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.completed = 0
+        self.failed = 0
+        self.workspace_slug = None
+        self.last_error = None
+        self.last_check = 0.0
+
+    def capacity(self):
+        """Bu sunucuya aynı anda gönderilebilecek istek sayısı."""
+        return self.controller.current() if self.controller else self.max_concurrency
+
+    def check_health(self):
+        """/auth uç noktası ile sunucunun erişilebilir olduğunu doğrular."""
+        self.last_check = time.time()
+        try:
+            response = requests.get(f"{self.url}/auth", headers=headers, timeout=10)
+            self.healthy = response.status_code == 200
+            self.last_error = None if self.healthy else f"Status Code: {response.status_code}"
+        except Exception as e:
+            self.healthy = False
+            self.last_error = str(e)
+        return self.healthy
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "max_concurrency": self.max_concurrency,
+            "concurrency": self.controller.to_dict() if self.controller else None,
+            "completed": self.completed,
+            "failed": self.failed,
+            "workspace_slug": self.workspace_slug,
+            "last_error": self.last_error,
+        }
+
+
+class BackendPool:
+    """Birden fazla AnythingLLM sunucusu arasında yük dağıtır.
+
+    İstekler, sağlıklı ve kapasitesi dolmamış sunucular arasından en az bekleyen
+    isteği olana yönlendirilir. Üst üste hata veren sunucu devreden çıkarılır ve
+    arka plandaki sağlık kontrolü düzelince geri alır; son sağlıklı sunucu
+    devrede kalır. Uygun sunucu yoksa istek ACQUIRE_TIMEOUT boyunca bekler.
+    """
+
+    def __init__(self, urls=None, max_concurrency=MAX_CONCURRENCY_PER_BACKEND):
+        self.backends = [Backend(url, max_concurrency) for url in (urls or BACKEND_URLS)]
+        self.condition = threading.Condition()
+        # Uygun sunucu bekleyen istek, sağlık kontrolünü aralığı beklemeden başlatır
+        self.probe_requested = threading.Event()
+        self.health_thread = threading.Thread(target=self._health_loop, daemon=True)
+        self.health_thread.start()
+
+    def _health_loop(self):
+        """Devre dışı sunucuları düzenli aralıklarla yeniden kontrol eder."""
+        while True:
+            self.probe_requested.wait(HEALTH_CHECK_INTERVAL)
+            self.probe_requested.clear()
+            for backend in self.backends:
+                if not backend.healthy and backend.check_health():
+                    print(f"✅ Backend yeniden devrede: {backend.url}")
+                    # Yeni sunucuda workspace yoksa oluştur
+                    if not backend.workspace_slug:
+                        backend.workspace_slug = create_new_workspace(backend.url)
+                        if backend.workspace_slug:
+                            sync_workspace_documents(backend.url, backend.workspace_slug)
+                    with self.condition:
+                        backend.consecutive_failures = 0
+                        self.condition.notify_all()
+
+    def total_capacity(self):
+        """Sağlıklı sunucuların ulaşabileceği toplam eşzamanlı istek kapasitesini döndürür."""
+        return sum(b.controller.max_limit if b.controller else b.max_concurrency for b in self.backends if b.healthy)
+
+    def provision_workspaces(self):
+        """Her sağlıklı sunucuda bu çalıştırma için yeni bir workspace oluşturur."""
+        for backend in self.backends:
+            if not backend.check_health():
+                print(f"⚠️ Backend erişilemiyor, atlanıyor: {backend.url} ({backend.last_error})")
+                continue
+            backend.workspace_slug = create_new_workspace(backend.url)
+            if not backend.workspace_slug:
+                backend.healthy = False
+                backend.last_error = "Workspace oluşturulamadı"
+                continue
+            # Şirket belgeleri yalnızca içerikleri değiştiyse yeniden yüklenir
+            sync_workspace_documents(backend.url, backend.workspace_slug)
+
+        ready = [b for b in self.backends if b.healthy and b.workspace_slug]
+        print(f"🖧 {len(ready)}/{len(self.backends)} backend hazır")
+        return len(ready) > 0
+
+    def acquire(self, exclude=()):
+        """En az bekleyen isteği olan uygun sunucuyu seçer; uygun sunucu yoksa bekler."""
+        deadline = time.time() + ACQUIRE_TIMEOUT
+        with self.condition:
+            while True:
+                candidates = [b for b in self.backends if b.healthy and b.workspace_slug and b.outstanding < b.capacity() and b not in exclude]
+                if candidates:
+                    backend = min(candidates, key=lambda b: b.outstanding / b.capacity())
+                    backend.outstanding += 1
+                    return backend
+
+                # Denenmemiş sunucu kalmadıysa bekleme
+                if all(b in exclude for b in self.backends):
+                    return None
+
+                # Sağlıklı sunucu yoksa hemen vazgeçme; sağlık kontrolünü tetikle ve geri dönmesini bekle
+                if not any(b.healthy and b.workspace_slug and b not in exclude for b in self.backends):
+                    self.probe_requested.set()
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self.condition.wait(timeout=min(remaining, 5))
+
+    def release(self, backend, success, seconds=None):
+        """Sunucuyu serbest bırakır, başarı/hata sayaçlarını ve eşzamanlılık sınırını günceller."""
+        if backend.controller and seconds is not None:
+            backend.controller.on_sample(seconds, success)
+
+        with self.condition:
+            backend.outstanding -= 1
+            if success:
+                backend.completed += 1
+                backend.consecutive_failures = 0
+            else:
+                backend.failed += 1
+                backend.consecutive_failures += 1
+                # Son sağlıklı sunucu devreden çıkarılmaz; aksi halde kısa bir kesinti tüm çalıştırmayı düşürür
+                others_ready = any(b.healthy and b.workspace_slug for b in self.backends if b is not backend)
+                if backend.healthy and others_ready and backend.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                    backend.healthy = False
+                    backend.last_error = f"{backend.consecutive_failures} ardışık hata"
+                    print(f"⚠️ Backend devreden çıkarıldı: {backend.url}")
+            self.condition.notify_all()
+
+    def call(self, fn):
+        """fn(backend) çağrısını uygun bir sunucuda çalıştırır; başarısız olursa diğerlerini dener."""
+        tried = []
+        while len(tried) < len(self.backends):
+            backend = self.acquire(exclude=tried)
+            if backend is None:
+                break
+
+            result = None
+            started = time.perf_counter()
+            try:
+                with stage("llm.request"):
+                    result = fn(backend)
+            except Exception as e:
+                backend.last_error = str(e)
+            finally:
+                self.release(backend, result is not None, time.perf_counter() - started)
+
+            if result is not None:
+                return result
+            tried.append(backend)
+
+        return None
+
+    def get_status(self):
+        """Havuzdaki sunucuların durumunu döndürür."""
+        with self.condition:
+            return [b.to_dict() for b in self.backends]
+
+    def get_concurrency_status(self):
+        """Sunucu başına güncel eşzamanlılık sınırını ve gecikme sinyalini döndürür."""
+        with self.condition:
+            return [{"url": b.url, "outstanding": b.outstanding, **(b.controller.to_dict() if b.controller else {"limit": b.max_concurrency})} for b in self.backends]
+
+
+def get_concurrency_status():
+    """Havuz oluşturulduysa eşzamanlılık durumunu döndürür; havuz yoksa boş liste."""
+    return _pool.get_concurrency_status() if _pool else []
+
+
+def get_backend_pool():
+    """İşlem genelinde paylaşılan backend havuzunu döndürür."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = BackendPool()
+        return _pool
+
+
+def send_program_with_pool(program_name, applicant_requirements, program_index, company_profile=DEFAULT_COMPANY_PROFILE, pool=None):
+    """Programı havuzdaki uygun bir sunucuya gönderir."""
+    pool = pool or get_backend_pool()
+    return pool.call(
+        lambda backend: send_program_to_anythingllm(
+            program_name,
+            applicant_requirements,
+            program_index,
+            backend.workspace_slug,
+            company_profile=company_profile,
+            base_url=backend.url,
+        )
+    )
+
+
+def reask_with_pool(response_text, program_index, pool=None):
+    """Ayrıştırılamayan yanıtı havuzdaki uygun bir sunucuya yeniden sorar."""
+    pool = pool or get_backend_pool()
+    return pool.call(lambda backend: send_reask_to_anythingllm(response_text, program_index, backend.workspace_slug, base_url=backend.url))
@@ -0,0 +1,156 @@
+import json
+import os
+import requests
+import event_log
+from ai_analyzer import DEFAULT_COMPANY_PROFILE, clean_response, headers
+from backend_pool import get_backend_pool, send_program_with_pool
+from response_parser import VERDICTS
+
+# Toplu analiz ayarları
+BATCH_TOKEN_BUDGET = int(os.getenv("TUBITAK_BATCH_TOKEN_BUDGET", "3000"))
+MAX_BATCH_SIZE = int(os.getenv("TUBITAK_MAX_BATCH_SIZE", "8"))
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def estimate_tokens(text):
+    """Metnin yaklaşık token sayısını tahmin eder (≈ 4 karakter / token)."""
+    return len(text or "") // 4 + 1
+
+
+def plan_batches(programs, token_budget=BATCH_TOKEN_BUDGET, max_batch_size=MAX_BATCH_SIZE):
+    """Programları token bütçesini aşmayacak şekilde gruplara ayırır.
+
+    Kısa başvuru koşulları aynı istekte birleşir; bütçeden büyük tek bir
+    program kendi grubunda tek başına gönderilir.
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+
+    for program in programs:
+        tokens = estimate_tokens(program["program_name"]) + estimate_tokens(program["applicant_requirements"])
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(program)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_message(programs, company_profile=DEFAULT_COMPANY_PROFILE):
+    """Birden fazla programı tek bir istekte soran mesajı oluşturur."""
+    parts = []
+    for i, program in enumerate(programs, 1):
+        parts.append(f"[{i}] Program Adı: {program['program_name']}\nBaşvuru Koşulları: {program['applicant_requirements']}")
+
+    programs_text = "\n\n".join(parts)
+    return f"""
+Aşağıdaki {len(programs)} programın her biri {company_profile} için uygun mu?
+
+{programs_text}
+
+Yanıtı yalnızca aşağıdaki biçimde bir JSON dizisi olarak ver, başka metin ekleme:
+[{{"id": 1, "score": 0.0, "verdict": "Uygun | Şartlı Uygun | Uygun Değil", "explanation": "en fazla 2-3 cümle"}}]
+"""
+
+
+def _find_record_array(text):
+    """Metindeki nesnelerden oluşan ilk JSON dizisini döndürür; yoksa boş liste.
+
+    Açıklamada geçen "[2 program]" veya "[1]" gibi köşeli parantezler
+    atlanır; her "[" konumundan çözümleme denenir.
+    """
+    start = text.find("[")
+    while start != -1:
+        try:
+            items, _ = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            items = None
+        if isinstance(items, list) and any(isinstance(item, dict) for item in items):
+            return items
+        start = text.find("[", start + 1)
+    return []
+
+
+def parse_batch_response(response_text, expected_count):
+    """Toplu yanıtı program sırasına göre kayıtlara ayırır.
+
+    Geçersiz veya eksik kayıtlar için ilgili konumda None döner.
+    """
+    records = [None] * expected_count
+    for item in _find_record_array(response_text or ""):
+        if not isinstance(item, dict):
+            continue
+        try:
+            position = int(item.get("id")) - 1
+            score = float(item.get("score"))
+        except (TypeError, ValueError):
+            continue
+        verdict = item.get("verdict")
+        if not 0 <= position < expected_count or not 0 <= score <= 1 or verdict not in VERDICTS:
+            continue
+        records[position] = {"score": score, "verdict": verdict, "explanation": str(item.get("explanation", "")).strip()}
+
+    return records
+
+
+def format_record(record):
+    """Yapılandırılmış kaydı tekli analizle aynı metin biçimine çevirir."""
+    return f"Uygunluk Skoru: {record['score']}\nSonuç: {record['verdict']}\nKısa açıklama: {record['explanation']}"
+
+
+def send_batch_to_anythingllm(programs, batch_index, workspace_slug, company_profile=DEFAULT_COMPANY_PROFILE, base_url=None):
+    """Bir program grubunu tek istekte AnythingLLM'e gönderir."""
+    data = {"message": build_batch_message(programs, company_profile), "reset": False, "mode": "chat"}
+
+    try:
+        event_log.item("llm.batch_request", f"[B{batch_index}] Toplu gönderiliyor: {len(programs)} program", batch=batch_index, programs=len(programs))
+        response = requests.post(f"{base_url}/workspace/{workspace_slug}/chat", headers=headers, json=data, timeout=120)
+
+        if response.status_code == 200:
+            return clean_response(response.json())
+
+        event_log.error("llm.batch_error", f"[B{batch_index}] Hata: Status Code: {response.status_code}", batch=batch_index, status_code=response.status_code)
+        return None
+
+    except Exception as e:
+        event_log.error("llm.batch_exception", f"[B{batch_index}] Exception: {str(e)}", batch=batch_index)
+        return None
+
+
+def analyze_batch(programs, batch_index, company_profile=DEFAULT_COMPANY_PROFILE, pool=None):
+    """Program grubunu analiz eder ve her program için tekli analiz biçiminde sonuç döndürür.
+
+    programs öğeleri "program_name", "applicant_requirements" ve isteğe bağlı
+    "index" (log için program sırası) alanlarını içerir.
+
+    Toplu yanıtta eksik veya geçersiz çıkan programlar tek tek yeniden
+    gönderilir. Toplu isteğin metrikleri yalnızca ayrıştırılan ilk sonuca eklenir.
+    """
+    pool = pool or get_backend_pool()
+    results = [None] * len(programs)
+
+    if len(programs) > 1:
+        raw = pool.call(lambda backend: send_batch_to_anythingllm(programs, batch_index, backend.workspace_slug, company_profile, backend.url))
+        if raw:
+            records = parse_batch_response(raw.get("response"), len(programs))
+            metrics = raw.get("metrics")
+            for i, record in enumerate(records):
+                if record:
+                    results[i] = {"response": format_record(record), "metrics": metrics, "batched": True}
+                    metrics = None
+
+            parsed = sum(1 for r in results if r)
+            event_log.item("llm.batch_parsed", f"[B{batch_index}] {parsed}/{len(programs)} program toplu yanıttan ayrıştırıldı", batch=batch_index, parsed=parsed, programs=len(programs))
+
+    # Eksik kalanlar için tekli çağrıya geri dön
+    for i, program in enumerate(programs):
+        if results[i] is None:
+            results[i] = send_program_with_pool(program["program_name"], program["applicant_requirements"], program.get("index", i + 1), company_profile=company_profile, pool=pool)
+
+    return results
@@ -0,0 +1,70 @@
+import os
+import threading
+
+# Uyarlanabilir eşzamanlılık ayarları
+ADAPTIVE_CONCURRENCY = os.getenv("ANYTHINGLLM_ADAPTIVE_CONCURRENCY", "1") == "1"
+MIN_CONCURRENCY = 1
+MAX_ADAPTIVE_CONCURRENCY = int(os.getenv("ANYTHINGLLM_MAX_ADAPTIVE_CONCURRENCY", "16"))
+
+# Gecikme, en iyi gözlenen değerin bu katını aşmadıkça sınır artırılır
+LATENCY_TOLERANCE = 1.5
+LATENCY_SMOOTHING = 0.2
+# Taban gecikme, model değişince güncellenebilmesi için her örnekte biraz yukarı kayar
+BASELINE_DRIFT = 0.001
+ERROR_BACKOFF = 0.5
+LATENCY_BACKOFF = 0.9
+
+
+class AdaptiveLimit:
+    """Gözlenen gecikmeye göre eşzamanlı istek sınırını ayarlar (AIMD).
+
+    Gecikme taban değere yakın kaldıkça sınır her tam pencerede yaklaşık bir
+    artar (1 / sınır adımlarla). Gecikme taban değerin LATENCY_TOLERANCE
+    katını aşarsa sınır biraz, hata veya zaman aşımında yarıya düşer.
+    """
+
+    def __init__(self, initial, min_limit=MIN_CONCURRENCY, max_limit=MAX_ADAPTIVE_CONCURRENCY):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, initial)
+        self.limit = float(initial)
+        self.latency = None
+        self.baseline = None
+        self.samples = 0
+        self.last_decision = None
+        self.lock = threading.Lock()
+
+    def current(self):
+        """Şu an izin verilen eşzamanlı istek sayısı."""
+        return max(self.min_limit, int(self.limit))
+
+    def on_sample(self, seconds, success):
+        """Biten bir isteğin süresini ve sonucunu sınıra yansıtır."""
+        with self.lock:
+            self.samples += 1
+            if not success:
+                self.limit = max(self.min_limit, self.limit * ERROR_BACKOFF)
+                self.last_decision = "error_backoff"
+                return
+
+            self.latency = seconds if self.latency is None else (1 - LATENCY_SMOOTHING) * self.latency + LATENCY_SMOOTHING * seconds
+            self.baseline = seconds if self.baseline is None else min(seconds, self.baseline * (1 + BASELINE_DRIFT))
+
+            if self.latency <= self.baseline * LATENCY_TOLERANCE:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self.last_decision = "increase"
+            else:
+                self.limit = max(self.min_limit, self.limit * LATENCY_BACKOFF)
+                self.last_decision = "latency_backoff"
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "limit": self.current(),
+                "limit_raw": round(self.limit, 2),
+                "max_limit": self.max_limit,
+                "latency_ewma": round(self.latency, 3) if self.latency is not None else None,
+                "latency_baseline": round(self.baseline, 3) if self.baseline is not None else None,
+                "latency_ratio": round(self.latency / self.baseline, 2) if self.baseline else None,
+                "samples": self.samples,
+                "last_decision": self.last_decision,
+            }
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import random
+import re
+
+# Aynı başvuru metnine sahip programlar tek kez analiz edilir
+DEDUP_ENABLED = os.getenv("TUBITAK_DEDUP", "1") == "1"
+# Neredeyse aynı metinler için MinHash (isteğe bağlı)
+DEDUP_NEAR_DUPLICATES = os.getenv("TUBITAK_DEDUP_MINHASH", "0") == "1"
+DEDUP_NEAR_THRESHOLD = float(os.getenv("TUBITAK_DEDUP_THRESHOLD", "0.9"))
+
+# MinHash imzası: 64 permütasyon, 16 bant × 4 satır (LSH)
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(MINHASH_PERMUTATIONS)]
+
+MATCH_EXACT = "exact"
+MATCH_NEAR = "near"
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_text(text):
+    """Büyük/küçük harf, noktalama ve boşluk farklarını yok sayan biçime çevirir."""
+    text = (text or "").replace("I", "ı").replace("İ", "i").lower()
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def text_hash(text):
+    """Normalize edilmiş metnin özetini döndürür."""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _shingles(words):
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(text):
+    """Kelime üçlülerinden MinHash imzası üretir."""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in _shingles(normalize_text(text).split())]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def estimate_similarity(signature_a, signature_b):
+    """İki imzanın tahmini Jaccard benzerliği."""
+    return sum(1 for x, y in zip(signature_a, signature_b) if x == y) / len(signature_a)
+
+
+class DedupIndex:
+    """Programları başvuru metnine göre gruplar.
+
+    Her grubun ilk programı temsilcidir ve yalnızca o analiz edilir; sonraki
+    üyeler temsilcinin sonucunu alır. Programlar sırayla verildiği için hem
+    toplu akışta hem kazıma sırasında kullanılabilir.
+    """
+
+    def __init__(self, near_duplicates=DEDUP_NEAR_DUPLICATES, threshold=DEDUP_NEAR_THRESHOLD):
+        self.near_duplicates = near_duplicates
+        self.threshold = threshold
+        self.by_hash = {}
+        self.signatures = {}
+        self.buckets = {}
+        self.stats = {"programs": 0, "representatives": 0, MATCH_EXACT: 0, MATCH_NEAR: 0}
+
+    def _bands(self, signature):
+        rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+        return [(band, signature[band * rows : (band + 1) * rows]) for band in range(MINHASH_BANDS)]
+
+    def _find_near(self, signature):
+        candidates = {name for key in self._bands(signature) for name in self.buckets.get(key, ())}
+        best, best_similarity = None, 0.0
+        for candidate in candidates:
+            similarity = estimate_similarity(signature, self.signatures[candidate][0])
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is not None and best_similarity >= self.threshold:
+            return self.signatures[best][1], best_similarity
+        return None, 0.0
+
+    def assign(self, program):
+        """Programı bir gruba yerleştirir.
+
+        Program yeni bir grubun temsilcisiyse None, aksi halde temsilciyi ve
+        eşleşme güvenini içeren işareti döndürür.
+        """
+        self.stats["programs"] += 1
+        digest = text_hash(program["applicant_requirements"])
+        known = self.by_hash.get(digest)
+        if known is not None:
+            # Aynı metin daha önce yakın eşleşmeyle gruplandıysa güven de aynı kalır
+            representative, match, similarity = known
+        else:
+            representative, match, similarity = None, MATCH_EXACT, 1.0
+            signature = minhash_signature(program["applicant_requirements"]) if self.near_duplicates else None
+            if signature is not None:
+                representative, similarity = self._find_near(signature)
+                match = MATCH_NEAR
+            if representative is None:
+                self.stats["representatives"] += 1
+                # Başvuru metni saklanmaz; indeks katalog boyunca yalnızca ad ve sıra tutar
+                reference = {"index": program["index"], "program_name": program["program_name"]}
+                self.by_hash[digest] = (reference, MATCH_EXACT, 1.0)
+                if signature is not None:
+                    self.signatures[digest] = (signature, reference)
+                    for key in self._bands(signature):
+                        self.buckets.setdefault(key, []).append(digest)
+                return None
+            similarity = round(similarity, 3)
+            self.by_hash[digest] = (representative, match, similarity)
+
+        self.stats[match] += 1
+        return {"representative": representative["program_name"], "representative_index": representative["index"], "match": match, "similarity": similarity}
+
+    def get_stats(self):
+        """Gruplama özetini döndürür."""
+        return {**self.stats, "saved_calls": self.stats[MATCH_EXACT] + self.stats[MATCH_NEAR]}
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import requests
+from datetime import datetime
+from ai_analyzer import API_KEY
+from results_index import get_connection
+
+# RAG bağlamı olarak workspace'e gömülecek şirket belgeleri
+REFERENCE_DOCS_DIR = os.getenv("TUBITAK_REFERENCE_DOCS_DIR", "reference_docs")
+UPLOAD_TIMEOUT = 300
+EMBED_TIMEOUT = 600
+
+# Dosya yüklemede Content-Type'ı requests belirler (multipart)
+upload_headers = {"Authorization": f"Bearer {API_KEY}"}
+json_headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
+
+
+def file_hash(path):
+    """Dosya içeriğinin SHA-256 özetini döndürür."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_reference_documents(directory=REFERENCE_DOCS_DIR):
+    """Belge klasöründeki dosyaları {göreli yol: içerik özeti} olarak döndürür."""
+    documents = {}
+    if not os.path.isdir(directory):
+        return documents
+
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if name.startswith("."):
+                continue
+            path = os.path.join(root, name)
+            documents[os.path.relpath(path, directory).replace(os.sep, "/")] = file_hash(path)
+    return documents
+
+
+def upload_document(base_url, path):
+    """Belgeyi AnythingLLM belge deposuna yükler ve konumunu döndürür."""
+    try:
+        with open(path, "rb") as f:
+            response = requests.post(f"{base_url}/document/upload", headers=upload_headers, files={"file": (os.path.basename(path), f)}, timeout=UPLOAD_TIMEOUT)
+        if response.status_code != 200:
+            print(f"❌ Belge yüklenemedi ({path}): {response.status_code}")
+            return None
+        documents = response.json().get("documents") or []
+        return documents[0].get("location") if documents else None
+    except Exception as e:
+        print(f"❌ Belge yüklenirken hata ({path}): {str(e)}")
+        return None
+
+
+def update_embeddings(base_url, workspace_slug, adds, deletes):
+    """Workspace'e belge ekler/çıkarır; daha önce gömülmüş belgeler vektör önbelleğinden gelir."""
+    try:
+        response = requests.post(f"{base_url}/workspace/{workspace_slug}/update-embeddings", headers=json_headers, json={"adds": adds, "deletes": deletes}, timeout=EMBED_TIMEOUT)
+        if response.status_code != 200:
+            print(f"❌ Workspace belgeleri güncellenemedi ({workspace_slug}): {response.status_code}")
+            return False
+        return True
+    except Exception as e:
+        print(f"❌ Workspace belgeleri güncellenirken hata ({workspace_slug}): {str(e)}")
+        return False
+
+
+def remove_documents(base_url, locations):
+    """Artık kullanılmayan belgeleri AnythingLLM deposundan siler."""
+    try:
+        response = requests.delete(f"{base_url}/system/remove-documents", headers=json_headers, json={"names": locations}, timeout=UPLOAD_TIMEOUT)
+        return response.status_code == 200
+    except Exception as e:
+        print(f"⚠️ Eski belgeler silinemedi: {str(e)}")
+        return False
+
+
+def _upload_and_record(conn, base_url, directory, path, content_hash, uploaded_at):
+    """Belgeyi yükler ve konumunu içerik özetiyle kaydeder; yüklenemezse None."""
+    location = upload_document(base_url, os.path.join(directory, path))
+    if location:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO document_uploads (base_url, content_hash, location, file_name, uploaded_at) VALUES (?, ?, ?, ?, ?)",
+                (base_url, content_hash, location, path, uploaded_at),
+            )
+    return location
+
+
+def sync_workspace_documents(base_url, workspace_slug, directory=REFERENCE_DOCS_DIR):
+    """Referans belgeleri workspace ile eşitler.
+
+    Belge, sunucuya içerik özeti başına yalnızca bir kez yüklenir; yeni
+    workspace'lere mevcut konumuyla eklenir. Workspace'te aynı özetle duran
+    belgeye dokunulmaz, değişen belgenin eski sürümü ve klasörden silinen
+    belgeler workspace'ten çıkarılır. Önbellekteki konum reddedilirse
+    (sunucuda silinmiş olabilir) belge bir kez yeniden yüklenir. Eski
+    yükleme, onu gömülü tutan son workspace de eşitlendiğinde sunucudan silinir.
+    """
+    current = scan_reference_documents(directory)
+    conn = get_connection()
+    try:
+        embedded = {
+            row["path"]: (row["content_hash"], row["location"])
+            for row in conn.execute("SELECT path, content_hash, location FROM workspace_documents WHERE base_url = ? AND workspace_slug = ?", (base_url, workspace_slug))
+        }
+        if not current and not embedded:
+            return None
+
+        uploads = {row["content_hash"]: row["location"] for row in conn.execute("SELECT content_hash, location FROM document_uploads WHERE base_url = ?", (base_url,))}
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        summary = {"added": 0, "removed": 0, "unchanged": 0, "uploaded": 0}
+        added, deletes = [], []
+        # Önceki yüklemelerden önbellekle gelen içerik özetleri
+        reused = set()
+
+        for path, content_hash in sorted(current.items()):
+            previous = embedded.get(path)
+            if previous and previous[0] == content_hash:
+                summary["unchanged"] += 1
+                continue
+
+            location = uploads.get(content_hash)
+            if location:
+                reused.add(content_hash)
+            else:
+                location = _upload_and_record(conn, base_url, directory, path, content_hash, now)
+                if not location:
+                    continue
+                uploads[content_hash] = location
+                summary["uploaded"] += 1
+            added.append((path, content_hash, location))
+            if previous:
+                deletes.append(previous[1])
+
+        removed_paths = [path for path in embedded if path not in current]
+        deletes.extend(embedded[path][1] for path in removed_paths)
+
+        if added or deletes:
+            if not update_embeddings(base_url, workspace_slug, [location for _, _, location in added], deletes):
+                if not reused:
+                    return None
+                # Kayıtlı konum sunucuda silinmiş olabilir; önbelleği bırakıp bir kez yeniden yükle
+                print(f"🔁 {len(reused)} belge yeniden yükleniyor ({workspace_slug})")
+                with conn:
+                    conn.executemany("DELETE FROM document_uploads WHERE base_url = ? AND content_hash = ?", [(base_url, content_hash) for content_hash in reused])
+                retried = []
+                for path, content_hash, location in added:
+                    if content_hash in reused:
+                        location = _upload_and_record(conn, base_url, directory, path, content_hash, now)
+                        if not location:
+                            uploads.pop(content_hash, None)
+                            continue
+                        uploads[content_hash] = location
+                        summary["uploaded"] += 1
+                    retried.append((path, content_hash, location))
+                added = retried
+                if not update_embeddings(base_url, workspace_slug, [location for _, _, location in added], deletes):
+                    return None
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO workspace_documents (base_url, workspace_slug, path, content_hash, location, embedded_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(base_url, workspace_slug, path, content_hash, location, now) for path, content_hash, location in added],
+                )
+                conn.executemany("DELETE FROM workspace_documents WHERE base_url = ? AND workspace_slug = ? AND path = ?", [(base_url, workspace_slug, path) for path in removed_paths])
+            summary["added"] = len(added)
+            summary["removed"] = len(removed_paths)
+
+        # Güncel klasörde karşılığı kalmayan ve hiçbir workspace'te gömülü durmayan yüklemeler
+        # sunucudan da silinir; başka workspace'teki eski sürüm, o workspace eşitlenirken çıkarılır
+        still_embedded = {row["content_hash"] for row in conn.execute("SELECT DISTINCT content_hash FROM workspace_documents WHERE base_url = ?", (base_url,))}
+        stale = {content_hash: location for content_hash, location in uploads.items() if content_hash not in set(current.values()) and content_hash not in still_embedded}
+        if stale and remove_documents(base_url, list(stale.values())):
+            with conn:
+                conn.executemany("DELETE FROM document_uploads WHERE base_url = ? AND content_hash = ?", [(base_url, content_hash) for content_hash in stale])
+    finally:
+        conn.close()
+
+    print(f"📚 Belgeler eşitlendi ({workspace_slug}): {summary['added']} eklendi, {summary['removed']} çıkarıldı, {summary['unchanged']} değişmedi, {summary['uploaded']} yüklendi")
+    return summary
+
+
+def get_document_status(directory=REFERENCE_DOCS_DIR):
+    """Referans belgeleri ve workspace başına gömülü belge sayılarını döndürür."""
+    current = scan_reference_documents(directory)
+    conn = get_connection()
+    try:
+        uploads = [dict(row) for row in conn.execute("SELECT base_url, content_hash, location, file_name, uploaded_at FROM document_uploads ORDER BY uploaded_at DESC")]
+        workspaces = [
+            dict(row)
+            for row in conn.execute(
+                "SELECT base_url, workspace_slug, COUNT(*) AS documents, MAX(embedded_at) AS last_embedded FROM workspace_documents GROUP BY base_url, workspace_slug ORDER BY last_embedded DESC"
+            )
+        ]
+    finally:
+        conn.close()
+    return {"directory": directory, "documents": [{"path": path, "content_hash": content_hash} for path, content_hash in sorted(current.items())], "uploads": uploads, "workspaces": workspaces}
@@ -0,0 +1,151 @@
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime
+
+# Yapılandırılmış log ayarları
+LOG_FILE = os.getenv("TUBITAK_LOG_FILE", os.path.join("logs", "tubitak.jsonl"))
+LOG_LEVEL = os.getenv("TUBITAK_LOG_LEVEL", "INFO").upper()
+LOG_CONSOLE = os.getenv("TUBITAK_LOG_CONSOLE", "1") == "1"
+# Program başına tekrarlanan mesajların yazılma oranı (uyarı ve hatalar örneklenmez)
+LOG_SAMPLE_RATE = float(os.getenv("TUBITAK_LOG_SAMPLE_RATE", "1.0"))
+LOG_QUEUE_SIZE = 10000
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+class EventLogger:
+    """Log kayıtlarını kuyruğa alıp arka plandaki tek bir iş parçacığında yazar.
+
+    Çağıran iş parçacığı yalnızca kaydı kuyruğa koyar; JSON satırı dosyaya,
+    okunabilir mesaj konsola yazıcı iş parçacığında gider. Kuyruk dolarsa
+    kayıt beklemeden atılır ve sayılır.
+    """
+
+    def __init__(self, log_file=LOG_FILE, level=LOG_LEVEL, console=LOG_CONSOLE, sample_rate=LOG_SAMPLE_RATE):
+        self.log_file = log_file
+        self.level = LEVELS.get(level, LEVELS["INFO"])
+        self.console = console
+        self.sample_rate = sample_rate
+        self.queue = queue.Queue(LOG_QUEUE_SIZE)
+        self.stats = {"written": 0, "sampled_out": 0, "dropped": 0, "errors": 0}
+        # Log dosyası açılamadıysa kayıtlar stdout'a yazılır
+        self.fallback = False
+        self.thread = threading.Thread(target=self._write_loop, name="event-log", daemon=True)
+        self.thread.start()
+
+    def _open_log_file(self):
+        """Log dosyasını açar; klasör oluşturulamaz veya dosya açılamazsa stdout'a düşer."""
+        if not self.log_file:
+            return open(os.devnull, "w")
+        try:
+            if os.path.dirname(self.log_file):
+                os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+            return open(self.log_file, "a", encoding="utf-8")
+        except OSError as e:
+            self.stats["errors"] += 1
+            self.fallback = True
+            sys.stderr.write(f"⚠️ Log dosyası açılamadı ({self.log_file}): {str(e)} - kayıtlar konsola yazılıyor\n")
+            return sys.stdout
+
+    def _write_loop(self):
+        f = self._open_log_file()
+        try:
+            while True:
+                record = self.queue.get()
+                try:
+                    message = record.pop("_console", None)
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                    # Yedek çıktı zaten konsol; mesaj iki kez yazılmaz
+                    if self.console and message is not None and not self.fallback:
+                        sys.stdout.write(message + "\n")
+                    # Kuyruk boşaldığında diske ve konsola aktar
+                    if self.queue.empty():
+                        f.flush()
+                        if self.console:
+                            sys.stdout.flush()
+                    self.stats["written"] += 1
+                except Exception:
+                    self.stats["errors"] += 1
+                finally:
+                    self.queue.task_done()
+        finally:
+            if f is not sys.stdout:
+                f.close()
+
+    def log(self, level, event, message=None, sampled=False, **fields):
+        """Kaydı kuyruğa koyar; seviye altında kalan veya örneklemede elenen kayıtlar yazılmaz."""
+        level_value = LEVELS.get(level, LEVELS["INFO"])
+        if level_value < self.level:
+            return
+        if sampled and level_value < LEVELS["WARNING"] and self.sample_rate < 1 and random.random() >= self.sample_rate:
+            self.stats["sampled_out"] += 1
+            return
+
+        record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "level": level, "event": event, "thread": threading.current_thread().name}
+        if message is not None:
+            record["message"] = message
+        record.update(fields)
+        record["_console"] = message
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def flush(self, timeout=5):
+        """Kuyruktaki kayıtların yazılmasını en fazla timeout saniye bekler."""
+        done = threading.Event()
+
+        def wait():
+            self.queue.join()
+            done.set()
+
+        threading.Thread(target=wait, daemon=True).start()
+        return done.wait(timeout)
+
+    def get_status(self):
+        return {"log_file": self.log_file, "fallback": self.fallback, "level": LEVEL_NAMES[self.level], "sample_rate": self.sample_rate, "queued": self.queue.qsize(), **self.stats}
+
+
+def get_logger():
+    """İşlem genelinde paylaşılan logger'ı döndürür; ilk çağrıda yazıcıyı başlatır."""
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            _logger = EventLogger()
+            atexit.register(_logger.flush)
+        return _logger
+
+
+def debug(event, message=None, **fields):
+    get_logger().log("DEBUG", event, message, **fields)
+
+
+def info(event, message=None, **fields):
+    get_logger().log("INFO", event, message, **fields)
+
+
+def warning(event, message=None, **fields):
+    get_logger().log("WARNING", event, message, **fields)
+
+
+def error(event, message=None, **fields):
+    get_logger().log("ERROR", event, message, **fields)
+
+
+def item(event, message=None, level="INFO", **fields):
+    """Program veya sayfa başına tekrarlanan kayıt; LOG_SAMPLE_RATE ile örneklenir."""
+    get_logger().log(level, event, message, sampled=True, **fields)
+
+
+def get_log_status():
+    """Logger sayaçlarını döndürür; logger henüz başlamadıysa None."""
+    return _logger.get_status() if _logger else None
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: yalnızca işlem içi kilit uygulanır
+    fcntl = None
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _thread_lock(path):
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+@contextmanager
+def file_lock(path):
+    """Dosya üzerindeki okuma-değiştirme-yazma bloğunu iş parçacıkları ve işlemler arasında sıraya koyar.
+
+    İşlemler arası kilit dosyanın yanındaki "<dosya>.lock" üzerinde tutulur.
+    """
+    with _thread_lock(os.path.abspath(path)):
+        if fcntl is None:
+            yield
+            return
+        with open(f"{path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_json_atomic(path, data):
+    """JSON'u geçici dosyaya yazıp yerine taşır; okuyucular yarım yazılmış dosya görmez."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
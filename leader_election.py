@@ -0,0 +1,208 @@
+import os
+import re
+import socket
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Lider seçimi ayarları
+STATE_DB = "scheduler_state.db"
+LEASE_TTL_SECONDS = int(os.getenv("TUBITAK_LEASE_TTL_SECONDS", "30"))
+LEASE_RENEW_SECONDS = 10
+
+DEFAULT_SCHEDULER_TIMES = ["08:00", "12:00", "17:00", "00:00"]
+_TIME_PATTERN = re.compile(r"^([01]?[0-9]|2[0-3]):([0-5][0-9])$")
+
+# Kesinti sonrası en fazla bu kadar geriye bakılarak kaçırılan slotlar telafi edilir
+CATCH_UP_WINDOW_HOURS = int(os.getenv("TUBITAK_CATCH_UP_WINDOW_HOURS", "24"))
+
+# Bu işlemin benzersiz kimliği (host:pid:rastgele)
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def get_connection():
+    """Paylaşılan zamanlayıcı durum veritabanına bağlantı açar ve şemayı hazırlar."""
+    conn = sqlite3.connect(STATE_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS fired_slots (
+            slot TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            fired_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS scheduler_times (
+            time_str TEXT PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        """
+    )
+    return conn
+
+
+def try_acquire_lease(name, ttl=LEASE_TTL_SECONDS):
+    """Kira (lease) boşsa, süresi dolmuşsa veya zaten bizdeyse alır/yeniler.
+
+    Kirayı tutan işlem lider olur. Lider ölürse kira süresi dolduğunda başka
+    bir işlem otomatik olarak devralır.
+    """
+    now = time.time()
+    conn = get_connection()
+    try:
+        # BEGIN IMMEDIATE yazma kilidini alır; kontrol ve güncelleme atomik olur
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT holder, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+        if row and row["holder"] != INSTANCE_ID and row["expires_at"] > now:
+            conn.execute("ROLLBACK")
+            return False
+        conn.execute("INSERT OR REPLACE INTO leases (name, holder, expires_at) VALUES (?, ?, ?)", (name, INSTANCE_ID, now + ttl))
+        conn.execute("COMMIT")
+        return True
+    except sqlite3.Error as e:
+        print(f"Lider kirası alınamadı: {str(e)}")
+        return False
+    finally:
+        conn.close()
+
+
+def release_lease(name):
+    """Kira bizdeyse bırakır; böylece başka bir işlem beklemeden devralabilir."""
+    try:
+        conn = get_connection()
+        conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, INSTANCE_ID))
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Lider kirası bırakılamadı: {str(e)}")
+
+
+def get_lease_holder(name):
+    """Kirayı şu an tutan işlemi döndürür (süresi dolmuşsa None)."""
+    conn = get_connection()
+    row = conn.execute("SELECT holder, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+    conn.close()
+    if row and row["expires_at"] > time.time():
+        return row["holder"]
+    return None
+
+
+def claim_slot(slot):
+    """Zamanlanmış bir slotu sahiplenir; her slot yalnızca bir kez sahiplenilebilir."""
+    conn = get_connection()
+    try:
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO fired_slots (slot, holder, fired_at) VALUES (?, ?, ?)",
+            (slot, INSTANCE_ID, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        )
+        return cursor.rowcount == 1
+    finally:
+        conn.close()
+
+
+def find_missed_slots(times, now=None, window_hours=CATCH_UP_WINDOW_HOURS):
+    """Son tetiklenen slottan bu yana çalışmamış slotları eskiden yeniye döndürür.
+
+    Hiç slot tetiklenmemişse (ilk kurulum) telafi yapılmaz. İçinde bulunulan
+    dakika normal döngüye bırakılır.
+    """
+    now = now or datetime.now()
+    conn = get_connection()
+    try:
+        last_fired = conn.execute("SELECT MAX(slot) AS slot FROM fired_slots").fetchone()["slot"]
+        if not last_fired:
+            return []
+
+        window_start = (now - timedelta(hours=window_hours)).strftime("%Y-%m-%d %H:%M")
+        current = now.strftime("%Y-%m-%d %H:%M")
+        since = max(last_fired, window_start)
+
+        candidates = []
+        day = datetime.strptime(since[:10], "%Y-%m-%d")
+        while day.date() <= now.date():
+            candidates.extend(f"{day.strftime('%Y-%m-%d')} {time_str}" for time_str in times)
+            day += timedelta(days=1)
+
+        fired = {row["slot"] for row in conn.execute("SELECT slot FROM fired_slots WHERE slot >= ?", (since,))}
+        return sorted(slot for slot in candidates if since < slot < current and slot not in fired)
+    finally:
+        conn.close()
+
+
+def get_setting(key, default=None):
+    """Paylaşılan ayar değerini okur."""
+    conn = get_connection()
+    row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+    conn.close()
+    return row["value"] if row else default
+
+
+def set_setting(key, value):
+    """Paylaşılan ayar değerini yazar."""
+    conn = get_connection()
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value)))
+    conn.close()
+
+
+def is_scheduler_enabled():
+    """Zamanlayıcının tüm işlemler için açık olup olmadığını döndürür."""
+    return get_setting("scheduler_enabled", "1") == "1"
+
+
+def set_scheduler_enabled(enabled):
+    """Zamanlayıcıyı tüm işlemler için açar/kapatır."""
+    set_setting("scheduler_enabled", "1" if enabled else "0")
+
+
+def get_scheduler_times():
+    """Paylaşılan zamanlayıcı saatlerini sıralı olarak döndürür."""
+    conn = get_connection()
+    try:
+        # İlk kullanımda varsayılan saatleri yaz
+        conn.execute("BEGIN IMMEDIATE")
+        initialized = conn.execute("SELECT value FROM settings WHERE key = 'times_initialized'").fetchone()
+        if not initialized:
+            conn.executemany("INSERT OR IGNORE INTO scheduler_times (time_str) VALUES (?)", [(t,) for t in DEFAULT_SCHEDULER_TIMES])
+            conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('times_initialized', '1')")
+        conn.execute("COMMIT")
+        return [row["time_str"] for row in conn.execute("SELECT time_str FROM scheduler_times ORDER BY time_str")]
+    finally:
+        conn.close()
+
+
+def normalize_time(time_str):
+    """"9:30" gibi saatleri slot karşılaştırmasında kullanılan HH:MM biçimine getirir.
+
+    Geçersiz saatte ValueError yükseltir.
+    """
+    match = _TIME_PATTERN.match((time_str or "").strip())
+    if not match:
+        raise ValueError(f"Geçersiz saat: {time_str}")
+    return f"{int(match.group(1)):02d}:{match.group(2)}"
+
+
+def add_scheduler_time(time_str):
+    """Paylaşılan listeye saat ekler; saat zaten varsa False döner."""
+    time_str = normalize_time(time_str)
+    get_scheduler_times()
+    conn = get_connection()
+    cursor = conn.execute("INSERT OR IGNORE INTO scheduler_times (time_str) VALUES (?)", (time_str,))
+    conn.close()
+    return cursor.rowcount == 1
+
+
+def remove_scheduler_time(time_str):
+    """Paylaşılan listeden saat kaldırır; saat yoksa False döner."""
+    time_str = normalize_time(time_str)
+    get_scheduler_times()
+    conn = get_connection()
+    cursor = conn.execute("DELETE FROM scheduler_times WHERE time_str = ?", (time_str,))
+    conn.close()
+    return cursor.rowcount == 1
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+
+# Dağıtıcı ayarları
+CACHE_DB = "llm_cache.db"
+# En az iş parçacığı sayısı; havuzun uyarlanabilir tavanı daha yüksekse dağıtıcı ona göre büyür.
+# Gerçek eşzamanlılığı backend havuzundaki sunucu başına sınırlar belirler
+MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "8"))
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def make_cache_key(*parts):
+    """Verilen parçalardan kararlı bir önbellek anahtarı üretir."""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMDispatcher:
+    """LLM çağrılarını ortak bir iş parçacığı havuzunda çalıştırır.
+
+    Aynı anahtarla gelen istekler tekilleştirilir: devam eden bir çağrı varsa
+    yeni istek aynı Future'a bağlanır, önbellekte sonuç varsa LLM'e hiç gidilmez.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, cache_db=CACHE_DB):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self.cache_db = cache_db
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.stats = {"submitted": 0, "cache_hits": 0, "deduplicated": 0, "executed": 0}
+        self._init_cache()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.cache_db, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_cache(self):
+        conn = self._connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.commit()
+        conn.close()
+
+    def get_cached(self, key):
+        """Önbellekteki sonucu döndürür; yoksa None."""
+        conn = self._connect()
+        row = conn.execute("SELECT result FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        conn.close()
+        return json.loads(row["result"]) if row else None
+
+    def store_cached(self, key, result):
+        """Başarılı sonucu önbelleğe yazar."""
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, result, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(result, ensure_ascii=False), datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+                )
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"LLM önbelleğine yazılamadı: {str(e)}")
+
+    def submit(self, key, fn, *args, use_cache=True, **kwargs):
+        """fn(*args, **kwargs) çağrısını anahtarına göre tekilleştirerek çalıştırır."""
+        with self.lock:
+            self.stats["submitted"] += 1
+
+            if key in self.in_flight:
+                self.stats["deduplicated"] += 1
+                return self.in_flight[key]
+
+            if use_cache:
+                cached = self.get_cached(key)
+                if cached is not None:
+                    self.stats["cache_hits"] += 1
+                    future = Future()
+                    future.set_result(cached)
+                    return future
+
+            future = self.executor.submit(self._run, key, fn, args, kwargs, use_cache)
+            self.in_flight[key] = future
+            return future
+
+    def ensure_workers(self, workers):
+        """İş parçacığı sayısını en az workers olacak şekilde büyütür.
+
+        Aksi halde backend havuzunun AIMD sınırı, iş parçacığı sayısının
+        üzerine hiç çıkamaz. Eski havuzdaki işler bitene kadar çalışmaya devam eder.
+        """
+        with self.lock:
+            if workers <= self.max_workers:
+                return
+            previous = self.executor
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm")
+            self.max_workers = workers
+        previous.shutdown(wait=False)
+
+    def _run(self, key, fn, args, kwargs, use_cache):
+        with self.lock:
+            self.stats["executed"] += 1
+        try:
+            result = fn(*args, **kwargs)
+            # Başarısız (None) sonuçlar önbelleğe yazılmaz, bir sonraki istekte tekrar denenir
+            if use_cache and result is not None:
+                self.store_cached(key, result)
+            return result
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+    def get_stats(self):
+        """Dağıtıcı sayaçlarını döndürür."""
+        with self.lock:
+            return {**self.stats, "in_flight": len(self.in_flight), "max_workers": self.max_workers}
+
+
+def get_dispatcher():
+    """İşlem genelinde paylaşılan dağıtıcıyı döndürür."""
+    global _dispatcher
+
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = LLMDispatcher()
+        return _dispatcher
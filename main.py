@@ -1,19 +1,193 @@
-import json
-import time
-from workspace_manager import create_new_workspace
-from file_manager import get_next_html_filename, get_next_json_filename
-from ai_analyzer import send_program_to_anythingllm, extract_score_from_response, update_final_mean_file
-from output_manager import init_html, close_html, append_to_html, init_json, append_to_json, close_json
+import argparse
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+from ai_analyzer import update_final_mean_file
+from response_parser import parse_response, record_parse, record_reask
+from output_manager import ReportRenderer, init_json, append_to_json, close_json
 from scraper_manager import check_data_file, scrape_tubitak_data
 from active_calls_manager import scrape_active_calls, check_active_calls_file
+from active_call_changes import get_open_calls
+from results_index import extract_call_number, get_run_result, index_result, mark_file_indexed
+from backend_pool import get_backend_pool, send_program_with_pool, reask_with_pool
+from llm_dispatcher import get_dispatcher, make_cache_key
+from batch_analyzer import analyze_batch, plan_batches
+from dedup import DEDUP_ENABLED, DedupIndex
+from run_metrics import BUDGET_SKIPPED, TOKEN_BUDGET, call_with_budget, finish_run, start_run
+import event_log
+import run_registry
+from retention import compact
+from score_history import flush_scores
+from program_source import ensure_program_index, iter_programs
+from program_selector import normalize_selection, resolve_selection
+from profiler import profile_run, set_profile_run_id, stage
+from work_queue import PriorityWorkQueue, ProgramRanker, register_queue, unregister_queue
 
+# Birden fazla programı tek LLM isteğinde analiz et
+BATCH_MODE = os.getenv("TUBITAK_BATCH_MODE", "0") == "1"
 
-def main():
+# Kuyruğa bir seferde okunan program sayısı; katalog bellekte bu parçayla sınırlı kalır
+DISPATCH_CHUNK_SIZE = int(os.getenv("TUBITAK_DISPATCH_CHUNK_SIZE", "500"))
+
+# Kataloğu yeniden kazıyıp kazıma ile analizi eşzamanlı yürüt (bu akışta aktif çağrılar ve toplu mod kullanılmaz)
+PIPELINE_MODE = os.getenv("TUBITAK_PIPELINE_MODE", "0") == "1"
+
+
+def build_result_item(program, result, run, pool):
+    """LLM sonucunu skor ve kararıyla birlikte rapor kaydına çevirir.
+
+    Ayrıştırılamayan yanıt bir kez yeniden sorulur; skor bulunursa ortalama
+    dosyası güncellenir.
+    """
+    index = program["index"]
+    program_name = program["program_name"]
+    applicant_requirements = program["applicant_requirements"]
+
+    if result is BUDGET_SKIPPED:
+        # Token bütçesi dolduğu için gönderilmeyen program
+        return {
+            "program_name": program_name,
+            "applicant_requirements": applicant_requirements,
+            "analysis": "Atlandı: Token bütçesi aşıldı",
+        }
+
+    if not result:
+        return build_error_item(program)
+
+    analysis_text = result.get("response", "").replace("\\n", "\n")
+
+    # AI yanıtından skoru çıkar; ayrıştırılamazsa sadece yanıtı yeniden sor
+    with stage("parse.response"):
+        parsed = parse_response(analysis_text, record=False)
+    if not parsed["ok"]:
+        estimate = run.estimate_call_tokens(analysis_text)
+        reask = call_with_budget(run, program_name, estimate, reask_with_pool, analysis_text, index, pool=pool)
+        if reask and reask is not BUDGET_SKIPPED:
+            parsed = parse_response((reask.get("response") or "").replace("\\n", "\n"), record=False)
+        record_reask(parsed["ok"])
+    # Yeniden sorulan program da sayaçlara bir kez, son sonucuyla işlenir
+    record_parse(parsed)
+
+    score = parsed["score"]
+    verdict = parsed["verdict"]
+    if score is not None:
+        update_final_mean_file(program_name, score)
+    else:
+        event_log.item("result.no_score", f"[{index}] Skor bulunamadı: {program_name}", level="WARNING", index=index, program=program_name, run_id=run.run_id)
+
+    return {
+        "program_name": program_name,
+        "applicant_requirements": applicant_requirements,
+        "analysis": analysis_text,
+        "score": score,
+        "verdict": verdict,
+    }
+
+
+def build_error_item(program):
+    """Analiz edilemeyen program için hata kaydı döndürür."""
+    return {
+        "program_name": program["program_name"],
+        "applicant_requirements": program["applicant_requirements"],
+        "analysis": "Hata: Analiz yapılamadı",
+    }
+
+
+def build_duplicate_item(program, representative_item, marker):
+    """Temsilci programın sonucunu aynı (veya çok benzer) metne sahip programa aktarır.
+
+    Kayıt, sonucun hangi programdan ve hangi eşleşme güveniyle geldiğini
+    gösteren "dedup" işaretini taşır.
+    """
+    item = {**representative_item, "program_name": program["program_name"], "applicant_requirements": program["applicant_requirements"], "dedup": marker}
+    if item.get("score") is not None:
+        update_final_mean_file(program["program_name"], item["score"])
+    return item
+
+
+def submit_programs(dispatcher, run, pool, programs, batch_index=None):
+    """Programları dağıtıcıya gönderir; batch_index verilirse tek toplu istekte."""
+    if batch_index is not None:
+        key = make_cache_key("main-batch", [(p["program_name"], p["applicant_requirements"]) for p in programs])
+        names = [p["program_name"] for p in programs]
+        estimate = run.estimate_call_tokens("".join(p["applicant_requirements"] for p in programs))
+        return dispatcher.submit(key, call_with_budget, run, names, estimate, analyze_batch, programs, batch_index, pool=pool, use_cache=False)
+
+    program = programs[0]
+    key = make_cache_key("main", program["program_name"], program["applicant_requirements"])
+    estimate = run.estimate_call_tokens(program["applicant_requirements"])
+    return dispatcher.submit(
+        key, call_with_budget, run, program["program_name"], estimate, send_program_with_pool, program["program_name"], program["applicant_requirements"], program["index"], pool=pool, use_cache=False
+    )
+
+
+def write_result_item(item, report, json_file, run_id):
+    """Kaydı rapora, JSON dosyasına ve sonuç indeksine yazar."""
+    with stage("output.json"):
+        append_to_json(item, json_file)
+    with stage("output.index"):
+        index_result(run_id, item, item.get("score"), item.get("verdict"))
+
+    # Büyük çalıştırmalarda ara raporu belirli aralıklarla güncelle
+    with stage("output.report"):
+        report.add(item)
+        report.flush()
+
+
+def finalize_run(run, results, report, html_file, json_file):
+    """Çıktıları kapatır, çalıştırma kaydını tamamlar ve eski çalıştırmaları arşivler."""
+    # HTML raporunu yaz
+    report.flush(force=True)
+
+    # JSON dosyasını kapat
+    close_json(json_file)
+    mark_file_indexed(json_file)
+
+    # Çalıştırmada biriken skorları geçmiş dosyasına tek seferde yaz
+    flush_scores()
+
+    # Token ve süre özetini çalıştırma kaydına ekle
+    summary = finish_run(run)
+    run_registry.finish_run(run.run_id, len(results), summary)
+
+    print("Tüm programlar işlendi!")
+    print(f"🔢 Token: {summary['total_tokens']} (prompt {summary['prompt_tokens']}, yanıt {summary['completion_tokens']}) - {summary['calls']} çağrı, {summary['duration']}s, {summary['tokens_per_second']} token/s")
+    if summary["budget_skipped"]:
+        print(f"💰 Token bütçesi nedeniyle {summary['budget_skipped']} çağrı atlandı")
+    print(f"Sonuçlar '{html_file}' ve '{json_file}' dosyalarına kaydedildi.")
+
+    # Eski çalıştırmaları arşive taşı; arşivleme hatası tamamlanan çalıştırmayı bozmaz
+    try:
+        compact()
+    except Exception as e:
+        event_log.error("retention.compact_failed", f"Eski çalıştırmalar arşivlenemedi: {str(e)}", run_id=run.run_id)
+
+
+def fail_run(run, results, error):
+    """Hata nedeniyle yarıda kalan çalıştırmayı 'failed' olarak kapatır; kayıt 'running' kalmaz."""
+    event_log.error("run.failed", f"Çalıştırma {run.run_id} başarısız: {str(error)}", run_id=run.run_id, written=len(results))
+    flush_scores()
+    run_registry.finish_run(run.run_id, len(results), finish_run(run), status="failed")
+
+
+def main(batch_mode=BATCH_MODE, pipeline_mode=PIPELINE_MODE):
+    """Tam analizi çalıştırır; profil modu açıksa aşama süreleri ve yığın örnekleri kaydedilir."""
+    with profile_run("main"):
+        return run_main(batch_mode, pipeline_mode)
+
+
+def run_main(batch_mode, pipeline_mode):
     # Aktif çağrıları çek
     print("🔄 Aktif çağrılar kontrol ediliyor...")
     active_calls_data = scrape_active_calls()
     print("=" * 80)
 
+    # Kazıma ve analiz aşamaları aynı anda çalışır; her program hazır olur olmaz analiz edilir
+    if pipeline_mode:
+        from pipeline import run_pipeline
+
+        return run_pipeline()
+
     # Veri dosyası kontrolü ve otomatik çekme
     if not check_data_file():
         print("📥 tubitak_rag_data.json dosyası bulunamadı!")
@@ -24,102 +198,235 @@ def main():
         print("✅ tubitak_rag_data.json dosyası mevcut.")
         print("=" * 80)
 
-    # Yeni workspace oluştur
-    workspace_slug = create_new_workspace()
-    if not workspace_slug:
+    # Her backend üzerinde yeni workspace oluştur
+    pool = get_backend_pool()
+    if not pool.provision_workspaces():
         print("Workspace oluşturulamadı! İşlem sonlandırılıyor.")
         return
-
-    print(f"Kullanılacak workspace: {workspace_slug}")
+    workspaces = list_workspaces(pool)
     print("=" * 80)
 
-    # HTML ve JSON dosya adlarını belirle
-    html_file = get_next_html_filename()
-    json_file = get_next_json_filename()
-
-    # JSON dosyasını oku
-    try:
-        with open("tubitak_rag_data.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
+    # Programlar dosyadan akış olarak okunur; sayı konum indeksinden gelir
+    program_count = ensure_program_index()
+    if program_count is None:
         print("tubitak_rag_data.json dosyası bulunamadı!")
         return
-    except json.JSONDecodeError:
-        print("JSON dosyası geçersiz format!")
-        return
-
-    programs = data.get("programs", [])
-    print(f"Toplam {len(programs)} program bulundu.")
+    numbered_programs = enumerate(iter_programs(), 1)
+    print(f"Toplam {program_count} program bulundu.")
 
-    # Aktif çağrıları da ekle
-    if active_calls_data:
-        active_programs = active_calls_data.get("programs", [])
-        programs.extend(active_programs)
+    # Aktif çağrıları da ekle; sıra numaraları katalogdan sonra gelir ama kuyruğa ilk parçayla girerler
+    active_programs = (active_calls_data or {}).get("programs", [])
+    if active_programs:
+        numbered_programs = itertools.chain(enumerate(active_programs, program_count + 1), numbered_programs)
+        program_count += len(active_programs)
         print(f"Aktif çağrılardan {len(active_programs)} program eklendi.")
 
-    print(f"Toplam {len(programs)} program analiz edilecek.")
+    print(f"Toplam {program_count} program analiz edilecek.")
     print("=" * 80)
 
+    active_names = [p["program_name"] for p in active_programs]
+    return analyze_programs(pool, workspaces, numbered_programs, batch_mode, active_names)
+
+
+def run_selected(selection, batch_mode=BATCH_MODE):
+    """Yalnızca seçimle eşleşen katalog programlarını analiz eder.
+
+    Kazıma yapılmaz; programlar konum indeksinden okunur. Backend'lerde hazır
+    workspace varsa yeniden kullanılır, böylece hedefli yenileme tam
+    çalıştırmanın hazırlık maliyetini ödemez. Çalıştırma numarasını, eşleşen
+    program yoksa None döndürür.
+    """
+    with profile_run("selected"):
+        with stage("select.resolve"):
+            programs = resolve_selection(selection)
+        if not programs:
+            print(f"🎯 Seçimle eşleşen program bulunamadı: {selection}")
+            return None
+        print(f"🎯 {len(programs)} program seçildi: {', '.join(program.get('program_name', '') for _, program in programs[:5])}{' ...' if len(programs) > 5 else ''}")
+
+        pool = get_backend_pool()
+        if not any(b["healthy"] and b["workspace_slug"] for b in pool.get_status()) and not pool.provision_workspaces():
+            print("Workspace oluşturulamadı! İşlem sonlandırılıyor.")
+            return None
+        return analyze_programs(pool, list_workspaces(pool), programs, batch_mode, selection=selection)
+
+
+def list_workspaces(pool):
+    """Havuzdaki workspace'leri yazdırır ve listesini döndürür."""
+    workspaces = []
+    for backend in pool.get_status():
+        if backend["workspace_slug"]:
+            print(f"Kullanılacak workspace: {backend['workspace_slug']} ({backend['url']})")
+            workspaces.append(backend["workspace_slug"])
+    return workspaces
+
+
+def analyze_programs(pool, workspaces, numbered_programs, batch_mode, active_names=(), selection=None):
+    """(sıra numarası, program) çiftlerini analiz eder, çıktıları yazar ve çalıştırma numarasını döndürür.
+
+    numbered_programs bir yineleyici olabilir; DISPATCH_CHUNK_SIZE'lık parçalar
+    halinde okunur.
+    """
+    # Çalıştırma numarasını ayır; HTML ve JSON dosya adları numaradan türetilir
+    config = {"batch_mode": batch_mode, "token_budget": TOKEN_BUDGET, "backends": [b["url"] for b in pool.get_status()]}
+    if selection:
+        config["selection"] = selection
+    kind = run_registry.RUN_KIND_SELECTED if selection else run_registry.RUN_KIND_FULL
+    run_id, html_file, json_file = run_registry.allocate_run(workspace=",".join(workspaces), config=config, kind=kind)
+    set_profile_run_id(run_id)
+    run = start_run(run_id)
+
     results = []
+    try:
+        dispatch_programs(run, pool, html_file, json_file, numbered_programs, batch_mode, active_names, results)
+    except Exception as e:
+        fail_run(run, results, e)
+        raise
+    return run_id
 
-    # HTML dosyasını başlat
-    init_html(html_file)
+
+def dispatch_programs(run, pool, html_file, json_file, numbered_programs, batch_mode, active_names, results):
+    """Programları öncelik kuyruğundan havuza dağıtır, sonuçları yazar ve çalıştırmayı kapatır."""
+    run_id = run.run_id
+
+    # HTML raporu sonuçlar geldikçe bellekte oluşturulur
+    report = ReportRenderer(html_file)
 
     # JSON dosyasını başlat
     init_json(json_file)
 
-    for index, program in enumerate(programs, 1):
-        program_name = program.get("program_name", "Bilinmeyen Program")
-        applicant_requirements = program.get("applicant_requirements", "Veri bulunamadı")
-        status = program.get("status", "unknown")
-
-        if status == "success" and applicant_requirements != "Veri bulunamadı":
-            result = send_program_to_anythingllm(program_name, applicant_requirements, index, workspace_slug)
-
-            if result:
-                analysis_text = result.get("response", "").replace("\\n", "\n")
-
-                # AI yanıtından skoru çıkar ve kaydet
-                score = extract_score_from_response(analysis_text)
-                if score is not None:
-                    update_final_mean_file(program_name, score)
-                else:
-                    print(f"[{index}] Skor bulunamadı: {program_name}")
-
-                item = {
-                    "program_name": program_name,
-                    "applicant_requirements": applicant_requirements,
-                    "analysis": analysis_text,
-                }
-
-                results.append(item)
-                append_to_html(item, html_file)
-                append_to_json(item, json_file)
-
-            else:
-                error_item = {
-                    "program_name": program_name,
-                    "applicant_requirements": applicant_requirements,
-                    "analysis": "Hata: Analiz yapılamadı",
-                }
-                results.append(error_item)
-                append_to_html(error_item, html_file)
-                append_to_json(error_item, json_file)
-
-            time.sleep(1)
+    # Programları öncelik sırasıyla backend havuzuna dağıt; sonuçlar tamamlandıkça yazılır
+    dispatcher = get_dispatcher()
+    programs = iter(numbered_programs)
+
+    # Aynı başvuru metnine sahip programlardan yalnızca ilki LLM'e gönderilir
+    dedup = DedupIndex() if DEDUP_ENABLED else None
+    # Sonucu henüz yazılmamış temsilciler ve onları bekleyen kopyalar: temsilci sıra numarası -> [(program, işaret)]
+    duplicates = {}
+
+    # Aktif, son başvurusu yaklaşan, skoru dalgalı ve uzun süredir analiz edilmemiş programlar önce gelir
+    ranker = ProgramRanker(list(active_names) + [c["name"] for c in get_open_calls()])
+    queue = PriorityWorkQueue(f"run-{run_id}")
+    batch_numbers = itertools.count(1)
+
+    def group_of(program):
+        return [program] + [member for member, _ in duplicates.get(program["index"], [])]
+
+    def priority_of(program):
+        return max(ranker.priority(p["program_name"]) for p in group_of(program))
+
+    def call_numbers_of(programs):
+        return {extract_call_number(p["program_name"]) for program in programs for p in group_of(program)} - {None}
+
+    def write(entry):
+        # Yalnızca ad tutulur; analiz metinleri çalıştırma boyunca bellekte birikmez
+        results.append(entry["program_name"])
+        write_result_item(entry, report, json_file, run_id)
+
+    def feed():
+        """Kaynaktan en fazla DISPATCH_CHUNK_SIZE program okuyup kuyruğa ekler; kaynak bittiyse False döner.
+
+        Öncelik sırası okunan parça içinde uygulanır; sonraki parçalardaki
+        aktif çağrılar kuyruğa girdiklerinde öne geçer.
+        """
+        chunk = list(itertools.islice(programs, DISPATCH_CHUNK_SIZE))
+        representatives = []
+        for index, program in chunk:
+            program_name = program.get("program_name", "Bilinmeyen Program")
+            applicant_requirements = program.get("applicant_requirements", "Veri bulunamadı")
+            status = program.get("status", "unknown")
+
+            if status != "success" or applicant_requirements == "Veri bulunamadı":
+                event_log.item("program.skipped", f"[{index}] Atlanıyor: {program_name} - Status: {status}", index=index, program=program_name, status=status, run_id=run_id)
+                continue
+
+            candidate = {"index": index, "program_name": program_name, "applicant_requirements": applicant_requirements}
+            marker = dedup.assign(candidate) if dedup else None
+            if marker and marker["representative_index"] in duplicates:
+                duplicates[marker["representative_index"]].append((candidate, marker))
+                continue
+            if marker:
+                # Temsilci önceki bir parçada tamamlandı; sonucu indeksten okunur
+                representative_item = get_run_result(run_id, marker["representative"])
+                if representative_item:
+                    write(build_duplicate_item(candidate, representative_item, marker))
+                    continue
+            duplicates[index] = []
+            representatives.append(candidate)
+
+        representatives.sort(key=priority_of, reverse=True)
+        active_count = sum(1 for p in representatives if any(ranker.is_active(m["program_name"]) for m in group_of(p)))
+        if active_count:
+            print(f"📌 {active_count} aktif çağrı programı kuyruğun önüne alındı")
+
+        if batch_mode:
+            # Token bütçesine göre gruplanmış programları tek istekte gönder; öncelik sırası gruplara da yansır
+            for batch in plan_batches(representatives):
+                queue.push(next(batch_numbers), batch, max(priority_of(p) for p in batch), call_numbers_of(batch))
         else:
-            print(f"[{index}] Atlanıyor: {program_name} - Status: {status}")
-            print("-" * 80)
+            for program in representatives:
+                queue.push(program["index"], [program], priority_of(program), call_numbers_of([program]))
+        return len(chunk) == DISPATCH_CHUNK_SIZE
+
+    # Yalnızca havuz kapasitesi kadar iş gönderilir; kalanlar kuyrukta bekler ve öne alınabilir
+    window = max(1, pool.total_capacity())
+    # Dağıtıcı havuzun tavanından küçükse AIMD sınırı iş parçacığı sayısında takılır
+    dispatcher.ensure_workers(window)
+    in_flight = {}
+    exhausted = False
+    register_queue(queue)
+    try:
+        while True:
+            # Kuyruk pencerenin altına inince kaynaktan yeni parça okunur
+            while not exhausted and len(queue) < window:
+                exhausted = not feed()
+            if not queue and not in_flight:
+                break
 
-    # HTML dosyasını kapat
-    close_html(html_file)
+            while queue and len(in_flight) < window:
+                key, batch, _ = queue.pop()
+                # Dağıtıcı aynı işi tekilleştirirse aynı Future birden fazla gruba ait olabilir
+                in_flight.setdefault(submit_programs(dispatcher, run, pool, batch, key if batch_mode else None), []).append(batch)
 
-    # JSON dosyasını kapat
-    close_json(json_file)
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                for batch in in_flight.pop(future):
+                    for position, program in enumerate(batch):
+                        program_result = result
+                        if batch_mode and result is not None and result is not BUDGET_SKIPPED:
+                            program_result = result[position]
 
-    print("Tüm programlar işlendi!")
-    print(f"Sonuçlar '{html_file}' ve '{json_file}' dosyalarına kaydedildi.")
+                        item = build_result_item(program, program_result, run, pool)
+                        write(item)
+                        for member, marker in duplicates.pop(program["index"], []):
+                            write(build_duplicate_item(member, item, marker))
+    finally:
+        unregister_queue(queue)
+
+    if dedup and dedup.get_stats()["saved_calls"]:
+        stats = dedup.get_stats()
+        print(f"🧬 {stats['saved_calls']} program tekrar eden metin nedeniyle analiz edilmedi (tam: {stats['exact']}, yakın: {stats['near']})")
+    finalize_run(run, results, report, html_file, json_file)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="TÜBİTAK program analizi. Seçim ölçütü verilmezse tam analiz çalışır.")
+    parser.add_argument("--call", dest="call_numbers", action="append", metavar="NUMARA", help="Çağrı numarası (ör. 1711); tekrarlanabilir")
+    parser.add_argument("--match", dest="patterns", action="append", metavar="KALIP", help="Program adı kalıbı (ör. '*yeşil*' veya 'ar-ge'); tekrarlanabilir")
+    parser.add_argument("--stale-since", metavar="TARİH", help="Bu tarihten (YYYY-MM-DD) beri analiz edilmemiş programlar")
+    parser.add_argument("--failed", dest="failed_last_run", action="store_true", help="Son analizi skor üretmeyen programlar")
+    parser.add_argument("--batch", dest="batch_mode", action="store_true", default=BATCH_MODE, help="Programları toplu isteklerle gönder")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    try:
+        selection = normalize_selection(args.call_numbers, args.patterns, args.stale_since, args.failed_last_run)
+    except ValueError as e:
+        raise SystemExit(f"❌ {str(e)}")
+    if selection:
+        run_selected(selection, batch_mode=args.batch_mode)
+    else:
+        main(batch_mode=args.batch_mode)
@@ -1,72 +1,217 @@
+import hashlib
+import html
+import os
 import re
+import time
+from string import Template
+
+# Rapor şablonları modül yüklenirken bir kez derlenir
+_PAGE_TEMPLATE = Template(
+    """<!DOCTYPE html>
+<html lang='tr'>
+<head>
+<meta charset='utf-8'>
+<title>Ar-Ge Program Analizleri</title>
+<style>
+table.summary { border-collapse: collapse; margin-bottom: 20px; }
+table.summary th { cursor: pointer; background: #eee; }
+table.summary th, table.summary td { border: 1px solid #ccc; padding: 4px 8px; }
+</style>
+</head>
+<body>
+<h1>TÜBİTAK Ar-Ge Program Analizleri</h1>
+<p>
+<input id='filter' placeholder='Program ara...' oninput='filterRows()'>
+<select id='verdict' onchange='filterRows()'>
+<option value=''>Tüm sonuçlar</option>
+<option>Uygun</option>
+<option>Şartlı Uygun</option>
+<option>Uygun Değil</option>
+</select>
+</p>
+<table class='summary' id='summary'>
+<thead><tr><th onclick='sortRows(0, true)'>#</th><th onclick='sortRows(1, false)'>Program</th><th onclick='sortRows(2, true)'>Skor</th><th onclick='sortRows(3, false)'>Sonuç</th></tr></thead>
+<tbody>
+$rows
+</tbody>
+</table>
+$sections
+<script>
+function filterRows() {
+  const text = document.getElementById('filter').value.toLocaleLowerCase('tr');
+  const verdict = document.getElementById('verdict').value;
+  for (const row of document.querySelectorAll('#summary tbody tr')) {
+    const show = row.cells[1].textContent.toLocaleLowerCase('tr').includes(text) && (!verdict || row.cells[3].textContent === verdict);
+    row.style.display = show ? '' : 'none';
+  }
+}
+function sortRows(column, numeric) {
+  const body = document.querySelector('#summary tbody');
+  const rows = Array.from(body.rows);
+  const asc = body.dataset.sort !== column + 'asc';
+  rows.sort((a, b) => {
+    const x = a.cells[column].textContent, y = b.cells[column].textContent;
+    const cmp = numeric ? (parseFloat(x) || -1) - (parseFloat(y) || -1) : x.localeCompare(y, 'tr');
+    return asc ? cmp : -cmp;
+  });
+  body.dataset.sort = asc ? column + 'asc' : column + 'desc';
+  body.append(...rows);
+}
+</script>
+</body>
+</html>"""
+)
+_ROW_TEMPLATE = Template("<tr><td>$index</td><td><a href='#p-$index'>$name</a></td><td>$score</td><td>$verdict</td></tr>")
+_SECTION_TEMPLATE = Template(
+    """<h2 id='p-$index'>$name</h2>
+<p><strong>Başvuru Koşulları:</strong> $requirements</p>
+$note<p>$text</p>
+$tables<hr>
+"""
+)
+
+_SEPARATOR_CELL = re.compile(r"^:?-+:?$")
+_MARKDOWN_MARKS = re.compile(r"[*#]+")
+
+# Çalıştırma sürerken ara raporun en fazla kaç saniyede bir yeniden yazılacağı
+REPORT_FLUSH_SECONDS = float(os.getenv("TUBITAK_REPORT_FLUSH_SECONDS", "30"))
+# Sayfa şablonunda bölümlerin yerini işaretler; bölümler ek dosyadan akıtılır
+_SECTIONS_MARKER = "\x00sections\x00"
+
+
+def _render_table(rows):
+    """Markdown tablo satırlarını HTML tabloya çevirir; ayraç satırını atlar."""
+    html_rows = []
+    for i, row in enumerate(rows):
+        cells = [html.escape(c.strip()) for c in row.strip().strip("|").split("|")]
+        if all(_SEPARATOR_CELL.match(c) for c in cells if c):
+            continue
+        tag = "th" if i == 0 else "td"
+        html_rows.append("<tr>" + "".join(f"<{tag}>{c}</{tag}>" for c in cells) + "</tr>")
+    return "<table border='1' cellspacing='0' cellpadding='5'>\n" + "\n".join(html_rows) + "\n</table>\n"
+
+
+def render_analysis(text):
+    """Analiz metnini tek geçişte paragraf ve tablo HTML'ine ayırır.
 
-
-def append_to_html(item, html_file):
-    """
-    HTML dosyasına eklerken:
     - Markdown işaretlerini temizler (#, *, **)
-    - | ve --- ile yazılmış tablo varsa gerçek HTML <table> yapar
+    - | ile yazılmış tablo satırlarını gerçek HTML <table> yapar
     - Satır sonlarını <br> ile korur
     """
-    text = item["analysis"]
-
-    # Tablo var mı kontrol et
-    table_blocks = []
-    lines = text.split("\n")
-    non_table_lines = []
+    text_lines = []
+    tables = []
     current_table = []
 
-    for line in lines:
+    for line in (text or "").split("\n"):
         if "|" in line:
             current_table.append(line)
-        else:
-            if current_table:
-                table_blocks.append(current_table)
-                current_table = []
-            non_table_lines.append(line)
+            continue
+        if current_table:
+            tables.append(_render_table(current_table))
+            current_table = []
+        text_lines.append(line)
     if current_table:
-        table_blocks.append(current_table)
-
-    # Tabloyu HTML yap
-    html_tables = []
-    for table in table_blocks:
-        html_table = ["<table border='1' cellspacing='0' cellpadding='5'>"]
-        for i, row in enumerate(table):
-            cells = [c.strip() for c in row.split("|") if c.strip()]
-            if i == 0 or all(re.match(r"^-+$", c) for c in cells):
-                html_table.append("<tr>" + "".join(f"<th>{c}</th>" for c in cells) + "</tr>")
-            else:
-                html_table.append("<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>")
-        html_table.append("</table>")
-        html_tables.append("\n".join(html_table))
-
-    # Markdown işaretlerini temizle
-    clean_text = re.sub(r"[*#]+", "", "\n".join(non_table_lines)).strip()
-    clean_text = clean_text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-    clean_text = clean_text.replace("\n", "<br>")
-
-    # HTML yaz
-    with open(html_file, "a", encoding="utf-8") as f:
-        f.write(f"<h2>{item['program_name']}</h2>\n")
-        f.write(f"<p><strong>Başvuru Koşulları:</strong> {item['applicant_requirements']}</p>\n")
-        f.write(f"<p>{clean_text}</p>\n")
-        for table_html in html_tables:
-            f.write(f"{table_html}\n")
-        f.write("<hr>\n\n")
-
-
-def init_html(html_file):
-    """HTML dosyasını başlatır."""
-    with open(html_file, "w", encoding="utf-8") as f:
-        f.write("<!DOCTYPE html>\n<html lang='tr'>\n<head>\n<meta charset='utf-8'>\n")
-        f.write("<title>Ar-Ge Program Analizleri</title>\n</head>\n<body>\n")
-        f.write("<h1>TÜBİTAK Ar-Ge Program Analizleri</h1>\n")
-
-
-def close_html(html_file):
-    """HTML dosyasını kapatır."""
-    with open(html_file, "a", encoding="utf-8") as f:
-        f.write("</body>\n</html>")
+        tables.append(_render_table(current_table))
+
+    clean_text = html.escape(_MARKDOWN_MARKS.sub("", "\n".join(text_lines)).strip()).replace("\n", "<br>")
+    return clean_text, "".join(tables)
+
+
+class ReportRenderer:
+    """Analiz sonuçlarından HTML raporu oluşturur.
+
+    Program bölümleri işlenir işlenmez "<rapor>.sections" ek dosyasına
+    eklenir; bellekte yalnızca özet satırları, içerik özetleri ve bölüm
+    konumları tutulur. Aynı program değişmiş içerikle tekrar gelirse yalnızca
+    onun bölümü yeniden işlenip eklenir ve eski konum bırakılır. Sayfa, ara
+    güncellemelerde en fazla REPORT_FLUSH_SECONDS'ta bir, sonda bir kez
+    birleştirilip dosyaya atomik olarak yazılır.
+    """
+
+    def __init__(self, html_file):
+        self.html_file = html_file
+        self.sections_file = f"{html_file}.sections"
+        # program adı -> (içerik özeti, özet satırı, bölüm konumu, bölüm uzunluğu)
+        self.entries = {}
+        self.order = []
+        self.dirty = 0
+        self.last_flush = time.monotonic()
+        open(self.sections_file, "wb").close()
+
+    def add(self, item):
+        """Sonucu rapora ekler; aynı program tekrar gelirse bölümünü günceller."""
+        key = item.get("program_name", "Bilinmeyen Program")
+        digest = hashlib.sha1(repr(sorted(item.items())).encode("utf-8")).hexdigest()
+        cached = self.entries.get(key)
+        if cached and cached[0] == digest:
+            return
+
+        if cached is None:
+            self.order.append(key)
+        index = self.order.index(key) + 1 if cached else len(self.order)
+        section = self._render_section(index, item).encode("utf-8")
+        with open(self.sections_file, "ab") as f:
+            f.seek(0, os.SEEK_END)
+            offset = f.tell()
+            f.write(section)
+        self.entries[key] = (digest, self._render_row(index, item), offset, len(section))
+        self.dirty += 1
+
+    def _render_section(self, index, item):
+        text, tables = render_analysis(item.get("analysis", ""))
+        return _SECTION_TEMPLATE.substitute(
+            index=index,
+            name=html.escape(item.get("program_name", "Bilinmeyen Program")),
+            requirements=html.escape(str(item.get("applicant_requirements", ""))),
+            note=self._render_dedup_note(item.get("dedup")),
+            text=text,
+            tables=tables,
+        )
+
+    def _render_dedup_note(self, marker):
+        if not marker:
+            return ""
+        match = "aynı metin" if marker["match"] == "exact" else f"benzer metin, benzerlik %{round(marker['similarity'] * 100)}"
+        return f"<p><em>Analiz '{html.escape(marker['representative'])}' programından aktarıldı ({match}).</em></p>\n"
+
+    def _render_row(self, index, item):
+        score = item.get("score")
+        return _ROW_TEMPLATE.substitute(
+            index=index,
+            name=html.escape(item.get("program_name", "Bilinmeyen Program")),
+            score="" if score is None else score,
+            verdict=html.escape(item.get("verdict") or ""),
+        )
+
+    def write(self, f):
+        """Tüm raporu açık dosyaya yazar; bölümler ek dosyadan sırayla kopyalanır."""
+        page = _PAGE_TEMPLATE.substitute(rows="\n".join(self.entries[key][1] for key in self.order), sections=_SECTIONS_MARKER)
+        head, tail = page.split(_SECTIONS_MARKER)
+        f.write(head)
+        with open(self.sections_file, "rb") as sections:
+            for key in self.order:
+                _, _, offset, length = self.entries[key]
+                sections.seek(offset)
+                f.write(sections.read(length).decode("utf-8"))
+        f.write(tail)
+
+    def flush(self, force=False):
+        """Raporu diske yazar; force değilse yalnızca değişiklik varsa ve aralık dolduysa.
+
+        force=True son yazımdır; ardından ek dosya silinir.
+        """
+        if not force and (not self.dirty or time.monotonic() - self.last_flush < REPORT_FLUSH_SECONDS):
+            return False
+
+        temp_file = f"{self.html_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            self.write(f)
+        os.replace(temp_file, self.html_file)
+        self.dirty = 0
+        self.last_flush = time.monotonic()
+        if force:
+            os.remove(self.sections_file)
+        return True
 
 
 def init_json(json_file):
@@ -0,0 +1,59 @@
+import os
+import threading
+import time
+from single_flight import SingleFlight
+
+# Sayfa önbelleği ayarları: aynı anda çalışan tam ve aktif analizler aynı sayfaları paylaşır
+PAGE_CACHE_TTL_SECONDS = int(os.getenv("TUBITAK_PAGE_CACHE_TTL_SECONDS", "600"))
+PAGE_CACHE_MAX_ENTRIES = 512
+REQUEST_TIMEOUT = 30
+
+_pages = {}
+_pages_lock = threading.Lock()
+_fetches = SingleFlight()
+_stats = {"hits": 0, "misses": 0, "shared": 0}
+
+
+def _download(url, headers):
+    # requests yalnızca ilk indirmede yüklenir; durum sorgusu için app içe aktarılırken gerekmez
+    import requests
+
+    response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    return response.status_code, response.text
+
+
+def fetch_page(url, headers=None):
+    """Sayfanın HTML metnini döndürür.
+
+    Son PAGE_CACHE_TTL_SECONDS içinde çekilmiş sayfa bellekten gelir; aynı
+    sayfa o anda başka bir iş parçacığı tarafından çekiliyorsa yeni istek
+    atılmaz, o isteğin sonucu beklenir.
+    """
+    now = time.time()
+    with _pages_lock:
+        cached = _pages.get(url)
+        if cached and now - cached[0] < PAGE_CACHE_TTL_SECONDS:
+            _stats["hits"] += 1
+            return cached[1]
+
+    (status_code, text), shared = _fetches.do(url, _download, url, headers)
+    with _pages_lock:
+        if shared:
+            _stats["shared"] += 1
+        else:
+            _stats["misses"] += 1
+            # Hatalı yanıtlar önbelleğe alınmaz; sonraki istek yeniden dener
+            if status_code != 200:
+                return text
+            # Sınır aşılırsa en eski kayıtları at
+            if len(_pages) >= PAGE_CACHE_MAX_ENTRIES:
+                for old_url, _ in sorted(_pages.items(), key=lambda entry: entry[1][0])[: len(_pages) // 4 or 1]:
+                    del _pages[old_url]
+            _pages[url] = (time.time(), text)
+    return text
+
+
+def get_page_cache_stats():
+    """Önbellek isabet, ıska ve paylaşılan istek sayılarını döndürür."""
+    with _pages_lock:
+        return {**_stats, "entries": len(_pages)}
@@ -0,0 +1,172 @@
+import asyncio
+import os
+from backend_pool import get_backend_pool, send_program_with_pool
+from dedup import DEDUP_ENABLED, DedupIndex
+from main import build_duplicate_item, build_error_item, build_result_item, fail_run, finalize_run, write_result_item
+from output_manager import ReportRenderer, init_json
+from run_metrics import TOKEN_BUDGET, call_with_budget, start_run
+from scraper_manager import SCRAPE_DELAY_SECONDS, build_program_data, get_call_links_and_names, new_rag_data, save_rag_data, scrape_tubitak_data
+from profiler import set_profile_run_id
+import event_log
+import run_registry
+
+# Aşamalar arası kuyruk boyutu; dolunca önceki aşama bekler (geri basınç)
+PIPELINE_QUEUE_SIZE = int(os.getenv("TUBITAK_PIPELINE_QUEUE_SIZE", "16"))
+
+
+async def list_stage(detail_queue):
+    """Liste sayfasındaki çağrıları detay kuyruğuna aktarır."""
+    calls = await asyncio.to_thread(get_call_links_and_names)
+    print(f"🔗 {len(calls)} çağrı bulundu.\n")
+
+    for index, call in enumerate(calls, 1):
+        await detail_queue.put((index, call))
+    await detail_queue.put(None)
+    return len(calls)
+
+
+async def fan_out_stage(program, marker, representative_item, sink_queue):
+    """Temsilcinin sonucu hazır olunca aynı metne sahip programın kaydını yazma kuyruğuna koyar."""
+    item = await asyncio.to_thread(build_duplicate_item, program, await representative_item, marker)
+    await sink_queue.put(item)
+
+
+async def detail_stage(detail_queue, llm_queue, sink_queue, programs, dedup, representative_items, fan_outs, group):
+    """Detay sayfalarını sırayla çeker; uygun programları hemen analize gönderir.
+
+    Daha önce görülen bir metne sahip program LLM'e gönderilmez; temsilcinin
+    sonucunu bekleyen bir aktarma görevi oluşturulur.
+    """
+    while True:
+        entry = await detail_queue.get()
+        if entry is None:
+            return
+
+        index, call = entry
+        event_log.item("scrape.detail", f"[{index}] {call['name']}", index=index, program=call["name"], url=call["url"])
+        program_data = await asyncio.to_thread(build_program_data, call)
+        programs.append(program_data)
+
+        if program_data["status"] == "success":
+            program = {"index": index, "program_name": program_data["program_name"], "applicant_requirements": program_data["applicant_requirements"]}
+            marker = dedup.assign(program) if dedup else None
+            if marker:
+                representative_item = representative_items[marker["representative_index"]]
+                fan_outs.append(group.create_task(fan_out_stage(program, marker, representative_item, sink_queue)))
+            else:
+                representative_items[index] = asyncio.get_running_loop().create_future()
+                await llm_queue.put(program)
+        else:
+            event_log.item("program.skipped", f"[{index}] Atlanıyor: {program_data['program_name']} - Status: {program_data['status']}", index=index, program=program_data["program_name"], status=program_data["status"])
+
+        # Detay sayfaları arasında sunucuya yük bindirme
+        await asyncio.sleep(SCRAPE_DELAY_SECONDS)
+
+
+async def llm_stage(llm_queue, sink_queue, run, pool, representative_items):
+    """Kuyruktaki programı LLM ile analiz edip sonuç kaydını yazma kuyruğuna koyar."""
+    while True:
+        program = await llm_queue.get()
+        if program is None:
+            return
+
+        representative_item = representative_items[program["index"]]
+        item = build_error_item(program)
+        try:
+            estimate = run.estimate_call_tokens(program["applicant_requirements"])
+            result = await asyncio.to_thread(
+                call_with_budget, run, program["program_name"], estimate, send_program_with_pool, program["program_name"], program["applicant_requirements"], program["index"], pool=pool
+            )
+            item = await asyncio.to_thread(build_result_item, program, result, run, pool)
+        except Exception as e:
+            # Tek programın hatası işçiyi durdurmaz; program hata kaydıyla yazılır
+            event_log.error("pipeline.llm_failed", f"[{program['index']}] Analiz hatası: {program['program_name']} - {str(e)}", index=program["index"], program=program["program_name"], run_id=run.run_id)
+        finally:
+            # İptal dahil her durumda temsilcinin sonucu belirlenir; bekleyen kopyalar askıda kalmaz
+            if not representative_item.done():
+                representative_item.set_result(item)
+        await sink_queue.put(item)
+
+
+async def sink_stage(sink_queue, report, json_file, run_id, results):
+    """Sonuçları geldikleri sırayla rapora, JSON dosyasına ve indekse yazar."""
+    while True:
+        item = await sink_queue.get()
+        if item is None:
+            return
+
+        # Yalnızca ad tutulur; analiz metinleri çalıştırma boyunca bellekte birikmez
+        results.append(item["program_name"])
+        await asyncio.to_thread(write_result_item, item, report, json_file, run_id)
+
+
+async def run_stages(run, pool, report, json_file, results, programs):
+    """Liste → detay → LLM → yazma aşamalarını sınırlı kuyruklarla eşzamanlı çalıştırır.
+
+    Aşamalar tek bir TaskGroup içinde çalışır: herhangi biri hata verirse
+    diğerleri iptal edilir ve hata çağırana yükselir; dolu bir kuyrukta
+    sonsuza kadar bekleyen aşama kalmaz.
+    """
+    detail_queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    llm_queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    sink_queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    llm_workers = max(1, pool.total_capacity())
+    dedup = DedupIndex() if DEDUP_ENABLED else None
+    representative_items = {}
+    fan_outs = []
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            sink_task = group.create_task(sink_stage(sink_queue, report, json_file, run.run_id, results))
+            llm_tasks = [group.create_task(llm_stage(llm_queue, sink_queue, run, pool, representative_items)) for _ in range(llm_workers)]
+
+            await asyncio.gather(list_stage(detail_queue), detail_stage(detail_queue, llm_queue, sink_queue, programs, dedup, representative_items, fan_outs, group))
+
+            # Kazıma bitti; LLM işçilerini, aktarmaları ve ardından yazma aşamasını kapat
+            for _ in llm_tasks:
+                await llm_queue.put(None)
+            await asyncio.gather(*llm_tasks)
+            await asyncio.gather(*fan_outs)
+            if dedup and dedup.get_stats()["saved_calls"]:
+                print(f"🧬 Tekrar eden metin nedeniyle {dedup.get_stats()['saved_calls']} LLM çağrısı yapılmadı")
+            await sink_queue.put(None)
+            await sink_task
+    except ExceptionGroup as errors:
+        # İlk aşama hatası çalıştırmanın hatası olarak yükselir
+        raise errors.exceptions[0]
+
+
+def run_pipeline():
+    """Kataloğu kazırken programları analiz eden uçtan uca akışı çalıştırır.
+
+    Her program, detay sayfası ayrıştırılır ayrıştırılmaz LLM'e gönderilir;
+    böylece toplam süre kazıma ve analiz sürelerinin toplamına değil,
+    büyüğüne yaklaşır. Kazınan katalog sonunda tubitak_rag_data.json'a yazılır.
+    """
+    pool = get_backend_pool()
+    if not pool.provision_workspaces():
+        # Analiz yapılamasa da katalog çekilir; sonraki çalıştırma dosyadan başlar
+        print("Workspace oluşturulamadı! Yalnızca TÜBİTAK verileri çekiliyor.")
+        scrape_tubitak_data()
+        return
+
+    workspaces = [b["workspace_slug"] for b in pool.get_status() if b["workspace_slug"]]
+    config = {"pipeline": True, "token_budget": TOKEN_BUDGET, "backends": [b["url"] for b in pool.get_status()]}
+    run_id, html_file, json_file = run_registry.allocate_run(workspace=",".join(workspaces), config=config)
+    set_profile_run_id(run_id)
+    run = start_run(run_id)
+
+    results = []
+    try:
+        report = ReportRenderer(html_file)
+        init_json(json_file)
+
+        print("🔍 TÜBİTAK verileri çekilirken analiz ediliyor...")
+        rag_data = new_rag_data()
+        asyncio.run(run_stages(run, pool, report, json_file, results, rag_data["programs"]))
+
+        save_rag_data(rag_data)
+        finalize_run(run, results, report, html_file, json_file)
+    except Exception as e:
+        fail_run(run, results, e)
+        raise
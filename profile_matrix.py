@@ -0,0 +1,156 @@
+import json
+import os
+from datetime import datetime
+from ai_analyzer import DEFAULT_COMPANY_PROFILE
+from response_parser import parse_response
+from backend_pool import get_backend_pool, send_program_with_pool
+from llm_dispatcher import get_dispatcher, make_cache_key
+from program_source import ensure_program_index, iter_programs
+
+# Profil matrisi ayarları
+PROFILES_FILE = "company_profiles.json"
+MATRIX_OUTPUT_DIR = "profile_matrix_results"
+
+# Prompt değiştiğinde önbelleği geçersiz kılmak için artırılır
+PROMPT_VERSION = 1
+
+
+def load_company_profiles():
+    """company_profiles.json dosyasından şirket profillerini yükler."""
+    try:
+        with open(PROFILES_FILE, "r", encoding="utf-8") as f:
+            profiles = json.load(f).get("profiles", [])
+    except (FileNotFoundError, json.JSONDecodeError):
+        profiles = []
+
+    if not profiles:
+        profiles = [{"id": "kurumsal_arge", "description": DEFAULT_COMPANY_PROFILE}]
+    return profiles
+
+
+def load_programs():
+    """Analize uygun programları tubitak_rag_data.json dosyasından akış olarak yükler."""
+    if ensure_program_index() is None:
+        print("❌ tubitak_rag_data.json dosyası bulunamadı!")
+        return []
+
+    return [p for p in iter_programs() if p.get("status") == "success" and p.get("applicant_requirements") != "Veri bulunamadı"]
+
+
+def run_profile_matrix(profiles=None, programs=None, pool=None):
+    """Programlar × profiller ızgarasını ortak dağıtıcı üzerinden analiz eder.
+
+    Aynı profil/program metni için sonuç önbellekteyse LLM'e gidilmez; aynı
+    hücre ızgarada birden fazla kez geçiyorsa tek çağrı yapılır.
+    """
+    profiles = profiles or load_company_profiles()
+    programs = programs if programs is not None else load_programs()
+
+    if not programs:
+        print("❌ Analiz edilecek program bulunamadı!")
+        return None
+
+    if pool is None:
+        pool = get_backend_pool()
+        if not pool.provision_workspaces():
+            print("Workspace oluşturulamadı! İşlem sonlandırılıyor.")
+            return None
+
+    print(f"🧮 Profil matrisi: {len(programs)} program × {len(profiles)} profil")
+    print("=" * 80)
+
+    dispatcher = get_dispatcher()
+    dispatcher.ensure_workers(pool.total_capacity())
+    futures = []
+
+    for i, program in enumerate(programs):
+        program_name = program.get("program_name", "Bilinmeyen Program")
+        applicant_requirements = program.get("applicant_requirements", "")
+        row = []
+        for profile in profiles:
+            key = make_cache_key("profile_matrix", PROMPT_VERSION, profile["description"], program_name, applicant_requirements)
+            index = f"{i + 1}/{profile['id']}"
+            row.append(
+                dispatcher.submit(
+                    key,
+                    send_program_with_pool,
+                    program_name,
+                    applicant_requirements,
+                    index,
+                    company_profile=profile["description"],
+                    pool=pool,
+                )
+            )
+        futures.append(row)
+
+    scores = []
+    verdicts = []
+    analyses = []
+    for row in futures:
+        score_row, verdict_row, analysis_row = [], [], []
+        for future in row:
+            result = future.result()
+            analysis_text = (result or {}).get("response") or ""
+            analysis_text = analysis_text.replace("\\n", "\n")
+            parsed = parse_response(analysis_text)
+            score_row.append(parsed["score"])
+            verdict_row.append(parsed["verdict"])
+            analysis_row.append(analysis_text if result else "Hata: Analiz yapılamadı")
+        scores.append(score_row)
+        verdicts.append(verdict_row)
+        analyses.append(analysis_row)
+
+    matrix = {
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "workspaces": [b["workspace_slug"] for b in pool.get_status() if b["workspace_slug"]],
+        "profiles": profiles,
+        "programs": [p.get("program_name", "Bilinmeyen Program") for p in programs],
+        "scores": scores,
+        "verdicts": verdicts,
+        "analyses": analyses,
+        "dispatcher_stats": dispatcher.get_stats(),
+    }
+    matrix["summary"] = summarize_matrix(matrix)
+
+    os.makedirs(MATRIX_OUTPUT_DIR, exist_ok=True)
+    output_file = os.path.join(MATRIX_OUTPUT_DIR, f"profile_matrix_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(matrix, f, ensure_ascii=False, indent=2)
+
+    print(f"💾 Profil matrisi '{output_file}' dosyasına kaydedildi.")
+    return matrix
+
+
+def summarize_matrix(matrix):
+    """Her profil için ortalama skor ve karar dağılımını hesaplar."""
+    summary = []
+    for j, profile in enumerate(matrix["profiles"]):
+        column_scores = [row[j] for row in matrix["scores"] if row[j] is not None]
+        column_verdicts = [row[j] for row in matrix["verdicts"]]
+        summary.append(
+            {
+                "profile_id": profile["id"],
+                "mean_score": round(sum(column_scores) / len(column_scores), 3) if column_scores else None,
+                "uygun": column_verdicts.count("Uygun"),
+                "sartli_uygun": column_verdicts.count("Şartlı Uygun"),
+                "uygun_degil": column_verdicts.count("Uygun Değil"),
+            }
+        )
+    return summary
+
+
+def load_latest_matrix():
+    """En son kaydedilen profil matrisini döndürür."""
+    if not os.path.exists(MATRIX_OUTPUT_DIR):
+        return None
+
+    files = sorted(f for f in os.listdir(MATRIX_OUTPUT_DIR) if f.endswith(".json"))
+    if not files:
+        return None
+
+    with open(os.path.join(MATRIX_OUTPUT_DIR, files[-1]), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    run_profile_matrix()
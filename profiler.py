@@ -0,0 +1,225 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from results_index import get_connection
+
+# Profil modu ayarları
+PROFILE_MODE = os.getenv("TUBITAK_PROFILE", "0") == "1"
+PROFILE_DIR = "profiles"
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("TUBITAK_PROFILE_SAMPLE_MS", "5")) / 1000
+PROFILE_TOP_FUNCTIONS = 20
+
+_session = None
+_requested = False
+_last_summary = None
+_lock = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    """Bir çalıştırma boyunca aşama sürelerini ve yığın örneklerini toplar.
+
+    Örnekleyici tüm iş parçacıklarının yığınını belirli aralıklarla okur
+    (LLM beklemeleri dahil duvar saati profili); cProfile ise oturumu başlatan
+    iş parçacığını fonksiyon düzeyinde ölçer.
+    """
+
+    def __init__(self, label, sample_interval=PROFILE_SAMPLE_INTERVAL):
+        self.label = label
+        self.run_id = None
+        self.sample_interval = sample_interval
+        self.stages = {}
+        self.stacks = Counter()
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.profile = cProfile.Profile()
+        self.sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.wall_started = None
+        self.cpu_started = None
+
+    def start(self):
+        self.wall_started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.sampler.start()
+        self.profile.enable()
+
+    def _sample_loop(self):
+        own_ident = threading.get_ident()
+        while not self.stopped.wait(self.sample_interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def record(self, name, wall, cpu):
+        """Bir aşamanın duvar saati ve CPU süresini ekler."""
+        with self.lock:
+            stage = self.stages.setdefault(name, {"count": 0, "wall": 0.0, "cpu": 0.0})
+            stage["count"] += 1
+            stage["wall"] += wall
+            stage["cpu"] += cpu
+
+    def _top_functions(self):
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        top = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            top.append({"function": f"{function} ({os.path.basename(filename)}:{line})", "calls": calls, "total": round(total, 4), "cumulative": round(cumulative, 4)})
+        return sorted(top, key=lambda entry: entry["cumulative"], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+
+    def stop(self):
+        """Ölçümü bitirir, çıktı dosyalarını yazar ve özeti döndürür."""
+        self.profile.disable()
+        self.stopped.set()
+        self.sampler.join()
+        wall = time.perf_counter() - self.wall_started
+        cpu = time.process_time() - self.cpu_started
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{self.label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        # flamegraph.pl / speedscope ile açılabilen katlanmış yığın biçimi
+        folded_file = f"{base}.folded"
+        with open(folded_file, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        pstats_file = f"{base}.prof"
+        self.profile.dump_stats(pstats_file)
+
+        with self.lock:
+            stages = {name: {"count": s["count"], "wall": round(s["wall"], 3), "cpu": round(s["cpu"], 3)} for name, s in sorted(self.stages.items(), key=lambda item: item[1]["wall"], reverse=True)}
+        return {
+            "label": self.label,
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "wall": round(wall, 3),
+            "cpu": round(cpu, 3),
+            "stages": stages,
+            "samples": self.samples,
+            "top_functions": self._top_functions(),
+            "folded_file": folded_file,
+            "pstats_file": pstats_file,
+        }
+
+
+def request_profile():
+    """Bir sonraki çalıştırmanın profil modunda yapılmasını ister."""
+    global _requested
+    with _lock:
+        _requested = True
+
+
+def _should_profile():
+    global _requested
+    with _lock:
+        requested, _requested = _requested, False
+    return PROFILE_MODE or requested
+
+
+def _save_summary(summary):
+    try:
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO profiles (run_id, label, started_at, wall, folded_file, pstats_file, summary) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (summary["run_id"], summary["label"], summary["started_at"], summary["wall"], summary["folded_file"], summary["pstats_file"], json.dumps(summary, ensure_ascii=False)),
+            )
+        conn.close()
+    except Exception as e:
+        print(f"Profil özeti kaydedilemedi: {str(e)}")
+
+
+@contextmanager
+def profile_run(label):
+    """Profil modu açıksa veya API ile istendiyse bloğu profilleyerek çalıştırır.
+
+    Aynı anda tek oturum çalışır; iç içe veya eşzamanlı çağrılar mevcut
+    oturuma katkı verir.
+    """
+    global _session, _last_summary
+    with _lock:
+        nested = _session is not None
+    if nested or not _should_profile():
+        yield None
+        return
+
+    session = ProfileSession(label)
+    with _lock:
+        _session = session
+    print(f"🔬 Profil modu açık: {label}")
+    session.start()
+    try:
+        yield session
+    finally:
+        with _lock:
+            _session = None
+        summary = session.stop()
+        _last_summary = summary
+        _save_summary(summary)
+        slowest = ", ".join(f"{name} {s['wall']}s" for name, s in list(summary["stages"].items())[:3])
+        print(f"🔬 Profil tamamlandı: {summary['wall']}s duvar, {summary['cpu']}s CPU ({slowest}) → {summary['folded_file']}")
+
+
+def set_profile_run_id(run_id):
+    """Çalışan profil oturumunu çalıştırma numarasıyla ilişkilendirir."""
+    session = _session
+    if session is not None:
+        session.run_id = run_id
+
+
+@contextmanager
+def stage(name):
+    """Bloğun duvar saati ve (iş parçacığı) CPU süresini aşama adıyla kaydeder; profil kapalıyken maliyetsizdir."""
+    session = _session
+    if session is None:
+        yield
+        return
+
+    wall_started = time.perf_counter()
+    cpu_started = time.thread_time()
+    try:
+        yield
+    finally:
+        session.record(name, time.perf_counter() - wall_started, time.thread_time() - cpu_started)
+
+
+def list_profiles(limit=20):
+    """Kayıtlı profil özetlerini en yeniden eskiye döndürür."""
+    conn = get_connection()
+    rows = conn.execute("SELECT id, run_id, label, started_at, wall, folded_file, pstats_file FROM profiles ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def get_profile(profile_id):
+    """Tek bir profil özetini döndürür; yoksa None."""
+    conn = get_connection()
+    row = conn.execute("SELECT id, summary FROM profiles WHERE id = ?", (profile_id,)).fetchone()
+    conn.close()
+    return {"id": row["id"], **json.loads(row["summary"])} if row else None
+
+
+def get_profile_status():
+    """Profil modunun durumunu döndürür."""
+    with _lock:
+        return {"enabled": PROFILE_MODE, "requested": _requested, "active": _session.label if _session else None, "last": _last_summary and {k: v for k, v in _last_summary.items() if k != "top_functions"}}
@@ -0,0 +1,97 @@
+import fnmatch
+from datetime import datetime
+from program_source import RAG_DATA_FILE, _read_at, ensure_program_index
+from results_index import ensure_index, get_connection
+
+
+def _fold(text):
+    """Türkçe I/İ harflerini koruyarak küçük harfe çevirir."""
+    return (text or "").replace("I", "ı").replace("İ", "i").lower()
+
+
+def _matches_pattern(program_name, patterns):
+    name = _fold(program_name)
+    for pattern in patterns:
+        pattern = _fold(pattern)
+        # Joker karakter yoksa ad içinde geçmesi yeterli
+        if any(char in pattern for char in "*?["):
+            if fnmatch.fnmatchcase(name, pattern):
+                return True
+        elif pattern in name:
+            return True
+    return False
+
+
+def _parse_since(stale_since):
+    """"YYYY-MM-DD" veya "YYYY-MM-DD HH:MM:SS" biçimini indeksteki zaman biçimine getirir."""
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(stale_since, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    raise ValueError(f"Geçersiz tarih: {stale_since} (YYYY-MM-DD bekleniyor)")
+
+
+def normalize_selection(call_numbers=None, patterns=None, stale_since=None, failed_last_run=False):
+    """Seçim ölçütlerini tekrarsız ve sıralı biçime getirir; hiç ölçüt yoksa None."""
+    selection = {
+        "call_numbers": sorted({str(number).strip() for number in call_numbers or () if str(number).strip()}),
+        "patterns": sorted({pattern.strip() for pattern in patterns or () if pattern.strip()}),
+        "stale_since": _parse_since(stale_since) if stale_since else None,
+        "failed_last_run": bool(failed_last_run),
+    }
+    if not (selection["call_numbers"] or selection["patterns"] or selection["stale_since"] or selection["failed_last_run"]):
+        return None
+    return selection
+
+
+def _load_last_results():
+    """Her programın en son indekslenen sonucunun zamanını ve skorunu döndürür."""
+    ensure_index()
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            """
+            SELECT r.program_name, r.created_at, r.score FROM results r
+            JOIN (SELECT program_name, MAX(id) AS id FROM results GROUP BY program_name) latest ON latest.id = r.id
+            """
+        ).fetchall()
+    finally:
+        conn.close()
+    return {row["program_name"]: (row["created_at"], row["score"]) for row in rows}
+
+
+def resolve_selection(selection, path=RAG_DATA_FILE):
+    """Seçimle eşleşen katalog programlarını (sıra numarası, program) olarak döndürür.
+
+    Çağrı numaraları ve ad kalıpları hedef kümeyi belirler (ikisi birlikte
+    verilirse birleşimi); "stale_since" ve "failed_last_run" bu kümeyi
+    daraltır. Yalnızca daraltma ölçütü verilirse tüm katalog taranır.
+    Adaylar konum indeksinden seçilir, dosyadan yalnızca eşleşen kayıtlar
+    okunur. Sıra numaraları tam çalıştırmadakiyle aynıdır.
+    """
+    if ensure_program_index(path) is None:
+        return []
+
+    conn = get_connection()
+    try:
+        rows = conn.execute("SELECT position, call_number, program_name, offset, length FROM program_offsets WHERE path = ? ORDER BY position", (path,)).fetchall()
+    finally:
+        conn.close()
+
+    call_numbers = set(selection.get("call_numbers") or ())
+    patterns = selection.get("patterns") or ()
+    if call_numbers or patterns:
+        rows = [row for row in rows if row["call_number"] in call_numbers or (patterns and _matches_pattern(row["program_name"], patterns))]
+
+    stale_since = selection.get("stale_since")
+    failed_last_run = selection.get("failed_last_run")
+    if stale_since or failed_last_run:
+        last_results = _load_last_results()
+        if stale_since:
+            # Hiç analiz edilmemiş programlar da eskimiş sayılır
+            rows = [row for row in rows if row["program_name"] not in last_results or last_results[row["program_name"]][0] < stale_since]
+        if failed_last_run:
+            rows = [row for row in rows if row["program_name"] in last_results and last_results[row["program_name"]][1] is None]
+
+    return [(row["position"] + 1, _read_at(path, row["offset"], row["length"])) for row in rows]
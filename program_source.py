@@ -0,0 +1,136 @@
+import codecs
+import json
+import os
+import re
+from results_index import extract_call_number, get_connection
+
+# Program kaynağı ayarları
+RAG_DATA_FILE = "tubitak_rag_data.json"
+READ_CHUNK_SIZE = 64 * 1024
+
+_PROGRAMS_KEY_PATTERN = re.compile(r'"programs"\s*:\s*\[')
+_SEPARATOR_CHARS = ",\r\n\t "
+
+
+def iter_programs_with_offsets(path=RAG_DATA_FILE):
+    """"programs" dizisindeki kayıtları dosyayı parça parça okuyarak döndürür.
+
+    Her kayıt, dosyadaki bayt konumu ve uzunluğuyla birlikte gelir. Bellekte
+    yalnızca okunmakta olan parça ve tek bir program tutulur.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    base = 0  # text[0] karakterinin dosyadaki bayt konumu
+    in_programs = False
+
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            text += text_decoder.decode(chunk, final=not chunk)
+
+            if not in_programs:
+                match = _PROGRAMS_KEY_PATTERN.search(text)
+                if not match:
+                    if not chunk:
+                        return
+                    continue
+                base += len(text[: match.end()].encode("utf-8"))
+                text = text[match.end() :]
+                in_programs = True
+
+            pos = 0
+            while True:
+                while pos < len(text) and text[pos] in _SEPARATOR_CHARS:
+                    pos += 1
+                if pos < len(text) and text[pos] == "]":
+                    return
+                try:
+                    program, end = decoder.raw_decode(text, pos)
+                except json.JSONDecodeError:
+                    # Kayıt henüz tamamlanmadı; bir sonraki parçayı oku
+                    break
+
+                start = base + len(text[:pos].encode("utf-8"))
+                yield program, start, len(text[pos:end].encode("utf-8"))
+                base += len(text[:end].encode("utf-8"))
+                text = text[end:]
+                pos = 0
+
+            if not chunk:
+                if text.strip():
+                    print(f"⚠️ Program dosyası okunamadı: {path} (bayt {base})")
+                return
+
+
+def iter_programs(path=RAG_DATA_FILE):
+    """Programları tek tek döndürür."""
+    for program, _, _ in iter_programs_with_offsets(path):
+        yield program
+
+
+def ensure_program_index(path=RAG_DATA_FILE):
+    """Çağrı numarasına göre program konum indeksini gerektiğinde yeniden oluşturur.
+
+    İndeks, dosyanın boyutu ve değişiklik zamanı değişmedikçe yeniden
+    oluşturulmaz. Program sayısını döndürür; dosya yoksa None döner.
+    """
+    if not os.path.exists(path):
+        return None
+
+    stat = os.stat(path)
+    conn = get_connection()
+    try:
+        row = conn.execute("SELECT mtime, size, program_count FROM program_sources WHERE path = ?", (path,)).fetchone()
+        if row and row["mtime"] == stat.st_mtime and row["size"] == stat.st_size:
+            return row["program_count"]
+
+        rows = []
+        for position, (program, offset, length) in enumerate(iter_programs_with_offsets(path)):
+            program_name = program.get("program_name", "")
+            rows.append((path, position, extract_call_number(program_name), program_name, offset, length))
+
+        with conn:
+            conn.execute("DELETE FROM program_offsets WHERE path = ?", (path,))
+            conn.executemany("INSERT INTO program_offsets (path, position, call_number, program_name, offset, length) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO program_sources (path, mtime, size, program_count) VALUES (?, ?, ?, ?)",
+                (path, stat.st_mtime, stat.st_size, len(rows)),
+            )
+        return len(rows)
+    finally:
+        conn.close()
+
+
+def _read_at(path, offset, length):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.read(length).decode("utf-8"))
+
+
+def get_program_by_call_number(call_number, path=RAG_DATA_FILE):
+    """Çağrı numarasıyla eşleşen ilk programı dosyayı baştan okumadan döndürür."""
+    if not call_number or ensure_program_index(path) is None:
+        return None
+
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT offset, length FROM program_offsets WHERE path = ? AND call_number = ? ORDER BY position LIMIT 1",
+        (path, str(call_number)),
+    ).fetchone()
+    conn.close()
+    return _read_at(path, row["offset"], row["length"]) if row else None
+
+
+def find_program_name_by_call_number(call_number, path=RAG_DATA_FILE):
+    """Çağrı numarasıyla eşleşen program adını yalnızca indeksten döndürür."""
+    if not call_number or ensure_program_index(path) is None:
+        return None
+
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT program_name FROM program_offsets WHERE path = ? AND call_number = ? ORDER BY position LIMIT 1",
+        (path, str(call_number)),
+    ).fetchone()
+    conn.close()
+    return row["program_name"] if row else None
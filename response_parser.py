@@ -0,0 +1,172 @@
+import json
+import os
+import re
+import threading
+
+# Yanıt ayrıştırma ayarları
+JSON_RESPONSE_MODE = os.getenv("TUBITAK_JSON_RESPONSE_MODE", "0") == "1"
+
+VERDICTS = ("Uygun", "Şartlı Uygun", "Uygun Değil")
+
+# LLM'den yapılandırılmış yanıt istemek için prompt'a eklenen sözleşme
+JSON_CONTRACT_INSTRUCTION = """
+Yanıtı yalnızca aşağıdaki biçimde tek bir JSON nesnesi olarak ver, başka metin ekleme:
+{"score": 0.0, "verdict": "Uygun | Şartlı Uygun | Uygun Değil", "explanation": "en fazla 2-3 cümle"}
+"""
+
+_NUMBER = r"(\d+(?:[.,]\d+)?)"
+_DENOMINATOR = r"(?:\s*/\s*(100|10|1)\b)?"
+
+# Desenler modül yüklenirken bir kez derlenir; sıralama önceliği belirler
+_SCORE_PATTERNS = [
+    # "Uygunluk Skoru: 0.8", "Uygunluk Skoru (0–1 arası): 0,8", "Uygunluk Skoru: 7/10"
+    re.compile(r"Uygunluk\s+Skoru\**(?:\s*\([^)\n]*\))?\s*[:：]?\s*\**\s*" + _NUMBER + _DENOMINATOR, re.IGNORECASE),
+    # "Skor: 0.8" — iki nokta zorunlu, böylece metindeki ilgisiz sayılar yakalanmaz
+    re.compile(r"\bSkor(?:u)?\**\s*[:：]\s*\**\s*" + _NUMBER + _DENOMINATOR, re.IGNORECASE),
+    # Tek başına kesir: "7/10", "85/100", "0.8/1"
+    re.compile(_NUMBER + r"\s*/\s*(100|10|1)\b"),
+]
+_VERDICT_LINE_PATTERN = re.compile(r"Sonuç\**(?:\s*\([^)\n]*\))?\s*[:：]?\s*\**\s*(Şartlı\s+Uygun|Uygun\s+Değil|Uygun)\b", re.IGNORECASE)
+_VERDICT_ANY_PATTERN = re.compile(r"\b(Şartlı\s+Uygun|Uygun\s+Değil|Uygun)\b")
+_JSON_OBJECT_PATTERN = re.compile(r"\{[^{}]*\}", re.DOTALL)
+
+_stats = {"parsed": 0, "parsed_json": 0, "failed": 0, "reasked": 0, "reask_recovered": 0}
+_stats_lock = threading.Lock()
+
+
+def _normalize_score(value, denominator=None):
+    """Skoru 0-1 aralığına getirir; aralık dışı değerler için None döner."""
+    score = float(value.replace(",", "."))
+    if denominator:
+        score = score / float(denominator)
+    elif score > 1:
+        # Payda yazılmamışsa ölçeği değerden tahmin et
+        if score <= 10:
+            score = score / 10
+        elif score <= 100:
+            score = score / 100
+        else:
+            return None
+    if not 0 <= score <= 1:
+        return None
+    return round(score, 4)
+
+
+def _normalize_verdict(text):
+    """Karar metnini standart üç değerden birine çevirir."""
+    if not text:
+        return None
+    verdict = " ".join(str(text).split()).lower()
+    if verdict.startswith("şartlı"):
+        return "Şartlı Uygun"
+    if "değ" in verdict:
+        return "Uygun Değil"
+    if verdict == "uygun":
+        return "Uygun"
+    return None
+
+
+def extract_score_from_response(response_text: str) -> float:
+    """AI yanıtından uygunluk skorunu çıkarır."""
+    if not response_text:
+        return None
+
+    # Aralık dışı bir sayı (ör. "Uygunluk Skoru: 2024") sonraki eşleşmeleri engellemez
+    for pattern in _SCORE_PATTERNS:
+        for match in pattern.finditer(response_text):
+            score = _normalize_score(match.group(1), match.group(2))
+            if score is not None:
+                return score
+
+    return None
+
+
+def extract_verdict_from_response(response_text: str) -> str:
+    """AI yanıtından sonuç kararını (Uygun / Şartlı Uygun / Uygun Değil) çıkarır."""
+    if not response_text:
+        return None
+
+    # Önce "Sonuç:" satırını ara, bulunamazsa metnin tamamına bak
+    match = _VERDICT_LINE_PATTERN.search(response_text) or _VERDICT_ANY_PATTERN.search(response_text)
+    return _normalize_verdict(match.group(1)) if match else None
+
+
+def parse_json_response(response_text):
+    """JSON sözleşmesine uyan yanıtı ayrıştırır; uymuyorsa None döner."""
+    for match in _JSON_OBJECT_PATTERN.finditer(response_text or ""):
+        try:
+            item = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(item, dict) or "score" not in item:
+            continue
+
+        try:
+            score = _normalize_score(str(item["score"]))
+        except ValueError:
+            continue
+        verdict = _normalize_verdict(item.get("verdict"))
+        if score is None or verdict is None:
+            continue
+        return {"score": score, "verdict": verdict, "explanation": str(item.get("explanation", "")).strip()}
+
+    return None
+
+
+def parse_response(response_text, record=True):
+    """Yanıttan skor ve kararı çıkarır; önce JSON sözleşmesini, sonra metin desenlerini dener.
+
+    Dönen sözlükteki "ok" alanı skor bulunup bulunmadığını gösterir. record
+    True ise ayrıştırma sayaçları güncellenir; yeniden sorma yapılacaksa
+    False verilip sonuç record_parse ile program başına bir kez işlenir.
+    """
+    parsed = parse_json_response(response_text)
+    if parsed:
+        parsed.update({"source": "json", "ok": True})
+    else:
+        score = extract_score_from_response(response_text)
+        parsed = {
+            "score": score,
+            "verdict": extract_verdict_from_response(response_text),
+            "explanation": None,
+            "source": "text" if score is not None else None,
+            "ok": score is not None,
+        }
+
+    if record:
+        record_parse(parsed)
+    return parsed
+
+
+def record_parse(parsed):
+    """Ayrıştırma sonucunu sayaçlara işler."""
+    with _stats_lock:
+        if parsed["ok"]:
+            _stats["parsed"] += 1
+            if parsed["source"] == "json":
+                _stats["parsed_json"] += 1
+        else:
+            _stats["failed"] += 1
+
+
+def build_reask_message(response_text):
+    """Ayrıştırılamayan yanıtı yapılandırılmış biçime dönüştürmek için kısa bir istek oluşturur."""
+    return f"""
+Aşağıdaki değerlendirme metnindeki uygunluk skorunu ve sonucu çıkar. Yeni bir değerlendirme yapma.
+
+Metin: {response_text}
+{JSON_CONTRACT_INSTRUCTION}"""
+
+
+def record_reask(recovered):
+    """Yeniden sorma denemesinin sonucunu sayaçlara işler."""
+    with _stats_lock:
+        _stats["reasked"] += 1
+        if recovered:
+            _stats["reask_recovered"] += 1
+
+
+def get_parse_stats():
+    """Ayrıştırma sayaçlarını döndürür."""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,392 @@
+import gzip
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+from response_parser import VERDICTS, extract_score_from_response, extract_verdict_from_response
+
+# Sonuç indeksi ayarları
+INDEX_DB = "ai_results_index.db"
+RESULTS_JSON_DIR = "ai_analyse_results_json"
+ARCHIVE_DIR = "results_archive"
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_CALL_NUMBER_PATTERN = re.compile(r"^(\d+)(?:\s*-|\s+)")
+_RUN_ID_PATTERN = re.compile(r"ai_analyse_results(\d*)\.json(?:\.gz)?$")
+
+# (tablo, sütun, tanım): tablo oluşturulduktan sonra eklenen sütunlar
+_ADDED_COLUMNS = [
+    ("runs", "kind", "TEXT NOT NULL DEFAULT 'full'"),
+    ("pending_active_calls", "attempts", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+_index_synced = False
+
+
+def extract_call_number(program_name):
+    """Program adından çağrı numarasını çıkarır."""
+    # "1707 - Sipariş Ar-Ge..." veya "1831 Yeşil İnovasyon..." formatından sayı çıkar
+    match = _CALL_NUMBER_PATTERN.match(program_name or "")
+    if match:
+        return match.group(1)
+    return None
+
+
+def run_id_from_filename(json_file):
+    """ai_analyse_resultsN.json (veya arşivlenmiş .json.gz) dosya adından çalıştırma numarasını çıkarır."""
+    match = _RUN_ID_PATTERN.search(os.path.basename(json_file))
+    if not match:
+        return None
+    # Numarasız dosya 1 olarak sayılır (file_manager ile aynı kural)
+    return int(match.group(1)) if match.group(1) else 1
+
+
+def get_connection():
+    """İndeks veritabanına bağlantı açar ve şemayı hazırlar."""
+    conn = sqlite3.connect(INDEX_DB, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id INTEGER NOT NULL,
+            program_name TEXT NOT NULL,
+            call_number TEXT,
+            score REAL,
+            verdict TEXT,
+            analysis TEXT,
+            created_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_id);
+        CREATE INDEX IF NOT EXISTS idx_results_call ON results(call_number);
+        CREATE INDEX IF NOT EXISTS idx_results_verdict ON results(verdict);
+        CREATE INDEX IF NOT EXISTS idx_results_created ON results(created_at);
+        CREATE INDEX IF NOT EXISTS idx_results_run_program ON results(run_id, program_name);
+        CREATE TABLE IF NOT EXISTS indexed_files (
+            path TEXT PRIMARY KEY,
+            mtime REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            program_count INTEGER,
+            workspace TEXT,
+            config_hash TEXT,
+            html_file TEXT,
+            json_file TEXT,
+            token_summary TEXT,
+            kind TEXT NOT NULL DEFAULT 'full'
+        );
+        CREATE TABLE IF NOT EXISTS archives (
+            original_path TEXT PRIMARY KEY,
+            archive_path TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            run_id INTEGER,
+            original_size INTEGER NOT NULL,
+            archived_size INTEGER NOT NULL,
+            archived_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_archives_kind ON archives(kind, archive_path);
+        CREATE TABLE IF NOT EXISTS program_sources (
+            path TEXT PRIMARY KEY,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL,
+            program_count INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS program_offsets (
+            path TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            call_number TEXT,
+            program_name TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            PRIMARY KEY (path, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_program_offsets_call ON program_offsets(path, call_number);
+        CREATE TABLE IF NOT EXISTS active_calls (
+            url TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            call_number TEXT,
+            first_seen TEXT NOT NULL,
+            last_seen TEXT NOT NULL,
+            is_open INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id INTEGER,
+            label TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            wall REAL NOT NULL,
+            folded_file TEXT NOT NULL,
+            pstats_file TEXT NOT NULL,
+            summary TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_profiles_run ON profiles(run_id);
+        CREATE TABLE IF NOT EXISTS document_uploads (
+            base_url TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            location TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            uploaded_at TEXT NOT NULL,
+            PRIMARY KEY (base_url, content_hash)
+        );
+        CREATE TABLE IF NOT EXISTS workspace_documents (
+            base_url TEXT NOT NULL,
+            workspace_slug TEXT NOT NULL,
+            path TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            location TEXT NOT NULL,
+            embedded_at TEXT NOT NULL,
+            PRIMARY KEY (base_url, workspace_slug, path)
+        );
+        CREATE TABLE IF NOT EXISTS active_call_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            change_type TEXT NOT NULL,
+            url TEXT NOT NULL,
+            name TEXT NOT NULL,
+            previous_name TEXT,
+            call_number TEXT,
+            detected_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS pending_active_calls (
+            url TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            detected_at TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0
+        );
+        """
+    )
+    # Önceki sürümlerde oluşturulmuş veritabanlarına sonradan eklenen sütunlar
+    for table, column, definition in _ADDED_COLUMNS:
+        if column not in {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}:
+            try:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                conn.commit()
+            except sqlite3.OperationalError:
+                # Başka bir işlem sütunu aynı anda eklemiş olabilir
+                pass
+    return conn
+
+
+def index_result(run_id, item, score=None, verdict=None, created_at=None):
+    """Tek bir analiz sonucunu indekse ekler."""
+    program_name = item.get("program_name", "Bilinmeyen Program")
+    created_at = created_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    try:
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO results (run_id, program_name, call_number, score, verdict, analysis, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, program_name, extract_call_number(program_name), score, verdict, item.get("analysis"), created_at),
+            )
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Sonuç indekse eklenemedi: {program_name} - {str(e)}")
+
+
+def mark_file_indexed(json_file):
+    """Çalıştırma sırasında indekslenen dosyayı yeniden taranmayacak şekilde işaretler."""
+    try:
+        conn = get_connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO indexed_files (path, mtime) VALUES (?, ?)", (json_file, os.path.getmtime(json_file)))
+        conn.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"İndeks dosya kaydı güncellenemedi: {json_file} - {str(e)}")
+
+
+def iter_result_items(json_file):
+    """Sonuç dosyasındaki kayıtları tek tek döndürür.
+
+    Eski dosyalar açılış köşeli parantezi olmadan yazıldığı için dosya tam
+    bir JSON dizisi olarak değil, ardışık nesneler olarak okunur. Arşivlenmiş
+    .gz dosyalar da aynı şekilde okunur.
+    """
+    opener = gzip.open if json_file.endswith(".gz") else open
+    with opener(json_file, "rt", encoding="utf-8") as f:
+        content = f.read()
+
+    decoder = json.JSONDecoder()
+    pos = 0
+    length = len(content)
+    while pos < length:
+        # Nesneler arasındaki "[", "," ve "]" ayraçlarını atla
+        while pos < length and content[pos] in "[],\r\n\t ":
+            pos += 1
+        if pos >= length:
+            break
+        try:
+            item, pos = decoder.raw_decode(content, pos)
+        except json.JSONDecodeError:
+            print(f"⚠️ Sonuç dosyası okunamadı: {json_file} (konum {pos})")
+            break
+        if isinstance(item, dict):
+            yield item
+
+
+def _result_files():
+    """Güncel ve arşivlenmiş sonuç dosyalarının yollarını döndürür."""
+    for directory in (ARCHIVE_DIR, RESULTS_JSON_DIR):
+        if os.path.exists(directory):
+            for file in sorted(os.listdir(directory)):
+                yield os.path.join(directory, file)
+
+
+def sync_result_files(force=False):
+    """İndekste olmayan veya değişmiş sonuç dosyalarını (arşivdekiler dahil) indekse aktarır."""
+    conn = get_connection()
+    known = {row["path"]: row["mtime"] for row in conn.execute("SELECT path, mtime FROM indexed_files")}
+    indexed_count = 0
+
+    for json_file in _result_files():
+        run_id = run_id_from_filename(json_file)
+        if run_id is None:
+            continue
+
+        mtime = os.path.getmtime(json_file)
+        if not force and known.get(json_file) == mtime:
+            continue
+
+        created_at = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S")
+        rows = []
+        for item in iter_result_items(json_file):
+            program_name = item.get("program_name", "Bilinmeyen Program")
+            analysis = item.get("analysis", "")
+            # Çalıştırma sırasında kaydedilen skor/karar varsa metinden yeniden çıkarma
+            rows.append(
+                (
+                    run_id,
+                    program_name,
+                    extract_call_number(program_name),
+                    item["score"] if "score" in item else extract_score_from_response(analysis),
+                    item["verdict"] if "verdict" in item else extract_verdict_from_response(analysis),
+                    analysis,
+                    created_at,
+                )
+            )
+
+        with conn:
+            conn.execute("DELETE FROM results WHERE run_id = ?", (run_id,))
+            conn.executemany(
+                "INSERT INTO results (run_id, program_name, call_number, score, verdict, analysis, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("INSERT OR REPLACE INTO indexed_files (path, mtime) VALUES (?, ?)", (json_file, mtime))
+        indexed_count += len(rows)
+
+    conn.close()
+    return indexed_count
+
+
+def ensure_index():
+    """İşlem başına bir kez eski sonuç dosyalarını indekse aktarır."""
+    global _index_synced
+
+    if not _index_synced:
+        sync_result_files()
+        _index_synced = True
+
+
+def get_run_result(run_id, program_name):
+    """Çalıştırmada programa yazılan son kaydı döndürür; yoksa None."""
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT program_name, analysis, score, verdict FROM results WHERE run_id = ? AND program_name = ? ORDER BY id DESC LIMIT 1",
+            (run_id, program_name),
+        ).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+
+def query_results(program=None, call_number=None, min_score=None, max_score=None, verdict=None, date_from=None, date_to=None, run_id=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """İndeksten filtrelenmiş ve sayfalanmış sonuçları döndürür.
+
+    Sayfalama imleç tabanlıdır: en yeni kayıttan eskiye doğru gidilir ve
+    bir sonraki sayfa için son kaydın id değeri "next_cursor" olarak döner.
+    """
+    ensure_index()
+
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    conditions = []
+    params = []
+
+    if program:
+        conditions.append("program_name LIKE ?")
+        params.append(f"%{program}%")
+    if call_number:
+        conditions.append("call_number = ?")
+        params.append(str(call_number))
+    if min_score is not None:
+        conditions.append("score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        conditions.append("score <= ?")
+        params.append(max_score)
+    if verdict:
+        conditions.append("verdict = ?")
+        params.append(verdict)
+    if date_from:
+        conditions.append("created_at >= ?")
+        params.append(date_from)
+    if date_to:
+        # Sadece tarih verilmişse günün tamamını kapsa
+        conditions.append("created_at <= ?")
+        params.append(f"{date_to} 23:59:59" if len(date_to) == 10 else date_to)
+    if run_id is not None:
+        conditions.append("run_id = ?")
+        params.append(run_id)
+    if cursor is not None:
+        conditions.append("id < ?")
+        params.append(int(cursor))
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"SELECT id, run_id, program_name, call_number, score, verdict, analysis, created_at FROM results {where} ORDER BY id DESC LIMIT ?"
+
+    conn = get_connection()
+    rows = conn.execute(sql, (*params, limit + 1)).fetchall()
+    conn.close()
+
+    has_more = len(rows) > limit
+    items = [dict(row) for row in rows[:limit]]
+
+    return {
+        "items": items,
+        "count": len(items),
+        "next_cursor": items[-1]["id"] if has_more else None,
+    }
+
+
+def list_indexed_runs():
+    """İndeksteki çalıştırmaları özet bilgileriyle döndürür."""
+    ensure_index()
+
+    conn = get_connection()
+    rows = conn.execute(
+        """
+        SELECT run_id, COUNT(*) AS program_count, AVG(score) AS mean_score,
+               MIN(created_at) AS started_at, MAX(created_at) AS finished_at
+        FROM results GROUP BY run_id ORDER BY run_id DESC
+        """
+    ).fetchall()
+    summaries = {row["run_id"]: json.loads(row["token_summary"]) for row in conn.execute("SELECT run_id, token_summary FROM runs WHERE token_summary IS NOT NULL")}
+    kinds = {row["run_id"]: row["kind"] for row in conn.execute("SELECT run_id, kind FROM runs")}
+    conn.close()
+
+    runs = []
+    for row in rows:
+        run = dict(row)
+        # Kayıt defterinde olmayan eski çalıştırmalar tam çalıştırma sayılır
+        run["kind"] = kinds.get(run["run_id"], "full")
+        summary = summaries.get(run["run_id"])
+        # Token toplamları yalnızca metrik kaydı olan çalıştırmalarda bulunur
+        run["token_usage"] = {k: v for k, v in summary.items() if k != "programs"} if summary else None
+        runs.append(run)
+    return runs
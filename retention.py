@@ -0,0 +1,152 @@
+import gzip
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from results_index import ARCHIVE_DIR, get_connection
+
+# Saklama ayarları: son N çalıştırma ve aktif çağrı çıktısı açık kalır, eskileri arşivlenir
+HOT_RUNS = int(os.getenv("TUBITAK_RETENTION_HOT_RUNS", "10"))
+HOT_ACTIVE_SNAPSHOTS = int(os.getenv("TUBITAK_RETENTION_HOT_SNAPSHOTS", "20"))
+ACTIVE_CALLS_OUTPUT_DIR = "active_calls_analysis_output"
+
+_compact_lock = threading.Lock()
+
+
+def _gzip_file(source, target):
+    """Dosyayı gzip ile sıkıştırır; değişiklik zamanını korur ve kaynağı siler."""
+    with open(source, "rb") as src, gzip.open(f"{target}.tmp", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(f"{target}.tmp", target)
+    mtime = os.path.getmtime(source)
+    os.utime(target, (mtime, mtime))
+    os.remove(source)
+
+
+def _record_archive(conn, original_path, archive_path, kind, run_id, original_size):
+    conn.execute(
+        "INSERT OR REPLACE INTO archives (original_path, archive_path, kind, run_id, original_size, archived_size, archived_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (original_path, archive_path, kind, run_id, original_size, os.path.getsize(archive_path), datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+    )
+
+
+def archive_run(conn, run):
+    """Bir çalıştırmanın HTML ve JSON çıktısını arşive taşır ve kaydını günceller."""
+    paths = {}
+    for column in ("json_file", "html_file"):
+        source = run[column]
+        if not source or not os.path.exists(source) or source.endswith(".gz"):
+            continue
+
+        target = os.path.join(ARCHIVE_DIR, f"{os.path.basename(source)}.gz")
+        original_size = os.path.getsize(source)
+        _gzip_file(source, target)
+        _record_archive(conn, source, target, "run", run["run_id"], original_size)
+        paths[column] = target
+
+        # İndeks, arşivlenen dosyayı değişmiş gibi görüp yeniden taramasın
+        if column == "json_file":
+            conn.execute("DELETE FROM indexed_files WHERE path = ?", (source,))
+            conn.execute("INSERT OR REPLACE INTO indexed_files (path, mtime) VALUES (?, ?)", (target, os.path.getmtime(target)))
+
+    if paths:
+        conn.execute(
+            "UPDATE runs SET json_file = COALESCE(?, json_file), html_file = COALESCE(?, html_file) WHERE run_id = ?",
+            (paths.get("json_file"), paths.get("html_file"), run["run_id"]),
+        )
+    return len(paths)
+
+
+def archive_active_snapshots(conn, keep=HOT_ACTIVE_SNAPSHOTS):
+    """Eski aktif çağrı çıktılarını aylık JSON Lines arşivlerinde toplar.
+
+    Her çıktı, ait olduğu ayın .jsonl.gz dosyasına yeni bir gzip üyesi olarak
+    eklenir; böylece arşiv yeniden yazılmadan büyür ve klasördeki dosya sayısı
+    sınırlı kalır.
+    """
+    if not os.path.exists(ACTIVE_CALLS_OUTPUT_DIR):
+        return 0
+
+    files = sorted(f for f in os.listdir(ACTIVE_CALLS_OUTPUT_DIR) if f.endswith(".json"))
+    archived = 0
+    for file in files[: max(len(files) - keep, 0)]:
+        source = os.path.join(ACTIVE_CALLS_OUTPUT_DIR, file)
+        try:
+            with open(source, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Aktif çağrı çıktısı arşivlenemedi: {source} - {str(e)}")
+            continue
+
+        # active_calls_analysis_YYYYMMDD_HHMMSS.json -> active_calls_analysis_YYYYMM.jsonl.gz
+        month = file[len("active_calls_analysis_") :][:6]
+        target = os.path.join(ARCHIVE_DIR, f"active_calls_analysis_{month}.jsonl.gz")
+        line = json.dumps({"file": file, **snapshot}, ensure_ascii=False) + "\n"
+        with gzip.open(target, "at", encoding="utf-8") as f:
+            f.write(line)
+
+        _record_archive(conn, source, target, "active_snapshot", None, os.path.getsize(source))
+        os.remove(source)
+        archived += 1
+
+    return archived
+
+
+def compact(hot_runs=HOT_RUNS, hot_snapshots=HOT_ACTIVE_SNAPSHOTS):
+    """Saklama politikasını uygular: son çalıştırmalar dışındakileri arşivler."""
+    with _compact_lock:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        conn = get_connection()
+        try:
+            with conn:
+                runs = conn.execute(
+                    "SELECT run_id, json_file, html_file FROM runs WHERE status != 'running' AND json_file NOT LIKE '%.gz' ORDER BY run_id DESC LIMIT -1 OFFSET ?",
+                    (hot_runs,),
+                ).fetchall()
+                archived_files = sum(archive_run(conn, run) for run in runs)
+                archived_snapshots = archive_active_snapshots(conn, hot_snapshots)
+        finally:
+            conn.close()
+
+    if archived_files or archived_snapshots:
+        print(f"🗜️ Arşivlendi: {len(runs)} çalıştırma ({archived_files} dosya), {archived_snapshots} aktif çağrı çıktısı")
+    return {"archived_runs": len(runs), "archived_files": archived_files, "archived_snapshots": archived_snapshots}
+
+
+def read_archived_snapshot(file):
+    """Arşivlenmiş bir aktif çağrı çıktısını dosya adıyla okur; yoksa None."""
+    conn = get_connection()
+    row = conn.execute("SELECT archive_path FROM archives WHERE original_path = ?", (os.path.join(ACTIVE_CALLS_OUTPUT_DIR, file),)).fetchone()
+    conn.close()
+    if not row or not os.path.exists(row["archive_path"]):
+        return None
+
+    with gzip.open(row["archive_path"], "rt", encoding="utf-8") as f:
+        for line in f:
+            snapshot = json.loads(line)
+            if snapshot.pop("file", None) == file:
+                return snapshot
+    return None
+
+
+def get_retention_status():
+    """Açık ve arşivlenmiş çıktıların sayısını ve disk kullanımını döndürür."""
+    conn = get_connection()
+    archive_rows = conn.execute(
+        "SELECT kind, COUNT(*) AS count, SUM(original_size) AS original_bytes FROM archives GROUP BY kind"
+    ).fetchall()
+    hot_runs = conn.execute("SELECT COUNT(*) FROM runs WHERE json_file NOT LIKE '%.gz'").fetchone()[0]
+    conn.close()
+
+    archive_bytes = 0
+    if os.path.exists(ARCHIVE_DIR):
+        archive_bytes = sum(entry.stat().st_size for entry in os.scandir(ARCHIVE_DIR) if entry.is_file())
+
+    return {
+        "hot_runs": hot_runs,
+        "hot_runs_limit": HOT_RUNS,
+        "hot_snapshots_limit": HOT_ACTIVE_SNAPSHOTS,
+        "archived": {row["kind"]: {"count": row["count"], "original_bytes": row["original_bytes"]} for row in archive_rows},
+        "archive_bytes": archive_bytes,
+    }
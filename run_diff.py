@@ -0,0 +1,164 @@
+from results_index import ensure_index, extract_call_number, get_connection
+from run_registry import RUN_KIND_SELECTED
+
+# Fark hesaplama ayarları
+DIFF_CHUNK_SIZE = 500
+# Bu eşiğin altındaki skor farkları değişiklik sayılmaz (kayan nokta gürültüsü)
+SCORE_EPSILON = 1e-9
+
+CHANGE_ADDED = "added"
+CHANGE_REMOVED = "removed"
+CHANGE_CHANGED = "changed"
+CHANGE_UNCHANGED = "unchanged"
+
+
+def _iter_run_rows(run_id, chunk_size=DIFF_CHUNK_SIZE):
+    """Çalıştırmanın sonuçlarını program adına göre sıralı ve parça parça okur.
+
+    Aynı program çalıştırmada birden fazla kez yazıldıysa son kayıt alınır.
+    Her parça kendi bağlantısıyla okunur; böylece akış farklı iş
+    parçacıklarında sürdürülebilir ve bellekte yalnızca bir parça tutulur.
+    """
+    last_name = ""
+    while True:
+        conn = get_connection()
+        try:
+            # MAX(id) ile seçilen satırın skor ve sonucu döner (SQLite yalın sütun kuralı)
+            rows = conn.execute(
+                """
+                SELECT program_name, score, verdict, MAX(id) AS id FROM results
+                WHERE run_id = ? AND program_name > ? GROUP BY program_name ORDER BY program_name LIMIT ?
+                """,
+                (run_id, last_name, chunk_size),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        for row in rows:
+            yield row["program_name"], row["score"], row["verdict"]
+        if len(rows) < chunk_size:
+            return
+        last_name = rows[-1]["program_name"]
+
+
+def run_exists(run_id):
+    """Çalıştırmanın indekste en az bir sonucu varsa True döner."""
+    ensure_index()
+    conn = get_connection()
+    row = conn.execute("SELECT 1 FROM results WHERE run_id = ? LIMIT 1", (run_id,)).fetchone()
+    conn.close()
+    return row is not None
+
+
+def latest_run_pair():
+    """İndeksteki son iki tam çalıştırmayı (eski, yeni) olarak döndürür; yoksa None.
+
+    Seçimli çalıştırmalar kataloğun yalnızca bir kısmını içerdiği için
+    varsayılan karşılaştırmaya alınmaz; aksi halde diğer tüm programlar
+    "çıkarıldı" görünürdü.
+    """
+    ensure_index()
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT DISTINCT run_id FROM results WHERE run_id NOT IN (SELECT run_id FROM runs WHERE kind = ?) ORDER BY run_id DESC LIMIT 2",
+        (RUN_KIND_SELECTED,),
+    ).fetchall()
+    conn.close()
+    return (rows[1]["run_id"], rows[0]["run_id"]) if len(rows) == 2 else None
+
+
+def _diff_entry(program_name, old, new):
+    entry = {"program_name": program_name, "call_number": extract_call_number(program_name)}
+    if old is None:
+        return {**entry, "change": CHANGE_ADDED, "score_a": None, "score_b": new[0], "delta": None, "verdict_a": None, "verdict_b": new[1], "verdict_flip": False}
+    if new is None:
+        return {**entry, "change": CHANGE_REMOVED, "score_a": old[0], "score_b": None, "delta": None, "verdict_a": old[1], "verdict_b": None, "verdict_flip": False}
+
+    delta = round(new[0] - old[0], 4) if old[0] is not None and new[0] is not None else None
+    verdict_flip = old[1] != new[1]
+    changed = verdict_flip or (old[0] is None) != (new[0] is None) or (delta is not None and abs(delta) > SCORE_EPSILON)
+    return {
+        **entry,
+        "change": CHANGE_CHANGED if changed else CHANGE_UNCHANGED,
+        "score_a": old[0],
+        "score_b": new[0],
+        "delta": delta,
+        "verdict_a": old[1],
+        "verdict_b": new[1],
+        "verdict_flip": verdict_flip,
+    }
+
+
+def iter_run_diff(run_a, run_b, include_unchanged=False, chunk_size=DIFF_CHUNK_SIZE):
+    """İki çalıştırma arasındaki program bazında farkları akış olarak döndürür.
+
+    İki çalıştırmanın sonuçları indeksten program adına göre sıralı okunup
+    birleştirilir (merge join); sonuç dosyaları açılmaz ve bellekte her
+    çalıştırmadan yalnızca bir parça tutulur.
+    """
+    ensure_index()
+    old_rows = _iter_run_rows(run_a, chunk_size)
+    new_rows = _iter_run_rows(run_b, chunk_size)
+    old = next(old_rows, None)
+    new = next(new_rows, None)
+
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            entry = _diff_entry(old[0], old[1:], None)
+            old = next(old_rows, None)
+        elif old is None or new[0] < old[0]:
+            entry = _diff_entry(new[0], None, new[1:])
+            new = next(new_rows, None)
+        else:
+            entry = _diff_entry(old[0], old[1:], new[1:])
+            old = next(old_rows, None)
+            new = next(new_rows, None)
+
+        if include_unchanged or entry["change"] != CHANGE_UNCHANGED:
+            yield entry
+
+
+class DiffSummary:
+    """Akıştan geçen fark kayıtlarını sayar; kayıtları saklamaz."""
+
+    def __init__(self, run_a, run_b):
+        self.run_a = run_a
+        self.run_b = run_b
+        self.counts = {CHANGE_ADDED: 0, CHANGE_REMOVED: 0, CHANGE_CHANGED: 0, CHANGE_UNCHANGED: 0}
+        self.verdict_flips = 0
+        self.improved = 0
+        self.worsened = 0
+        self.delta_total = 0.0
+        self.delta_count = 0
+
+    def add(self, entry):
+        self.counts[entry["change"]] += 1
+        if entry["verdict_flip"]:
+            self.verdict_flips += 1
+        delta = entry["delta"]
+        if delta is not None:
+            self.delta_total += delta
+            self.delta_count += 1
+            if delta > SCORE_EPSILON:
+                self.improved += 1
+            elif delta < -SCORE_EPSILON:
+                self.worsened += 1
+
+    def to_dict(self):
+        return {
+            "run_a": self.run_a,
+            "run_b": self.run_b,
+            **self.counts,
+            "verdict_flips": self.verdict_flips,
+            "improved": self.improved,
+            "worsened": self.worsened,
+            "mean_delta": round(self.delta_total / self.delta_count, 4) if self.delta_count else None,
+        }
+
+
+def summarize_run_diff(run_a, run_b):
+    """İki çalıştırma arasındaki farkın özetini döndürür."""
+    summary = DiffSummary(run_a, run_b)
+    for entry in iter_run_diff(run_a, run_b, include_unchanged=True):
+        summary.add(entry)
+    return summary.to_dict()
@@ -0,0 +1,152 @@
+import os
+import threading
+from datetime import datetime
+
+# Token bütçesi ayarları (0 = sınırsız)
+TOKEN_BUDGET = int(os.getenv("TUBITAK_TOKEN_BUDGET", "0"))
+
+# İlk çağrılardan önce kullanılan tahmin: sistem prompt'u + topN=4 bağlam parçası
+BASE_PROMPT_TOKENS = 1500
+
+BUDGET_SKIPPED = {"budget_skipped": True}
+
+_current_run = None
+_last_summary = None
+_runs_lock = threading.Lock()
+
+
+class RunMetrics:
+    """Bir çalıştırmanın token, süre ve hız ölçümlerini program bazında toplar.
+
+    Bütçe tanımlıysa her çağrı öncesi tahmini token ayrılır (reserve) ve çağrı
+    bitince gerçek değerle değiştirilir (settle); böylece eşzamanlı çağrılar
+    toplamda bütçeyi aşamaz.
+    """
+
+    def __init__(self, run_id, token_budget=TOKEN_BUDGET):
+        self.run_id = run_id
+        self.token_budget = token_budget
+        self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.finished_at = None
+        self.programs = {}
+        self.totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "duration": 0.0}
+        self.reserved = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+
+    def estimate_call_tokens(self, text=""):
+        """Bir çağrının token maliyetini tahmin eder; ölçüm varsa ortalamayı kullanır."""
+        with self.lock:
+            if self.totals["calls"]:
+                return self.totals["total_tokens"] // self.totals["calls"]
+        return BASE_PROMPT_TOKENS + len(text or "") // 4
+
+    def reserve(self, estimate):
+        """Bütçede yer varsa tahmini tokenı ayırır; yoksa False döner."""
+        with self.lock:
+            if self.token_budget and self.totals["total_tokens"] + self.reserved + estimate > self.token_budget:
+                self.skipped += 1
+                return False
+            self.reserved += estimate
+            return True
+
+    def settle(self, estimate, entries):
+        """Ayrılan tahmini bırakır ve (program adı, metrik) çiftlerini ekler."""
+        with self.lock:
+            self.reserved -= estimate
+            for program_name, metrics in entries:
+                if metrics:
+                    self._add(program_name, metrics)
+
+    def _add(self, program_name, metrics):
+        entry = self.programs.setdefault(program_name, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "duration": 0.0})
+        prompt_tokens = int(metrics.get("prompt_tokens") or 0)
+        completion_tokens = int(metrics.get("completion_tokens") or 0)
+        values = {
+            "calls": 1,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": int(metrics.get("total_tokens") or prompt_tokens + completion_tokens),
+            "duration": float(metrics.get("duration") or 0.0),
+        }
+        for key, value in values.items():
+            entry[key] += value
+            self.totals[key] += value
+
+    def summary(self, include_programs=False):
+        """Toplamları ve token/saniye değerini döndürür."""
+        with self.lock:
+            totals = dict(self.totals)
+            duration = totals["duration"]
+            summary = {
+                "run_id": self.run_id,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                **totals,
+                "duration": round(duration, 3),
+                "tokens_per_second": round(totals["completion_tokens"] / duration, 2) if duration else None,
+                "token_budget": self.token_budget or None,
+                "budget_skipped": self.skipped,
+            }
+            if include_programs:
+                summary["programs"] = {
+                    name: {**values, "duration": round(values["duration"], 3), "tokens_per_second": round(values["completion_tokens"] / values["duration"], 2) if values["duration"] else None}
+                    for name, values in self.programs.items()
+                }
+        return summary
+
+
+def start_run(run_id, token_budget=TOKEN_BUDGET):
+    """Yeni bir çalıştırma için ölçümü başlatır."""
+    global _current_run
+
+    with _runs_lock:
+        _current_run = RunMetrics(run_id, token_budget)
+        return _current_run
+
+
+def finish_run(run):
+    """Çalıştırmayı kapatır ve özetini son çalıştırma olarak saklar."""
+    global _current_run, _last_summary
+
+    run.finished_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    summary = run.summary(include_programs=True)
+    with _runs_lock:
+        _last_summary = summary
+        if _current_run is run:
+            _current_run = None
+    return summary
+
+
+def get_metrics_status():
+    """Durum API'si için devam eden ve son çalıştırmanın token toplamlarını döndürür."""
+    with _runs_lock:
+        current = _current_run
+        last = _last_summary
+    return {
+        "current_run": current.summary() if current else None,
+        "last_run": {k: v for k, v in last.items() if k != "programs"} if last else None,
+    }
+
+
+def call_with_budget(run, program_names, estimate, fn, *args, **kwargs):
+    """fn çağrısını bütçe kontrolüyle çalıştırır ve dönen metrikleri kaydeder.
+
+    Bütçe yetmiyorsa çağrı yapılmaz ve BUDGET_SKIPPED döner. Tekli çağrıda
+    program_names bir ad, toplu analizde fn'in döndürdüğü sonuç listesiyle
+    aynı sırada ad listesidir.
+    """
+    if not run.reserve(estimate):
+        print(f"💰 Token bütçesi doldu, atlanıyor: {program_names}")
+        return BUDGET_SKIPPED
+
+    result = None
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        if isinstance(program_names, list):
+            entries = zip(program_names, result or [])
+        else:
+            entries = [(program_names, result)]
+        run.settle(estimate, [(name, r.get("metrics")) for name, r in entries if r])
+    return result
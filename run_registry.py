@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from file_manager import RESULTS_HTML_DIR, RESULTS_JSON_DIR, get_run_filenames
+from results_index import get_connection, run_id_from_filename
+
+# Çalıştırma kayıt defteri ayarları
+DEFAULT_RUN_LIST_LIMIT = 20
+
+# Çalıştırma türleri: seçimli çalıştırmalar kataloğun yalnızca bir kısmını içerir
+RUN_KIND_FULL = "full"
+RUN_KIND_SELECTED = "selected"
+
+
+def config_hash(config):
+    """Çalıştırma ayarlarının kısa özetini döndürür; aynı ayarlar aynı özeti verir."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def _seed_legacy_runs(conn):
+    """Kayıt defteri boşsa, numaralı eski sonuç dosyalarını bir kereliğine kaydeder.
+
+    Böylece yeni numaralar mevcut dosyaların üzerine yazmadan devam eder.
+    """
+    if conn.execute("SELECT 1 FROM runs LIMIT 1").fetchone() or not os.path.exists(RESULTS_JSON_DIR):
+        return
+
+    for file in os.listdir(RESULTS_JSON_DIR):
+        run_id = run_id_from_filename(file)
+        if run_id is None:
+            continue
+        html_file, json_file = os.path.join(RESULTS_HTML_DIR, f"ai_analyse_results{run_id}.html"), os.path.join(RESULTS_JSON_DIR, file)
+        finished_at = datetime.fromtimestamp(os.path.getmtime(json_file)).strftime("%Y-%m-%d %H:%M:%S")
+        conn.execute(
+            "INSERT OR IGNORE INTO runs (run_id, status, finished_at, html_file, json_file) VALUES (?, 'legacy', ?, ?, ?)",
+            (run_id, finished_at, html_file, json_file),
+        )
+
+
+def allocate_run(workspace=None, config=None, kind=RUN_KIND_FULL):
+    """Yeni bir çalıştırma numarasını atomik olarak ayırır ve çıktı yollarıyla döndürür.
+
+    Aynı anda başlayan iki çalıştırma hiçbir zaman aynı numarayı almaz.
+    """
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        _seed_legacy_runs(conn)
+        cursor = conn.execute(
+            "INSERT INTO runs (status, started_at, workspace, config_hash, kind) VALUES ('running', ?, ?, ?, ?)",
+            (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), workspace, config_hash(config) if config is not None else None, kind),
+        )
+        run_id = cursor.lastrowid
+        html_file, json_file = get_run_filenames(run_id)
+        conn.execute("UPDATE runs SET html_file = ?, json_file = ? WHERE run_id = ?", (html_file, json_file, run_id))
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return run_id, html_file, json_file
+
+
+def finish_run(run_id, program_count, token_summary=None, status="completed"):
+    """Çalıştırmayı bitmiş olarak işaretler ve özet bilgilerini kaydeder."""
+    try:
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                "UPDATE runs SET status = ?, finished_at = ?, program_count = ?, token_summary = ? WHERE run_id = ?",
+                (
+                    status,
+                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    program_count,
+                    json.dumps(token_summary, ensure_ascii=False) if token_summary is not None else None,
+                    run_id,
+                ),
+            )
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Çalıştırma kaydı güncellenemedi: {run_id} - {str(e)}")
+
+
+def _row_to_run(row):
+    run = dict(row)
+    run["token_summary"] = json.loads(run["token_summary"]) if run["token_summary"] else None
+    return run
+
+
+def get_run(run_id):
+    """Tek bir çalıştırmanın kaydını döndürür; yoksa None."""
+    conn = get_connection()
+    with conn:
+        _seed_legacy_runs(conn)
+    row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    profiles = conn.execute("SELECT id, summary FROM profiles WHERE run_id = ? ORDER BY id", (run_id,)).fetchall()
+    conn.close()
+    if not row:
+        return None
+
+    # Profil modunda yapılan çalıştırmaların aşama süreleri ve çıktı dosyaları
+    run = _row_to_run(row)
+    run["profiles"] = [{"id": p["id"], **json.loads(p["summary"])} for p in profiles]
+    return run
+
+
+def list_runs(limit=DEFAULT_RUN_LIST_LIMIT, kind=None):
+    """En yeni çalıştırmaları birincil anahtar üzerinden, program detayları olmadan döndürür; kind verilirse yalnızca o türden."""
+    conn = get_connection()
+    # Yeni kurulumdan önceki sonuç dosyaları ilk çalıştırmayı beklemeden listelenir
+    with conn:
+        _seed_legacy_runs(conn)
+    if kind:
+        rows = conn.execute("SELECT * FROM runs WHERE kind = ? ORDER BY run_id DESC LIMIT ?", (kind, limit)).fetchall()
+    else:
+        rows = conn.execute("SELECT * FROM runs ORDER BY run_id DESC LIMIT ?", (limit,)).fetchall()
+    conn.close()
+
+    runs = []
+    for row in rows:
+        run = _row_to_run(row)
+        if run["token_summary"]:
+            run["token_summary"].pop("programs", None)
+        runs.append(run)
+    return runs
@@ -3,64 +3,79 @@ import time
 import json
 import os
 from datetime import datetime
-from active_calls_manager import scrape_active_calls
-from ai_analyzer import send_program_to_anythingllm, extract_score_from_response, update_final_mean_file
-from workspace_manager import create_new_workspace
-from file_manager import get_next_html_filename, get_next_json_filename
-from output_manager import init_html, close_html, append_to_html
+from active_calls_manager import scrape_active_calls, get_call_details
+from ai_analyzer import update_final_mean_file
+from response_parser import parse_response
+from active_call_changes import CHANGE_CLOSED, CHANGE_OPENED, get_pending_calls, mark_calls_analyzed, record_active_calls, record_failed_attempts
+from warm_worker import get_warm_state
+from retention import ACTIVE_CALLS_OUTPUT_DIR, compact
+from score_history import flush_scores
+from work_queue import preempt_active_calls
+from profiler import profile_run, stage
+import event_log
 
 
 def load_final_ai_results():
-    """FINAL_ai_results_mean.json dosyasını yükler."""
-    try:
-        with open("FINAL_ai_results_mean.json", "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
-
+    """FINAL_ai_results_mean.json içeriğini döndürür; dosya değişmediyse bellekten gelir."""
+    return get_warm_state().score_store()
 
-def extract_call_number(program_name):
-    """Program adından çağrı numarasını çıkarır."""
-    import re
 
-    # "1707 - Sipariş Ar-Ge..." veya "1831 Yeşil İnovasyon..." formatından sayı çıkar
-    # Önce "-" ile başlayan formatı dene
-    match = re.match(r"^(\d+)\s*-", program_name)
-    if match:
-        return match.group(1)
+def find_matching_program_in_rag_data(active_call_name):
+    """Aktif çağrı adını tubitak_rag_data.json'daki programlarla eşleştirir."""
+    # Eşleşmeler, katalog ve skor dosyası değişene kadar bellekte tutulur
+    return get_warm_state().match(active_call_name)[0]
 
-    # Sonra sadece sayı ile başlayan formatı dene
-    match = re.match(r"^(\d+)\s+", program_name)
-    if match:
-        return match.group(1)
 
+def find_program_average(program_name, final_ai_data):
+    """Program adına göre ortalama değeri bulur."""
+    if program_name in final_ai_data:
+        return final_ai_data[program_name].get("mean", None)
     return None
 
 
-def find_matching_program_in_rag_data(active_call_name, rag_data):
-    """Aktif çağrı adını tubitak_rag_data.json'daki programlarla eşleştirir."""
-    call_number = extract_call_number(active_call_name)
+def analyze_opened_calls(opened_calls):
+    """Yeni açılan çağrıların başvuru koşullarını çekip LLM ile analiz eder.
 
-    if not call_number:
-        return None
+    (LLM'den yanıt alınan, analiz edilemeyen) çağrı adreslerini döndürür;
+    analiz edilemeyenler deneme sınırına kadar sonraki çalıştırmalarda
+    yeniden denenir. Workspace hazırlanamazsa deneme sayılmaz.
+    """
+    from backend_pool import get_backend_pool, send_program_with_pool
 
-    # tubitak_rag_data.json'daki programları ara
-    for program in rag_data.get("programs", []):
-        program_name = program.get("program_name", "")
-        if call_number in program_name:
-            return program_name
+    pool = get_backend_pool()
+    if not any(backend["workspace_slug"] for backend in pool.get_status()) and not pool.provision_workspaces():
+        print("⚠️ Workspace oluşturulamadı, yeni çağrılar analiz edilmedi.")
+        return [], []
 
-    return None
+    analyzed, failed = [], []
+    for index, call in enumerate(opened_calls, 1):
+        applicant_requirements = get_call_details(call["url"])
+        if not applicant_requirements:
+            event_log.item("active_calls.no_requirements", f"[{index}] Başvuru koşulları bulunamadı: {call['name']}", level="WARNING", index=index, active_call=call["name"], url=call["url"])
+            failed.append(call["url"])
+            continue
 
+        result = send_program_with_pool(call["name"], applicant_requirements, index, pool=pool)
+        if not result:
+            failed.append(call["url"])
+            continue
+        analyzed.append(call["url"])
 
-def find_program_average(program_name, final_ai_data):
-    """Program adına göre ortalama değeri bulur."""
-    if program_name in final_ai_data:
-        return final_ai_data[program_name].get("mean", None)
-    return None
+        with stage("parse.response"):
+            score = parse_response((result.get("response") or "").replace("\\n", "\n"))["score"]
+        if score is not None:
+            # Ortalama, eşleşen program adıyla tutulur; böylece aşağıdaki listede görünür
+            update_final_mean_file(find_matching_program_in_rag_data(call["name"]) or call["name"], score)
+    return analyzed, failed
 
 
 def analyze_active_calls():
+    """Aktif çağrıları analiz eder; profil modu açıksa çalıştırma profillenir."""
+    with profile_run("active_calls"):
+        return run_active_calls_analysis()
+
+
+def run_active_calls_analysis():
     """Aktif çağrıları analiz eder ve ortalama değerlerini listeler."""
     print(f"\n🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Aktif çağrılar analiz ediliyor...")
     print("=" * 80)
@@ -71,22 +86,46 @@ def analyze_active_calls():
 
     active_calls = get_active_calls()
 
-    if not active_calls:
-        print("❌ Aktif çağrı bulunamadı!")
+    if active_calls is None:
+        print("❌ Aktif çağrılar çekilemedi!")
         return
 
-    # 2. tubitak_rag_data.json dosyasını yükle
-    print("📊 TÜBİTAK veri dosyası yükleniyor...")
-    try:
-        with open("tubitak_rag_data.json", "r", encoding="utf-8") as f:
-            rag_data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    # Son bilinen kümeyle karşılaştır; yalnızca farklar kaydedilir. Boş liste
+    # tüm çağrıların kapandığını gösterir ve kapanışlar da kaydedilir.
+    changes = record_active_calls(active_calls)
+    pending_calls = get_pending_calls()
+    if not changes and not pending_calls:
+        print("🟰 Aktif çağrılarda değişiklik yok, analiz atlanıyor.")
+        return
+
+    change_icons = {"opened": "🆕", "closed": "🔒", "renamed": "✏️"}
+    for change in changes:
+        previous = f" (önceki: {change['previous_name']})" if change["previous_name"] else ""
+        print(f"   {change_icons[change['change_type']]} {change['name']}{previous}")
+    opened_calls = [c for c in changes if c["change_type"] == CHANGE_OPENED]
+
+    # Sürmekte olan tam analizde bu çağrılara ait bekleyen işler öne alınır
+    if opened_calls:
+        preempt_active_calls(opened_calls)
+
+    # 2. Program kataloğunu al (dosya değişmediyse yeniden okunmaz)
+    print("📊 TÜBİTAK program kataloğu hazırlanıyor...")
+    if get_warm_state().catalogue() is None:
         print("❌ tubitak_rag_data.json dosyası bulunamadı!")
         print("📋 Sadece aktif çağrı listesi:")
         for call in active_calls:
             print(f"   - {call['name']}")
         return
 
+    # Yeni açılan ve önceki denemelerde analiz edilemeyen çağrılar; başarılı olanların işareti kaldırılır
+    if pending_calls:
+        print(f"🤖 {len(pending_calls)} yeni çağrı analiz ediliyor...")
+        analyzed, failed = analyze_opened_calls(pending_calls)
+        mark_calls_analyzed(analyzed)
+        for call in record_failed_attempts(failed):
+            event_log.warning("active_calls.gave_up", f"⛔ {call['attempts']} denemede analiz edilemedi, bekleyenlerden çıkarıldı: {call['name']}", active_call=call["name"], url=call["url"])
+        flush_scores()
+
     # 3. FINAL_ai_results_mean.json dosyasını yükle
     print("📊 Ortalama değerler yükleniyor...")
     final_ai_data = load_final_ai_results()
@@ -108,7 +147,8 @@ def analyze_active_calls():
         active_call_name = call.get("name", "Bilinmeyen Program")
 
         # Aktif çağrıyı tubitak_rag_data.json'daki programlarla eşleştir
-        matched_program_name = find_matching_program_in_rag_data(active_call_name, rag_data)
+        with stage("active_calls.match"):
+            matched_program_name = find_matching_program_in_rag_data(active_call_name)
 
         if matched_program_name:
             # Eşleşen program için ortalama değeri bul
@@ -129,12 +169,10 @@ def analyze_active_calls():
         }
         results.append(result)
 
-        # Konsol çıktısı
-        print(f"📞 {active_call_name}")
-        print(f"   {match_status}")
-
+        # Konsol çıktısı (tek kayıt olarak arka planda yazılır)
+        lines = [f"📞 {active_call_name}", f"   {match_status}"]
         if matched_program_name:
-            print(f"   Eşleşen Program: {matched_program_name}")
+            lines.append(f"   Eşleşen Program: {matched_program_name}")
 
             if average_score is None:
                 score_emoji = "⚪"
@@ -143,27 +181,38 @@ def analyze_active_calls():
                 score_emoji = "🟢" if average_score >= 0.7 else "🟡" if average_score >= 0.4 else "🔴"
                 score_text = f"{average_score:.3f}"
 
-            print(f"   {score_emoji} Ortalama Skor: {score_text}")
+            lines.append(f"   {score_emoji} Ortalama Skor: {score_text}")
         else:
-            print(f"   ⚪ Ortalama Skor: Eşleşme bulunamadı")
+            lines.append(f"   ⚪ Ortalama Skor: Eşleşme bulunamadı")
 
-        print()
+        event_log.item("active_calls.match", "\n".join(lines) + "\n", active_call=active_call_name, matched_program=matched_program_name, average_score=average_score)
 
     # 4. Sonuçları JSON dosyasına kaydet
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
     # Klasörü oluştur
-    output_dir = "active_calls_analysis_output"
+    output_dir = ACTIVE_CALLS_OUTPUT_DIR
     os.makedirs(output_dir, exist_ok=True)
 
     output_file = os.path.join(output_dir, f"active_calls_analysis_{timestamp}.json")
 
-    analysis_data = {"analysis_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "total_active_calls": len(active_calls), "results": results}
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(analysis_data, f, ensure_ascii=False, indent=2)
-
-    print(f"💾 Analiz sonuçları '{output_file}' dosyasına kaydedildi.")
+    # Yalnızca fark yazılır: değişiklikler ve açılan/yeniden adlandırılan çağrıların eşleşmeleri
+    changed_names = {change["name"] for change in changes if change["change_type"] != CHANGE_CLOSED}
+    analysis_data = {
+        "analysis_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "total_active_calls": len(active_calls),
+        "changes": changes,
+        "results": [r for r in results if r["active_call_name"] in changed_names],
+    }
+
+    # Yalnızca bekleyen çağrılar yeniden denendiyse yazılacak fark yoktur
+    if changes:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(analysis_data, f, ensure_ascii=False)
+        print(f"💾 Analiz sonuçları '{output_file}' dosyasına kaydedildi.")
+
+    # Eski çıktıları aylık arşivlere taşı
+    compact()
 
     # 5. Özet istatistikler
     matched_calls = [r for r in results if r["match_status"] == "✅ Eşleşti"]
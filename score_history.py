@@ -0,0 +1,330 @@
+import atexit
+import json
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+from file_lock import file_lock
+
+# Skor geçmişi ayarları
+HISTORY_FILE = "score_history.npz"
+FINAL_MEAN_FILE = "FINAL_ai_results_mean.json"
+
+# Program başına tutulan en fazla skor sayısı; daha eskileri pencereden düşer
+HISTORY_CAPACITY = 256
+
+TREND_WINDOW = 3
+TREND_THRESHOLD = 0.1
+PERCENTILES = (25, 75, 90)
+
+TREND_UP = "yükseliyor"
+TREND_DOWN = "düşüyor"
+# API'de kabul edilen yön adları
+TREND_DIRECTIONS = {"up": TREND_UP, "down": TREND_DOWN}
+
+# Bu kadar skor biriktiğinde çalıştırma bitmeden de dosyaya yazılır
+FLUSH_EVERY = 100
+
+_history = None
+_history_mtime = None
+_history_lock = threading.Lock()
+# Henüz dosyaya yazılmamış (program, skor, zaman damgası) kayıtları
+_pending = []
+
+
+class ScoreHistory:
+    """Program başına skor ve zaman damgalarını sütunlu NumPy dizilerinde tutar.
+
+    Her program bir satırdır; satırdaki ilk counts[i] hücre kronolojik sıradadır,
+    geri kalanı NaN'dır. Kapasite dolunca en eski skor pencereden düşer, böylece
+    bellek ve hesaplama maliyeti çalıştırma sayısından bağımsız kalır.
+    """
+
+    def __init__(self, capacity=HISTORY_CAPACITY):
+        self.capacity = capacity
+        self.names = []
+        self.rows = {}
+        self.scores = np.full((0, capacity), np.nan, dtype=np.float32)
+        self.timestamps = np.full((0, capacity), np.nan, dtype=np.float64)
+        self.counts = np.zeros(0, dtype=np.int32)
+        self.totals = np.zeros(0, dtype=np.int64)
+
+    def _row_for(self, program_name):
+        """Program satırını döndürür; yoksa yeni satır açar."""
+        row = self.rows.get(program_name)
+        if row is not None:
+            return row
+
+        row = len(self.names)
+        if row >= self.scores.shape[0]:
+            # Satır kapasitesini ikiye katlayarak büyüt
+            grow = max(16, self.scores.shape[0])
+            self.scores = np.vstack([self.scores, np.full((grow, self.capacity), np.nan, dtype=np.float32)])
+            self.timestamps = np.vstack([self.timestamps, np.full((grow, self.capacity), np.nan, dtype=np.float64)])
+            self.counts = np.concatenate([self.counts, np.zeros(grow, dtype=np.int32)])
+            self.totals = np.concatenate([self.totals, np.zeros(grow, dtype=np.int64)])
+
+        self.names.append(program_name)
+        self.rows[program_name] = row
+        return row
+
+    def append(self, program_name, score, timestamp=None):
+        """Programın geçmişine yeni bir skor ekler."""
+        row = self._row_for(program_name)
+        n = self.counts[row]
+        if n >= self.capacity:
+            # Pencere dolu: en eski skoru at ve sola kaydır
+            self.scores[row, :-1] = self.scores[row, 1:]
+            self.timestamps[row, :-1] = self.timestamps[row, 1:]
+            n = self.capacity - 1
+
+        self.scores[row, n] = score
+        self.timestamps[row, n] = time.time() if timestamp is None else timestamp
+        self.counts[row] = n + 1
+        self.totals[row] += 1
+
+    def _active(self):
+        """Kullanılan satırları (skor matrisi, sayılar) olarak döndürür."""
+        size = len(self.names)
+        return self.scores[:size], self.timestamps[:size], self.counts[:size]
+
+    def statistics(self):
+        """Tüm programlar için istatistikleri tek vektörel geçişte hesaplar."""
+        scores, timestamps, counts = self._active()
+        if not self.names:
+            return []
+
+        with warnings.catch_warnings():
+            # Hiç skoru olmayan satırlar için "Mean of empty slice" uyarısını bastır
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            mean = np.nanmean(scores, axis=1)
+            median = np.nanmedian(scores, axis=1)
+            std = np.nanstd(scores, axis=1)
+            percentiles = np.nanpercentile(scores, PERCENTILES, axis=1)
+            last_updated = np.nanmax(timestamps, axis=1)
+
+        last_index = np.maximum(counts - 1, 0)
+        last_score = scores[np.arange(len(counts)), last_index]
+        drift, slope = self._drift(scores, counts, TREND_WINDOW)
+
+        stats = []
+        for i, name in enumerate(self.names):
+            if counts[i] == 0:
+                continue
+            stats.append(
+                {
+                    "program_name": name,
+                    "count": int(counts[i]),
+                    "total_count": int(self.totals[i]),
+                    "mean": _round(mean[i]),
+                    "median": _round(median[i]),
+                    "std": _round(std[i]),
+                    "percentiles": {f"p{p}": _round(percentiles[j, i]) for j, p in enumerate(PERCENTILES)},
+                    "last_score": _round(last_score[i]),
+                    "drift": _round(drift[i]),
+                    "slope": _round(slope[i]),
+                    "last_updated": None if np.isnan(last_updated[i]) else time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_updated[i])),
+                }
+            )
+        return stats
+
+    def _drift(self, scores, counts, window):
+        """Son pencere ile bir önceki pencerenin ortalama farkını ve eğimi hesaplar.
+
+        Pencere boyu her program için min(window, count // 2) olarak seçilir;
+        en az iki skoru olmayan programlarda sonuç NaN'dır.
+        """
+        rows = np.arange(len(counts))[:, None]
+        k = np.minimum(window, counts // 2)[:, None]
+        j = np.arange(window)[None, :]
+        valid = j < k
+
+        recent_idx = np.clip(counts[:, None] - k + j, 0, self.capacity - 1)
+        previous_idx = np.clip(counts[:, None] - 2 * k + j, 0, self.capacity - 1)
+        recent = np.where(valid, scores[rows, recent_idx], np.nan)
+        previous = np.where(valid, scores[rows, previous_idx], np.nan)
+
+        # Son 2k skor üzerinde en küçük kareler eğimi (çalıştırma başına değişim)
+        span = 2 * window
+        m = np.arange(span)[None, :]
+        points = 2 * k
+        in_span = m < points
+        span_idx = np.clip(counts[:, None] - points + m, 0, self.capacity - 1)
+        y = np.where(in_span, scores[rows, span_idx], np.nan)
+        x = np.where(in_span, m, np.nan).astype(np.float64)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            drift = np.nanmean(recent, axis=1) - np.nanmean(previous, axis=1)
+            x_centered = x - np.nanmean(x, axis=1, keepdims=True)
+            y_centered = y - np.nanmean(y, axis=1, keepdims=True)
+            slope = np.nansum(x_centered * y_centered, axis=1) / np.nansum(x_centered**2, axis=1)
+
+        return drift, slope
+
+    def trends(self, window=TREND_WINDOW, threshold=TREND_THRESHOLD):
+        """Uygunluğu belirgin şekilde yükselen veya düşen programları döndürür."""
+        scores, _, counts = self._active()
+        if not self.names:
+            return []
+
+        drift, slope = self._drift(scores, counts, window)
+        flagged = np.flatnonzero(np.abs(np.nan_to_num(drift)) >= threshold)
+
+        return [
+            {
+                "program_name": self.names[i],
+                "direction": TREND_UP if drift[i] > 0 else TREND_DOWN,
+                "drift": _round(drift[i]),
+                "slope": _round(slope[i]),
+                "count": int(counts[i]),
+            }
+            for i in flagged[np.argsort(-np.abs(drift[flagged]))]
+        ]
+
+    def save(self, path=HISTORY_FILE):
+        """Geçmişi atomik olarak .npz dosyasına yazar."""
+        size = len(self.names)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                names=np.array(self.names, dtype=str),
+                scores=self.scores[:size],
+                timestamps=self.timestamps[:size],
+                counts=self.counts[:size],
+                totals=self.totals[:size],
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=HISTORY_FILE):
+        """Geçmişi .npz dosyasından yükler; dosya yoksa FINAL_ai_results_mean.json'dan taşır."""
+        history = cls()
+        if os.path.exists(path):
+            with np.load(path) as data:
+                names = [str(name) for name in data["names"]]
+                size = len(names)
+                capacity = data["scores"].shape[1] if size else history.capacity
+                history.capacity = max(capacity, history.capacity)
+                history.names = names
+                history.rows = {name: i for i, name in enumerate(names)}
+                history.scores = np.full((size, history.capacity), np.nan, dtype=np.float32)
+                history.timestamps = np.full((size, history.capacity), np.nan, dtype=np.float64)
+                history.scores[:, :capacity] = data["scores"]
+                history.timestamps[:, :capacity] = data["timestamps"]
+                history.counts = data["counts"].astype(np.int32)
+                history.totals = data["totals"].astype(np.int64)
+            return history
+
+        # İlk kullanımda eski ortalama dosyasındaki skorları taşı (zaman damgası bilinmiyor)
+        try:
+            with open(FINAL_MEAN_FILE, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            legacy = {}
+
+        for program_name, entry in legacy.items():
+            for score in entry.get("scores", []):
+                history.append(program_name, score, timestamp=np.nan)
+        return history
+
+
+def _round(value, digits=3):
+    """NaN değerleri None'a çevirerek yuvarlar."""
+    if value is None or np.isnan(value):
+        return None
+    return round(float(value), digits)
+
+
+def get_score_history():
+    """İşlem genelinde paylaşılan skor geçmişini döndürür; dosya değişmişse yeniden yükler.
+
+    Yeniden yüklemede henüz yazılmamış skorlar bellekteki geçmişe tekrar eklenir.
+    """
+    global _history, _history_mtime
+
+    mtime = os.path.getmtime(HISTORY_FILE) if os.path.exists(HISTORY_FILE) else None
+    if _history is None or mtime != _history_mtime:
+        _history = ScoreHistory.load()
+        _history_mtime = mtime
+        for program_name, score, timestamp in _pending:
+            _history.append(program_name, score, timestamp)
+    return _history
+
+
+def migrate_legacy_scores():
+    """Geçmiş dosyası yoksa eski ortalama dosyasındaki skorlarla bir kez oluşturur.
+
+    FINAL_ai_results_mean.json'a yeni skor yazılmadan önce çağrılmalıdır;
+    aksi halde aynı skor hem taşınan kayıtlardan hem bekleyen listeden gelir.
+    """
+    if os.path.exists(HISTORY_FILE):
+        return
+    with _history_lock:
+        try:
+            with file_lock(HISTORY_FILE):
+                if not os.path.exists(HISTORY_FILE):
+                    ScoreHistory.load().save()
+        except OSError as e:
+            print(f"Skor geçmişi taşınamadı: {str(e)}")
+
+
+def record_score(program_name, score):
+    """Yeni skoru geçmişe ekler; dosyaya flush_scores ile toplu yazılır."""
+    with _history_lock:
+        entry = (program_name, score, time.time())
+        get_score_history().append(*entry)
+        _pending.append(entry)
+        should_flush = len(_pending) >= FLUSH_EVERY
+    if should_flush:
+        flush_scores()
+
+
+def flush_scores():
+    """Bekleyen skorları dosyadaki güncel geçmişle birleştirip kaydeder.
+
+    Dosya kilidi altında yeniden okunduğu için başka işlemlerin yazdığı
+    skorlar kaybolmaz. Yazılan skor sayısını döndürür.
+    """
+    global _history, _history_mtime
+
+    with _history_lock:
+        if not _pending:
+            return 0
+        try:
+            with file_lock(HISTORY_FILE):
+                history = ScoreHistory.load()
+                for program_name, score, timestamp in _pending:
+                    history.append(program_name, score, timestamp)
+                history.save()
+                _history_mtime = os.path.getmtime(HISTORY_FILE)
+        except OSError as e:
+            # Skorlar bekleyen listede kalır; bir sonraki flush yeniden dener
+            print(f"Skor geçmişi kaydedilemedi: {str(e)}")
+            return 0
+        _history = history
+        flushed = len(_pending)
+        _pending.clear()
+        return flushed
+
+
+# İşlem kapanırken yazılmamış skorlar kaybolmasın
+atexit.register(flush_scores)
+
+
+def get_score_statistics(program=None):
+    """Program istatistiklerini döndürür; program verilirse ada göre filtreler."""
+    with _history_lock:
+        stats = get_score_history().statistics()
+    if program:
+        stats = [s for s in stats if program.lower() in s["program_name"].lower()]
+    return stats
+
+
+def get_score_trends(window=TREND_WINDOW, threshold=TREND_THRESHOLD):
+    """Eğilimi yükselen veya düşen programları döndürür."""
+    with _history_lock:
+        return get_score_history().trends(window, threshold)
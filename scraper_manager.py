@@ -1,15 +1,20 @@
-import requests
 from bs4 import BeautifulSoup
 import time
 import re
 import json
 import os
+from page_cache import fetch_page
+from profiler import profile_run, stage
+import event_log
 
 BASE_URL = "https://tubitak.gov.tr"
 LIST_URL = f"{BASE_URL}/tr/destekler/sanayi/ulusal-destek-programlari"
 
 headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
 
+# Detay sayfaları arasında sunucuya yük bindirmemek için beklenen süre
+SCRAPE_DELAY_SECONDS = 2
+
 
 def clean_text(text):
     """Gereksiz boşlukları ve satır sonlarını temizler"""
@@ -19,8 +24,10 @@ def clean_text(text):
 
 def get_call_links_and_names():
     """Liste sayfasındaki çağrı adlarını ve linklerini döndürür"""
-    r = requests.get(LIST_URL, headers=headers)
-    soup = BeautifulSoup(r.text, "html.parser")
+    with stage("scrape.fetch"):
+        html = fetch_page(LIST_URL, headers=headers)
+    with stage("scrape.parse"):
+        soup = BeautifulSoup(html, "html.parser")
 
     container = soup.select_one("#paragraph-id--311 > div > div > div > div")
     if not container:
@@ -48,8 +55,10 @@ def get_call_links_and_names():
 
 def get_applicant_info(url):
     """Çağrı detay sayfasından yalnızca 'Kimler Başvurabilir' kısmını döndürür"""
-    r = requests.get(url, headers=headers)
-    soup = BeautifulSoup(r.text, "html.parser")
+    with stage("scrape.fetch"):
+        html = fetch_page(url, headers=headers)
+    with stage("scrape.parse"):
+        soup = BeautifulSoup(html, "html.parser")
 
     # "Kimler Başvurabilir" başlığını bul
     basliklar = soup.select(".field--name-field-baslik.field__item")
@@ -93,46 +102,61 @@ def get_applicant_info(url):
     return None
 
 
-def scrape_tubitak_data():
-    """TÜBİTAK verilerini çeker ve JSON dosyasına kaydeder."""
-    print("🔍 TÜBİTAK verileri çekiliyor...")
-
-    calls = get_call_links_and_names()
-    print(f"🔗 {len(calls)} çağrı bulundu.\n")
+def new_rag_data():
+    """Boş katalog yapısını oluşturur."""
+    return {"source": "TÜBİTAK Ulusal Destek Programları", "url": LIST_URL, "extraction_date": time.strftime("%Y-%m-%d %H:%M:%S"), "programs": []}
 
-    # RAG için uygun JSON formatında veri toplama
-    rag_data = {"source": "TÜBİTAK Ulusal Destek Programları", "url": LIST_URL, "extraction_date": time.strftime("%Y-%m-%d %H:%M:%S"), "programs": []}
 
-    for i, call in enumerate(calls, 1):
-        print(f"[{i}/{len(calls)}] {call['name']}")
+def build_program_data(call):
+    """Tek bir çağrının detay sayfasını çekip katalog kaydını oluşturur."""
+    program_data = {"program_name": call["name"], "program_url": call["url"], "applicant_requirements": None, "status": "success"}
 
-        program_data = {"program_name": call["name"], "program_url": call["url"], "applicant_requirements": None, "status": "success"}
+    try:
+        maddeler = get_applicant_info(call["url"])
+        if maddeler:
+            program_data["applicant_requirements"] = maddeler[0]  # Tek string olarak
+            event_log.item("scrape.detail_ok", "  ✅ Veri çekildi", program=call["name"], url=call["url"])
+        else:
+            program_data["status"] = "no_data"
+            program_data["applicant_requirements"] = "Veri bulunamadı"
+            event_log.item("scrape.detail_empty", "  ⚠️ Veri bulunamadı", level="WARNING", program=call["name"], url=call["url"])
+    except Exception as e:
+        program_data["status"] = "error"
+        program_data["applicant_requirements"] = f"Hata: {str(e)}"
+        event_log.error("scrape.detail_error", f"  ❌ Hata: {e}", program=call["name"], url=call["url"])
 
-        try:
-            maddeler = get_applicant_info(call["url"])
-            if maddeler:
-                program_data["applicant_requirements"] = maddeler[0]  # Tek string olarak
-                print(f"  ✅ Veri çekildi")
-            else:
-                program_data["status"] = "no_data"
-                program_data["applicant_requirements"] = "Veri bulunamadı"
-                print(f"  ⚠️ Veri bulunamadı")
-        except Exception as e:
-            program_data["status"] = "error"
-            program_data["applicant_requirements"] = f"Hata: {str(e)}"
-            print(f"  ❌ Hata: {e}")
+    return program_data
 
-        rag_data["programs"].append(program_data)
-        time.sleep(2)
 
-    # JSON dosyasına kaydet
+def save_rag_data(rag_data):
+    """Kataloğu tubitak_rag_data.json dosyasına kaydeder."""
     with open("tubitak_rag_data.json", "w", encoding="utf-8") as f:
         json.dump(rag_data, f, ensure_ascii=False, indent=2)
 
     print(f"\n✅ JSON dosyası 'tubitak_rag_data.json' olarak kaydedildi.")
-    print("✅ Tüm çağrılar işlendi.")
 
-    return rag_data
+
+def scrape_tubitak_data():
+    """TÜBİTAK verilerini çeker ve JSON dosyasına kaydeder."""
+    with profile_run("scrape"):
+        print("🔍 TÜBİTAK verileri çekiliyor...")
+
+        calls = get_call_links_and_names()
+        print(f"🔗 {len(calls)} çağrı bulundu.\n")
+
+        # RAG için uygun JSON formatında veri toplama
+        rag_data = new_rag_data()
+
+        for i, call in enumerate(calls, 1):
+            event_log.item("scrape.detail", f"[{i}/{len(calls)}] {call['name']}", index=i, total=len(calls), program=call["name"], url=call["url"])
+            rag_data["programs"].append(build_program_data(call))
+            time.sleep(SCRAPE_DELAY_SECONDS)
+
+        # JSON dosyasına kaydet
+        save_rag_data(rag_data)
+        print("✅ Tüm çağrılar işlendi.")
+
+        return rag_data
 
 
 def check_data_file():
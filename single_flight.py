@@ -0,0 +1,51 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Aynı anahtar için aynı anda yalnızca bir çalıştırmaya izin verir.
+
+    Çalıştırma sürerken gelen diğer istekler yeni bir iş başlatmaz, devam
+    eden işe katılır ve onun sonucunu alır.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def _claim(self, key):
+        with self.lock:
+            future = self.calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self.calls[key] = future
+            return future, True
+
+    def _execute(self, key, future, fn, args, kwargs):
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+
+    def do(self, key, fn, *args, **kwargs):
+        """fn'i çalıştırır veya devam eden çalıştırmayı bekler; (sonuç, paylaşıldı mı) döndürür."""
+        future, owner = self._claim(key)
+        if owner:
+            self._execute(key, future, fn, args, kwargs)
+        return future.result(), not owner
+
+    def start(self, key, fn, *args, **kwargs):
+        """fn'i arka planda başlatır veya devam eden çalıştırmaya katılır; (Future, katıldı mı) döndürür."""
+        future, owner = self._claim(key)
+        if owner:
+            threading.Thread(target=self._execute, args=(key, future, fn, args, kwargs), daemon=True).start()
+        return future, not owner
+
+    def in_flight(self):
+        """Şu an çalışan anahtarları döndürür."""
+        with self.lock:
+            return sorted(self.calls)
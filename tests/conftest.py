@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TUBITAK_LOG_CONSOLE", "0")
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Modüllerin göreli dosya yollarını (veritabanı, JSON, log) geçici klasöre yönlendirir."""
+    import results_index
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(results_index, "_index_synced", False)
+    return tmp_path
@@ -0,0 +1,44 @@
+import sqlite3
+
+import results_index
+from active_call_changes import get_pending_calls, mark_calls_analyzed, record_active_calls, record_failed_attempts
+
+BASELINE = [{"url": "https://tubitak/1001", "name": "1001 - A"}]
+OPENED = BASELINE + [{"url": "https://tubitak/1002", "name": "1002 - B"}, {"url": "https://tubitak/1003", "name": "1003 - C"}]
+
+
+def _pending_urls():
+    return [call["url"] for call in get_pending_calls()]
+
+
+def test_opened_calls_stay_pending_until_analyzed(workdir):
+    record_active_calls(BASELINE)
+    assert _pending_urls() == []
+
+    record_active_calls(OPENED)
+    assert sorted(_pending_urls()) == ["https://tubitak/1002", "https://tubitak/1003"]
+    mark_calls_analyzed(["https://tubitak/1002"])
+    assert _pending_urls() == ["https://tubitak/1003"]
+
+
+def test_failed_calls_are_given_up_after_max_attempts(workdir):
+    record_active_calls(BASELINE)
+    record_active_calls(OPENED)
+    failed = ["https://tubitak/1003"]
+
+    assert record_failed_attempts(failed, max_attempts=3) == []
+    assert record_failed_attempts(failed, max_attempts=3) == []
+    assert get_pending_calls()[-1]["attempts"] == 2
+    assert record_failed_attempts(failed, max_attempts=3) == [{"url": "https://tubitak/1003", "name": "1003 - C", "attempts": 3}]
+    assert _pending_urls() == ["https://tubitak/1002"]
+    assert record_failed_attempts([]) == []
+
+
+def test_existing_pending_table_gains_attempts_column(workdir):
+    conn = sqlite3.connect(results_index.INDEX_DB)
+    conn.execute("CREATE TABLE pending_active_calls (url TEXT PRIMARY KEY, name TEXT NOT NULL, detected_at TEXT NOT NULL)")
+    conn.execute("INSERT INTO pending_active_calls VALUES ('u', 'n', '2024-01-01 00:00:00')")
+    conn.commit()
+    conn.close()
+
+    assert get_pending_calls() == [{"url": "u", "name": "n", "detected_at": "2024-01-01 00:00:00", "attempts": 0}]
@@ -0,0 +1,30 @@
+import json
+import threading
+
+import ai_analyzer
+
+
+def test_update_final_mean_file_keeps_concurrent_scores(workdir, monkeypatch):
+    monkeypatch.setattr(ai_analyzer, "record_score", lambda program_name, score: None)
+    programs = [f"{1500 + i} - Program {i}" for i in range(21)]
+    rounds = 5
+    start = threading.Barrier(8)
+
+    def worker(offset):
+        start.wait()
+        for r in range(rounds):
+            for i, name in enumerate(programs):
+                if (i + r) % 8 == offset:
+                    ai_analyzer.update_final_mean_file(name, 0.5)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(ai_analyzer.FINAL_MEAN_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    assert sorted(data) == sorted(programs)
+    assert sum(len(entry["scores"]) for entry in data.values()) == len(programs) * rounds
+    assert all(entry["mean"] == 0.5 for entry in data.values())
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+
+import app
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_does_not_load_pipeline_modules():
+    code = "import sys, app; print(sorted(m for m in ('requests', 'scheduler', 'main', 'backend_pool') if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+
+def test_status_does_not_start_warm_worker():
+    code = (
+        "import asyncio, sys, app\n"
+        "status = asyncio.run(app.get_status())\n"
+        "print(status['worker'], 'warm_worker' in sys.modules, 'scheduler' in sys.modules)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout
+    assert output.split()[-3:] == ["None", "False", "False"]
+
+
+def test_jobs_of_different_types_overlap(monkeypatch):
+    started = {app.JOB_FULL: threading.Event(), app.JOB_ACTIVE: threading.Event()}
+    release = threading.Event()
+
+    def job(job_type):
+        def run():
+            started[job_type].set()
+            assert release.wait(5)
+
+        return run
+
+    monkeypatch.setattr(app, "JOB_FUNCTIONS", {job_type: job(job_type) for job_type in started})
+    assert app.trigger_job(app.JOB_FULL, "test") is False
+    assert app.trigger_job(app.JOB_ACTIVE, "test") is False
+    # Aynı türden ikinci tetikleme devam eden işe katılır
+    assert app.trigger_job(app.JOB_FULL, "test") is True
+    try:
+        assert started[app.JOB_FULL].wait(5)
+        assert started[app.JOB_ACTIVE].wait(5)
+    finally:
+        release.set()
+
+
+def test_busy_message_names_the_running_analysis(monkeypatch):
+    monkeypatch.setattr(app.system_state, "is_analysis_running", True)
+    monkeypatch.setattr(app.system_state, "running_analysis", app.PROFILE_MATRIX_LABEL)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(app.start_full_analysis())
+    assert error.value.detail == "Profil matrisi analizi zaten devam ediyor!"
+
+    monkeypatch.setattr(app.system_state, "is_analysis_running", False)
+    monkeypatch.setattr(app.system_state, "running_analysis", None)
+    release = threading.Event()
+    monkeypatch.setattr(app, "JOB_FUNCTIONS", {app.JOB_ACTIVE: lambda: release.wait(5)})
+    app.trigger_job(app.JOB_ACTIVE, "test")
+    try:
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(app.start_profile_matrix(BackgroundTasks()))
+        assert error.value.detail == "Aktif çağrı analizi zaten devam ediyor!"
+    finally:
+        release.set()
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+import backend_pool
+from backend_pool import MAX_CONSECUTIVE_FAILURES, BackendPool
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    """Ağa çıkmayan, workspace'leri hazır bir havuz oluşturur."""
+    probes = []
+
+    def check_health(backend):
+        probes.append(backend.url)
+        backend.healthy = True
+        return True
+
+    monkeypatch.setattr(backend_pool, "ADAPTIVE_CONCURRENCY", False)
+    monkeypatch.setattr(backend_pool.Backend, "check_health", check_health)
+
+    def make(*urls):
+        pool = BackendPool(urls=list(urls), max_concurrency=1)
+        for backend in pool.backends:
+            backend.workspace_slug = "ws"
+        pool.probes = probes
+        return pool
+
+    return make
+
+
+def test_last_backend_stays_in_rotation(make_pool):
+    pool = make_pool("http://a")
+
+    for _ in range(MAX_CONSECUTIVE_FAILURES + 2):
+        assert pool.call(lambda backend: None) is None
+    assert pool.backends[0].healthy
+    assert pool.call(lambda backend: "ok") == "ok"
+
+
+def test_failing_backend_leaves_rotation_when_others_remain(make_pool):
+    pool = make_pool("http://a", "http://b")
+    a, b = pool.backends
+
+    for _ in range(MAX_CONSECUTIVE_FAILURES):
+        pool.release(pool.acquire(exclude=[b]), False)
+    assert not a.healthy
+    # Kalan tek sunucu da hata verse devrede kalır
+    for _ in range(MAX_CONSECUTIVE_FAILURES):
+        pool.release(pool.acquire(), False)
+    assert b.healthy
+
+
+def test_acquire_waits_for_probe_instead_of_failing(make_pool, monkeypatch):
+    monkeypatch.setattr(backend_pool, "ACQUIRE_TIMEOUT", 5)
+    pool = make_pool("http://a")
+    pool.backends[0].healthy = False
+
+    started = time.time()
+    backend = pool.acquire()
+    assert backend is pool.backends[0]
+    assert time.time() - started < 2
+    assert pool.probes == ["http://a"]
+
+
+def test_acquire_returns_none_when_every_backend_was_tried(make_pool):
+    pool = make_pool("http://a")
+    assert pool.acquire(exclude=pool.backends) is None
@@ -0,0 +1,21 @@
+from batch_analyzer import parse_batch_response
+
+
+def test_parse_batch_response_skips_surrounding_brackets():
+    text = 'sonuçlar [2 program]: [{"id": 1, "score": 0.8, "verdict": "Uygun", "explanation": "a"}, {"id": 2, "score": 0.2, "verdict": "Uygun Değil", "explanation": "b"}] kaynak [1].'
+
+    assert parse_batch_response(text, 2) == [
+        {"score": 0.8, "verdict": "Uygun", "explanation": "a"},
+        {"score": 0.2, "verdict": "Uygun Değil", "explanation": "b"},
+    ]
+
+
+def test_parse_batch_response_marks_invalid_and_missing_records():
+    text = '```json\n[{"id": 2, "score": 0.5, "verdict": "Şartlı Uygun"}, {"id": 1, "score": 1.5, "verdict": "Uygun"}, {"id": 9, "score": 0.1, "verdict": "Uygun"}]\n```'
+
+    assert parse_batch_response(text, 3) == [None, {"score": 0.5, "verdict": "Şartlı Uygun", "explanation": ""}, None]
+
+
+def test_parse_batch_response_without_array():
+    assert parse_batch_response("yanıt yok [1]", 2) == [None, None]
+    assert parse_batch_response(None, 1) == [None]
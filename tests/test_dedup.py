@@ -0,0 +1,59 @@
+import dedup
+from dedup import DedupIndex, MATCH_EXACT, MATCH_NEAR, estimate_similarity, minhash_signature
+
+WORDS = [f"kelime{i}" for i in range(200)]
+BASE_TEXT = " ".join(WORDS)
+# Tek kelimesi değişmiş metin: kelime üçlülerinin büyük çoğunluğu ortak kalır
+NEAR_TEXT = " ".join(WORDS[:100] + ["farklı"] + WORDS[101:])
+OTHER_TEXT = " ".join(f"başka{i}" for i in range(200))
+
+
+def _program(index, text):
+    return {"index": index, "program_name": f"{1000 + index} - Program {index}", "applicant_requirements": text}
+
+
+def test_assign_groups_exact_duplicates():
+    index = DedupIndex(near_duplicates=False)
+
+    assert index.assign(_program(1, "Başvuru: KOBİ'ler.")) is None
+    # Büyük/küçük harf ve noktalama farkları aynı metin sayılır
+    mark = index.assign(_program(2, "başvuru   kobi'ler"))
+    assert mark == {"representative": "1001 - Program 1", "representative_index": 1, "match": MATCH_EXACT, "similarity": 1.0}
+    assert index.assign(_program(3, "Başka bir metin")) is None
+    assert index.get_stats() == {"programs": 3, "representatives": 2, MATCH_EXACT: 1, MATCH_NEAR: 0, "saved_calls": 1}
+
+
+def test_assign_ignores_near_duplicates_when_disabled():
+    index = DedupIndex(near_duplicates=False)
+
+    assert index.assign(_program(1, BASE_TEXT)) is None
+    assert index.assign(_program(2, NEAR_TEXT)) is None
+
+
+def test_assign_matches_near_duplicates_above_threshold():
+    index = DedupIndex(near_duplicates=True, threshold=0.8)
+
+    assert index.assign(_program(1, BASE_TEXT)) is None
+    mark = index.assign(_program(2, NEAR_TEXT))
+    assert mark["representative"] == "1001 - Program 1"
+    assert mark["match"] == MATCH_NEAR
+    assert 0.8 <= mark["similarity"] < 1.0
+    assert index.assign(_program(3, OTHER_TEXT)) is None
+
+    # Aynı metin tekrar gelirse ilk eşleşmenin güveni korunur
+    assert index.assign(_program(4, NEAR_TEXT)) == mark
+    assert index.get_stats()["saved_calls"] == 2
+
+
+def test_near_match_threshold_is_inclusive():
+    similarity = estimate_similarity(minhash_signature(BASE_TEXT), minhash_signature(NEAR_TEXT))
+    assert 0.0 < similarity < 1.0
+
+    at_threshold = DedupIndex(near_duplicates=True, threshold=similarity)
+    at_threshold.assign(_program(1, BASE_TEXT))
+    assert at_threshold.assign(_program(2, NEAR_TEXT))["match"] == MATCH_NEAR
+
+    above_threshold = DedupIndex(near_duplicates=True, threshold=similarity + 1 / dedup.MINHASH_PERMUTATIONS)
+    above_threshold.assign(_program(1, BASE_TEXT))
+    assert above_threshold.assign(_program(2, NEAR_TEXT)) is None
+    assert above_threshold.get_stats()["representatives"] == 2
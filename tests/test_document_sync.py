@@ -0,0 +1,89 @@
+import pytest
+
+import document_sync
+from document_sync import sync_workspace_documents
+from results_index import get_connection
+
+BASE_URL = "http://llm"
+
+
+@pytest.fixture
+def server(workdir, monkeypatch):
+    """Yüklenen belgeleri tutan sahte AnythingLLM sunucusu."""
+    (workdir / "docs").mkdir()
+    (workdir / "docs" / "profil.txt").write_text("şirket profili", encoding="utf-8")
+    state = {"stored": set(), "uploads": 0, "embed_calls": 0, "deletes": [], "removed": []}
+
+    def upload_document(base_url, path):
+        state["uploads"] += 1
+        location = f"custom-documents/{state['uploads']}.json"
+        state["stored"].add(location)
+        return location
+
+    def update_embeddings(base_url, workspace_slug, adds, deletes):
+        state["embed_calls"] += 1
+        state["deletes"].extend((workspace_slug, location) for location in deletes)
+        return all(location in state["stored"] for location in adds)
+
+    def remove_documents(base_url, locations):
+        state["removed"].extend(locations)
+        state["stored"].difference_update(locations)
+        return True
+
+    monkeypatch.setattr(document_sync, "upload_document", upload_document)
+    monkeypatch.setattr(document_sync, "update_embeddings", update_embeddings)
+    monkeypatch.setattr(document_sync, "remove_documents", remove_documents)
+    return state
+
+
+def _cached_locations():
+    conn = get_connection()
+    try:
+        return [row["location"] for row in conn.execute("SELECT location FROM document_uploads")]
+    finally:
+        conn.close()
+
+
+def test_sync_reuses_uploaded_document_for_new_workspace(server, workdir):
+    assert sync_workspace_documents(BASE_URL, "ws-1", directory="docs")["uploaded"] == 1
+    summary = sync_workspace_documents(BASE_URL, "ws-2", directory="docs")
+
+    assert summary["added"] == 1
+    assert summary["uploaded"] == 0
+    assert server["uploads"] == 1
+
+
+def test_sync_reuploads_when_cached_location_is_rejected(server, workdir):
+    sync_workspace_documents(BASE_URL, "ws-1", directory="docs")
+    # Belge sunucudan silinmiş; önbellekteki konum artık geçersiz
+    server["stored"].clear()
+
+    summary = sync_workspace_documents(BASE_URL, "ws-2", directory="docs")
+
+    assert summary == {"added": 1, "removed": 0, "unchanged": 0, "uploaded": 1}
+    assert server["uploads"] == 2
+    assert _cached_locations() == ["custom-documents/2.json"]
+
+
+def test_sync_gives_up_after_one_retry(server, workdir, monkeypatch):
+    sync_workspace_documents(BASE_URL, "ws-1", directory="docs")
+    monkeypatch.setattr(document_sync, "update_embeddings", lambda *args: False)
+
+    assert sync_workspace_documents(BASE_URL, "ws-2", directory="docs") is None
+    assert server["uploads"] == 2
+
+
+def test_changed_document_is_removed_after_every_workspace_synced(server, workdir):
+    sync_workspace_documents(BASE_URL, "ws-1", directory="docs")
+    sync_workspace_documents(BASE_URL, "ws-2", directory="docs")
+    (workdir / "docs" / "profil.txt").write_text("güncel şirket profili", encoding="utf-8")
+
+    sync_workspace_documents(BASE_URL, "ws-1", directory="docs")
+    # ws-2 eski sürümü hâlâ gömülü tutuyor; yükleme silinmez
+    assert server["deletes"] == [("ws-1", "custom-documents/1.json")]
+    assert server["removed"] == []
+
+    sync_workspace_documents(BASE_URL, "ws-2", directory="docs")
+    assert server["deletes"][-1] == ("ws-2", "custom-documents/1.json")
+    assert server["removed"] == ["custom-documents/1.json"]
+    assert _cached_locations() == ["custom-documents/2.json"]
@@ -0,0 +1,30 @@
+from event_log import EventLogger
+
+
+def test_writes_json_lines_to_log_file(workdir):
+    logger = EventLogger(log_file="logs/test.jsonl", console=False)
+    logger.log("INFO", "run.started", "başladı", run_id=3)
+    logger.log("DEBUG", "ignored")
+
+    assert logger.flush()
+    assert '"event": "run.started"' in (workdir / "logs" / "test.jsonl").read_text(encoding="utf-8")
+    assert logger.get_status()["written"] == 1
+    assert logger.get_status()["fallback"] is False
+
+
+def test_falls_back_to_stdout_when_log_file_cannot_open(workdir, capsys):
+    # Klasör yerine dosya olduğu için log klasörü oluşturulamaz
+    (workdir / "logs").write_text("", encoding="utf-8")
+    logger = EventLogger(log_file="logs/test.jsonl", console=True)
+    logger.log("ERROR", "run.failed", "hata")
+    logger.log("INFO", "run.finished", "bitti")
+
+    assert logger.flush()
+    captured = capsys.readouterr()
+    assert "Log dosyası açılamadı" in captured.err
+    assert '"event": "run.failed"' in captured.out
+    assert '"event": "run.finished"' in captured.out
+    status = logger.get_status()
+    assert status["fallback"] is True
+    assert status["errors"] == 1
+    assert status["written"] == 2
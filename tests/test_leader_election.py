@@ -0,0 +1,25 @@
+import pytest
+
+from leader_election import DEFAULT_SCHEDULER_TIMES, add_scheduler_time, get_scheduler_times, normalize_time, remove_scheduler_time
+
+
+@pytest.mark.parametrize("time_str, expected", [("9:30", "09:30"), ("09:30", "09:30"), (" 0:05 ", "00:05"), ("23:59", "23:59")])
+def test_normalize_time(time_str, expected):
+    assert normalize_time(time_str) == expected
+
+
+@pytest.mark.parametrize("time_str", ["24:00", "9:3", "09-30", "", None])
+def test_normalize_time_rejects_invalid(time_str):
+    with pytest.raises(ValueError):
+        normalize_time(time_str)
+
+
+def test_add_and_remove_share_the_normalized_form(workdir):
+    assert add_scheduler_time("9:30")
+    assert not add_scheduler_time("09:30")
+    assert "09:30" in get_scheduler_times()
+
+    assert remove_scheduler_time("9:30")
+    assert not remove_scheduler_time("09:30")
+    assert sorted(get_scheduler_times()) == sorted(DEFAULT_SCHEDULER_TIMES)
+    assert remove_scheduler_time("8:00")
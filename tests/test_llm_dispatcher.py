@@ -0,0 +1,38 @@
+import threading
+
+from llm_dispatcher import LLMDispatcher
+
+
+def test_stats_count_every_executed_call(workdir):
+    dispatcher = LLMDispatcher(max_workers=8, cache_db=str(workdir / "cache.db"))
+    release = threading.Event()
+
+    def call(index):
+        release.wait(5)
+        return index
+
+    futures = [dispatcher.submit(f"key-{i}", call, i, use_cache=False) for i in range(200)]
+    release.set()
+
+    assert sorted(future.result(timeout=10) for future in futures) == list(range(200))
+    stats = dispatcher.get_stats()
+    assert stats["executed"] == 200
+    assert stats["in_flight"] == 0
+
+
+def test_duplicate_key_joins_running_call(workdir):
+    dispatcher = LLMDispatcher(max_workers=2, cache_db=str(workdir / "cache.db"))
+    release = threading.Event()
+
+    def call():
+        release.wait(5)
+        return {"score": 7}
+
+    first = dispatcher.submit("same", call)
+    second = dispatcher.submit("same", call)
+    release.set()
+
+    assert first is second
+    assert first.result(timeout=10) == {"score": 7}
+    assert dispatcher.get_stats()["executed"] == 1
+    assert dispatcher.get_stats()["deduplicated"] == 1
@@ -0,0 +1,70 @@
+import sys
+import types
+
+import main
+
+
+class FailingPool:
+    def provision_workspaces(self):
+        return False
+
+
+def test_missing_catalogue_is_scraped_without_pipeline(workdir, monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "scrape_active_calls", lambda: {"programs": []})
+    monkeypatch.setattr(main, "check_data_file", lambda: False)
+    monkeypatch.setattr(main, "scrape_tubitak_data", lambda: calls.append("scrape"))
+    monkeypatch.setattr(main, "get_backend_pool", FailingPool)
+    monkeypatch.setitem(sys.modules, "pipeline", types.SimpleNamespace(run_pipeline=lambda: calls.append("pipeline")))
+
+    assert main.run_main(batch_mode=False, pipeline_mode=False) is None
+    assert calls == ["scrape"]
+
+
+class FakePool:
+    def total_capacity(self):
+        return 1
+
+    def get_status(self):
+        return [{"url": "http://llm", "healthy": True, "workspace_slug": "ws"}]
+
+
+def _program(name, text, status="success"):
+    return {"program_name": name, "applicant_requirements": text, "status": status}
+
+
+def test_dispatch_reads_programs_in_chunks(workdir, monkeypatch):
+    import results_index
+    from concurrent.futures import Future
+
+    monkeypatch.setattr(main, "DISPATCH_CHUNK_SIZE", 2)
+    consumed = []
+    submitted = []
+
+    def source():
+        programs = [
+            _program("1001 - A", "ortak metin"),
+            _program("1002 - B", "ortak metin"),
+            _program("1003 - C", "farklı metin"),
+            _program("1004 - D", "x", status="error"),
+            _program("1005 - E", "Ortak  metin!"),
+        ]
+        for number, program in enumerate(programs, 1):
+            consumed.append(number)
+            yield number, program
+
+    def submit_programs(dispatcher, run, pool, batch, batch_index=None):
+        submitted.append((batch[0]["program_name"], len(consumed)))
+        future = Future()
+        future.set_result({"response": "Uygunluk Skoru: 0.5\\nSonuç: Uygun"})
+        return future
+
+    monkeypatch.setattr(main, "submit_programs", submit_programs)
+    run_id = main.analyze_programs(FakePool(), ["ws"], source(), batch_mode=False)
+
+    # İlk istek gönderildiğinde yalnızca ilk parça okunmuştu
+    assert submitted == [("1001 - A", 2), ("1003 - C", 4)]
+    rows = results_index.query_results(run_id=run_id, limit=10)["items"]
+    assert sorted(row["program_name"] for row in rows) == ["1001 - A", "1002 - B", "1003 - C", "1005 - E"]
+    assert all(row["score"] == 0.5 for row in rows)
+    assert main.run_registry.get_run(run_id)["program_count"] == 4
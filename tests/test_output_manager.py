@@ -0,0 +1,42 @@
+import os
+
+import output_manager
+from output_manager import ReportRenderer
+
+
+def _item(name, score, analysis="Uygunluk Skoru: 0.5", verdict="Uygun"):
+    return {"program_name": name, "applicant_requirements": "KOBİ <50 kişi>", "analysis": analysis, "score": score, "verdict": verdict}
+
+
+def test_report_streams_sections_and_updates_changed_program(workdir):
+    report = ReportRenderer("rapor.html")
+    report.add(_item("1001 - A", 0.5, analysis="| a | b |\n|---|---|\n| 1 | 2 |"))
+    report.add(_item("1002 - B & C", 0.3))
+    report.add(_item("1001 - A", 0.9, analysis="güncel analiz"))
+    # İçeriği değişmeyen kayıt yeniden işlenmez
+    report.add(_item("1002 - B & C", 0.3))
+    assert report.flush(force=True)
+
+    page = (workdir / "rapor.html").read_text(encoding="utf-8")
+    assert page.count("<h2 id='p-1'>") == 1
+    assert page.index("<h2 id='p-1'>") < page.index("<h2 id='p-2'>")
+    assert "güncel analiz" in page and "<td>1</td><td>2</td>" not in page
+    assert "<td>0.9</td>" in page and "<td>0.5</td>" not in page
+    assert "1002 - B &amp; C" in page and "KOBİ &lt;50 kişi&gt;" in page
+    assert page.rstrip().endswith("</html>")
+    assert not os.path.exists("rapor.html.sections")
+
+
+def test_intermediate_flush_waits_for_interval(workdir, monkeypatch):
+    monkeypatch.setattr(output_manager, "REPORT_FLUSH_SECONDS", 3600)
+    report = ReportRenderer("rapor.html")
+    report.add(_item("1001 - A", 0.5))
+    assert not report.flush()
+    assert not os.path.exists("rapor.html")
+
+    monkeypatch.setattr(output_manager, "REPORT_FLUSH_SECONDS", 0)
+    assert report.flush()
+    assert "1001 - A" in (workdir / "rapor.html").read_text(encoding="utf-8")
+    # Yeni sonuç yoksa yeniden yazılmaz
+    assert not report.flush()
+    assert os.path.exists("rapor.html.sections")
@@ -0,0 +1,67 @@
+import json
+
+import results_index
+from program_selector import normalize_selection, resolve_selection
+
+PROGRAMS = [
+    {"program_name": "1001 - Sanayi Ar-Ge Projeleri", "applicant_requirements": "a"},
+    {"program_name": "1501 - Sanayi Destek Programı", "applicant_requirements": "b"},
+    {"program_name": "1512 - BiGG Girişimcilik", "applicant_requirements": "c"},
+    {"program_name": "2209 - Üniversite Öğrencileri", "applicant_requirements": "d"},
+]
+
+
+def _write_catalog(workdir):
+    with open(workdir / "tubitak_rag_data.json", "w", encoding="utf-8") as f:
+        json.dump({"programs": PROGRAMS}, f, ensure_ascii=False)
+
+
+def _index(name, score, created_at):
+    results_index.index_result(1, {"program_name": name, "analysis": "x"}, score=score, created_at=created_at)
+
+
+def _selected(selection):
+    return [(number, program["program_name"]) for number, program in resolve_selection(selection)]
+
+
+def test_normalize_selection():
+    assert normalize_selection() is None
+    assert normalize_selection(call_numbers=[" ", ""], patterns=["  "]) is None
+    assert normalize_selection(call_numbers=[1512, "1001", "1001"], stale_since="2024-05-01") == {
+        "call_numbers": ["1001", "1512"],
+        "patterns": [],
+        "stale_since": "2024-05-01 00:00:00",
+        "failed_last_run": False,
+    }
+
+
+def test_resolve_selection_by_call_number_and_pattern(workdir):
+    _write_catalog(workdir)
+
+    assert _selected({"call_numbers": ["1512"]}) == [(3, "1512 - BiGG Girişimcilik")]
+    # Kalıplar Türkçe büyük/küçük harf duyarsızdır; çağrı numarasıyla birleşim alınır
+    assert _selected({"call_numbers": ["2209"], "patterns": ["SANAYİ"]}) == [
+        (1, "1001 - Sanayi Ar-Ge Projeleri"),
+        (2, "1501 - Sanayi Destek Programı"),
+        (4, "2209 - Üniversite Öğrencileri"),
+    ]
+    assert _selected({"patterns": ["15*"]}) == [(2, "1501 - Sanayi Destek Programı"), (3, "1512 - BiGG Girişimcilik")]
+    assert _selected({"call_numbers": ["9999"]}) == []
+
+
+def test_resolve_selection_narrows_by_stale_and_failed(workdir):
+    _write_catalog(workdir)
+    _index("1001 - Sanayi Ar-Ge Projeleri", 0.7, "2024-01-10 10:00:00")
+    _index("1501 - Sanayi Destek Programı", 0.4, "2024-06-01 10:00:00")
+    _index("1512 - BiGG Girişimcilik", 0.5, "2024-01-01 10:00:00")
+    # Son sonucu başarısız olan program
+    _index("1512 - BiGG Girişimcilik", None, "2024-02-01 10:00:00")
+
+    stale = normalize_selection(stale_since="2024-03-01")
+    assert _selected(stale) == [(1, "1001 - Sanayi Ar-Ge Projeleri"), (3, "1512 - BiGG Girişimcilik"), (4, "2209 - Üniversite Öğrencileri")]
+    assert _selected({"failed_last_run": True}) == [(3, "1512 - BiGG Girişimcilik")]
+    assert _selected({**stale, "patterns": ["sanayi"]}) == [(1, "1001 - Sanayi Ar-Ge Projeleri")]
+
+
+def test_resolve_selection_without_catalog(workdir):
+    assert resolve_selection({"call_numbers": ["1001"]}) == []
@@ -0,0 +1,46 @@
+import pytest
+
+import response_parser
+from response_parser import extract_score_from_response, get_parse_stats, parse_response, record_parse
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    monkeypatch.setattr(response_parser, "_stats", {key: 0 for key in response_parser._stats})
+    return get_parse_stats
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Uygunluk Skoru: 0,8\\nSonuç: Uygun", 0.8),
+        ("Uygunluk Skoru: 7/10", 0.7),
+        ("Skor: 85/100", 0.85),
+        ("Değerlendirme 3/10 puan", 0.3),
+        # Aralık dışı ilk eşleşme sonraki eşleşmeleri ve desenleri engellemez
+        ("Uygunluk Skoru: 2024 çağrısı\\nUygunluk Skoru: 0.6", 0.6),
+        ("Uygunluk Skoru: 2024 çağrısı\\nSkor: 0.4", 0.4),
+        ("Uygunluk Skoru: 2024", None),
+        ("", None),
+    ],
+)
+def test_extract_score_from_response(text, expected):
+    assert extract_score_from_response(text.replace("\\n", "\n")) == expected
+
+
+def test_parse_response_prefers_json_contract(stats):
+    parsed = parse_response('Yanıt: {"score": 0.9, "verdict": "şartlı uygun", "explanation": " kısa "}')
+
+    assert parsed == {"score": 0.9, "verdict": "Şartlı Uygun", "explanation": "kısa", "source": "json", "ok": True}
+    assert stats()["parsed_json"] == 1
+
+
+def test_parse_response_counts_once_when_recorded_later(stats):
+    first = parse_response("skor yok", record=False)
+    second = parse_response("Uygunluk Skoru: 0.5", record=False)
+    assert stats()["parsed"] == stats()["failed"] == 0
+
+    record_parse(second)
+    assert not first["ok"]
+    assert stats()["parsed"] == 1
+    assert stats()["failed"] == 0
@@ -0,0 +1,67 @@
+import pytest
+
+import results_index
+from run_diff import CHANGE_ADDED, CHANGE_CHANGED, CHANGE_REMOVED, CHANGE_UNCHANGED, iter_run_diff, summarize_run_diff
+
+
+def _index(run_id, name, score, verdict):
+    results_index.index_result(run_id, {"program_name": name, "analysis": "x"}, score=score, verdict=verdict)
+
+
+@pytest.fixture
+def two_runs(workdir):
+    _index(1, "1001 - A", 0.5, "Uygun")
+    _index(1, "1002 - B", 0.6, "Uygun")
+    _index(1, "1003 - C", 0.7, "Uygun")
+    _index(1, "1005 - E", 0.2, "Uygun Değil")
+    _index(2, "1002 - B", 0.6, "Uygun")
+    _index(2, "1003 - C", 0.4, "Uygun Değil")
+    _index(2, "1004 - D", 0.9, "Uygun")
+    _index(2, "1005 - E", 0.1, "Uygun Değil")
+    # Aynı program çalıştırmada tekrar yazıldıysa son kayıt geçerlidir
+    _index(2, "1005 - E", 0.3, "Uygun Değil")
+
+
+def _changes(entries):
+    return [(entry["program_name"], entry["change"]) for entry in entries]
+
+
+def test_iter_run_diff_merge_join(two_runs):
+    entries = list(iter_run_diff(1, 2, include_unchanged=True))
+
+    assert _changes(entries) == [
+        ("1001 - A", CHANGE_REMOVED),
+        ("1002 - B", CHANGE_UNCHANGED),
+        ("1003 - C", CHANGE_CHANGED),
+        ("1004 - D", CHANGE_ADDED),
+        ("1005 - E", CHANGE_CHANGED),
+    ]
+    by_name = {entry["program_name"]: entry for entry in entries}
+    assert by_name["1003 - C"]["verdict_flip"] is True
+    assert by_name["1003 - C"]["delta"] == -0.3
+    assert by_name["1005 - E"]["verdict_flip"] is False
+    assert by_name["1005 - E"]["delta"] == 0.1
+    assert by_name["1004 - D"]["call_number"] == "1004"
+    assert by_name["1001 - A"]["score_b"] is None
+
+
+def test_iter_run_diff_skips_unchanged_by_default(two_runs):
+    assert "1002 - B" not in [entry["program_name"] for entry in iter_run_diff(1, 2)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3])
+def test_iter_run_diff_chunking_does_not_change_result(two_runs, chunk_size):
+    assert list(iter_run_diff(1, 2, include_unchanged=True, chunk_size=chunk_size)) == list(iter_run_diff(1, 2, include_unchanged=True))
+
+
+def test_summarize_run_diff(two_runs):
+    summary = summarize_run_diff(1, 2)
+
+    assert summary["added"] == 1
+    assert summary["removed"] == 1
+    assert summary["changed"] == 2
+    assert summary["unchanged"] == 1
+    assert summary["verdict_flips"] == 1
+    assert summary["improved"] == 1
+    assert summary["worsened"] == 1
+    assert summary["mean_delta"] == round((0.0 - 0.3 + 0.1) / 3, 4)
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import score_history
+from score_history import ScoreHistory, flush_scores, record_score
+
+
+@pytest.fixture
+def history(workdir, monkeypatch):
+    monkeypatch.setattr(score_history, "_history", None)
+    monkeypatch.setattr(score_history, "_history_mtime", None)
+    monkeypatch.setattr(score_history, "_pending", [])
+    return workdir
+
+
+def _saved_counts():
+    saved = ScoreHistory.load()
+    return {name: int(saved.totals[row]) for name, row in saved.rows.items()}
+
+
+def test_record_score_buffers_until_flush(history):
+    record_score("1001 - A", 0.5)
+    record_score("1001 - A", 0.7)
+
+    assert not (history / score_history.HISTORY_FILE).exists()
+    assert score_history.get_score_statistics()[0]["count"] == 2
+    assert flush_scores() == 2
+    assert flush_scores() == 0
+    assert _saved_counts() == {"1001 - A": 2}
+
+
+def test_record_score_flushes_when_buffer_is_full(history, monkeypatch):
+    monkeypatch.setattr(score_history, "FLUSH_EVERY", 3)
+    for score in (0.1, 0.2, 0.3, 0.4):
+        record_score("1001 - A", score)
+
+    assert _saved_counts() == {"1001 - A": 3}
+    assert len(score_history._pending) == 1
+
+
+def _count(program_name):
+    return next(s["count"] for s in score_history.get_score_statistics() if s["program_name"] == program_name)
+
+
+def test_first_scores_are_not_counted_twice(history):
+    import ai_analyzer
+
+    ai_analyzer.update_final_mean_file("1001 - A", 0.4)
+    ai_analyzer.update_final_mean_file("1001 - A", 0.6)
+
+    assert _count("1001 - A") == 2
+    flush_scores()
+    assert _saved_counts() == {"1001 - A": 2}
+    assert _count("1001 - A") == 2
+
+
+def test_legacy_scores_are_migrated_once(history):
+    import ai_analyzer
+
+    with open(score_history.FINAL_MEAN_FILE, "w", encoding="utf-8") as f:
+        json.dump({"1001 - A": {"scores": [0.2], "mean": 0.2}}, f)
+    ai_analyzer.update_final_mean_file("1001 - A", 0.6)
+
+    assert _count("1001 - A") == 2
+    flush_scores()
+    assert _saved_counts() == {"1001 - A": 2}
+
+
+def test_flush_merges_scores_written_by_another_process(history):
+    record_score("1001 - A", 0.5)
+    # Başka bir işlem aynı dosyaya kendi skorunu yazmış olsun
+    other = ScoreHistory.load()
+    other.append("1002 - B", 0.9)
+    other.save()
+
+    # Yeniden yüklenen geçmiş yazılmamış skoru kaybetmez
+    assert {s["program_name"] for s in score_history.get_score_statistics()} == {"1001 - A", "1002 - B"}
+    flush_scores()
+    assert _saved_counts() == {"1001 - A": 1, "1002 - B": 1}
+
+
+def test_concurrent_record_and_flush_keep_every_score(history, monkeypatch):
+    monkeypatch.setattr(score_history, "FLUSH_EVERY", 7)
+    start = threading.Barrier(6)
+
+    def worker(offset):
+        start.wait()
+        for i in range(40):
+            record_score(f"{1000 + offset} - P", i / 40)
+            if i % 9 == 0:
+                flush_scores()
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    flush_scores()
+
+    assert _saved_counts() == {f"{1000 + offset} - P": 40 for offset in range(6)}
+
+
+def test_score_trends_endpoint_validates_direction(history):
+    import app
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(app.get_score_trends(direction="sideways"))
+    assert error.value.status_code == 400
+
+    for name, scores in {"1001 - A": (0.1, 0.1, 0.1, 0.9, 0.9, 0.9), "1002 - B": (0.9, 0.9, 0.9, 0.1, 0.1, 0.1)}.items():
+        for score in scores:
+            record_score(name, score)
+    up = asyncio.run(app.get_score_trends(direction="up"))
+    down = asyncio.run(app.get_score_trends(direction="down"))
+    assert [t["program_name"] for t in up["trends"]] == ["1001 - A"]
+    assert [t["program_name"] for t in down["trends"]] == ["1002 - B"]
+    assert asyncio.run(app.get_score_trends())["count"] == 2
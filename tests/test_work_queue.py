@@ -0,0 +1,48 @@
+from work_queue import PRIORITY_PREEMPT, PriorityWorkQueue
+
+
+def _drain(queue):
+    keys = []
+    while (entry := queue.pop()) is not None:
+        keys.append(entry[0])
+    return keys
+
+
+def test_pop_orders_by_priority_then_insertion():
+    queue = PriorityWorkQueue()
+    queue.push("a", "A", 10)
+    queue.push("b", "B", 50)
+    queue.push("c", "C", 10)
+    queue.push("d", "D", 50)
+
+    assert queue.pop() == ("b", "B", 50)
+    assert _drain(queue) == ["d", "a", "c"]
+    assert queue.pop() is None
+    assert len(queue) == 0
+
+
+def test_preempt_moves_matching_jobs_to_front():
+    queue = PriorityWorkQueue()
+    queue.push("high", "H", 80, call_numbers=("1001",))
+    queue.push("low", "L", 5, call_numbers=("1002", "1003"))
+    queue.push("mid", "M", 20, call_numbers=("1004",))
+
+    assert queue.preempt(["1003"]) == 1
+    assert len(queue) == 3
+    key, item, priority = queue.pop()
+    assert (key, item) == ("low", "L")
+    assert priority == PRIORITY_PREEMPT + 5
+    # Eski kayıt geçersiz sayılır; iş ikinci kez çıkmaz
+    assert _drain(queue) == ["high", "mid"]
+    assert queue.get_status()["preempted"] == 1
+
+
+def test_preempt_does_not_promote_twice():
+    queue = PriorityWorkQueue()
+    queue.push("a", "A", 1, call_numbers=("1001",))
+    queue.push("b", "B", 2, call_numbers=("1001",))
+
+    assert queue.preempt(["1001"]) == 2
+    assert queue.preempt(["1001"]) == 0
+    assert queue.preempt(["9999"]) == 0
+    assert _drain(queue) == ["b", "a"]
@@ -0,0 +1,191 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from program_source import RAG_DATA_FILE, iter_programs
+from results_index import extract_call_number
+
+# Sıcak durum ayarları
+FINAL_MEAN_FILE = "FINAL_ai_results_mean.json"
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _file_signature(path):
+    """Dosyanın değişip değişmediğini anlamak için (mtime, boyut) döndürür; yoksa None."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _load_catalogue(path):
+    """Çağrı numarası -> program adı eşlemesini oluşturur (ilk eşleşen program kazanır)."""
+    catalogue = {}
+    for program in iter_programs(path):
+        program_name = program.get("program_name", "")
+        call_number = extract_call_number(program_name)
+        if call_number and call_number not in catalogue:
+            catalogue[call_number] = program_name
+    return catalogue
+
+
+def _load_score_store(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+class WarmState:
+    """Program kataloğunu, skor deposunu ve eşleşme indeksini bellekte tutar.
+
+    Her erişimde yalnızca dosyanın imzası (mtime, boyut) kontrol edilir;
+    dosya değişmediyse yeniden okunmaz. Eşleşme indeksi, katalog veya skor
+    deposu değiştiğinde temizlenir.
+    """
+
+    def __init__(self, rag_data_file=RAG_DATA_FILE, final_mean_file=FINAL_MEAN_FILE):
+        self.rag_data_file = rag_data_file
+        self.final_mean_file = final_mean_file
+        self.entries = {}
+        self.matches = {}
+        self.matches_signature = None
+        self.reloads = 0
+        self.lock = threading.Lock()
+
+    def _get(self, name, path, loader):
+        signature = _file_signature(path)
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry and entry[0] == signature:
+                return entry[1], signature
+
+        value = loader(path) if signature else None
+        with self.lock:
+            self.entries[name] = (signature, value)
+            self.reloads += 1
+        return value, signature
+
+    def catalogue(self):
+        """Çağrı numarası -> program adı eşlemesi; dosya yoksa None."""
+        return self._get("catalogue", self.rag_data_file, _load_catalogue)[0]
+
+    def score_store(self):
+        """FINAL_ai_results_mean.json içeriği; dosya yoksa boş sözlük."""
+        return self._get("score_store", self.final_mean_file, _load_score_store)[0] or {}
+
+    def match(self, active_call_name):
+        """Aktif çağrı adını (eşleşen program adı, ortalama skor) çiftine çevirir."""
+        catalogue, catalogue_signature = self._get("catalogue", self.rag_data_file, _load_catalogue)
+        score_store, score_signature = self._get("score_store", self.final_mean_file, _load_score_store)
+
+        with self.lock:
+            if self.matches_signature != (catalogue_signature, score_signature):
+                self.matches = {}
+                self.matches_signature = (catalogue_signature, score_signature)
+            if active_call_name in self.matches:
+                return self.matches[active_call_name]
+
+        matched_program_name = (catalogue or {}).get(extract_call_number(active_call_name))
+        average = (score_store or {}).get(matched_program_name, {}).get("mean") if matched_program_name else None
+        with self.lock:
+            self.matches[active_call_name] = (matched_program_name, average)
+        return matched_program_name, average
+
+    def get_status(self):
+        with self.lock:
+            return {
+                "cached": sorted(name for name, (signature, _) in self.entries.items() if signature),
+                "matches": len(self.matches),
+                "reloads": self.reloads,
+            }
+
+
+class WarmWorker:
+    """İşleri sırayla çalıştıran, sıcak durumu koruyan uzun ömürlü iş parçacığı.
+
+    Zamanlayıcı ve API işleri buraya gönderir; modüller ve veriler ilk işten
+    sonra bellekte kalır.
+    """
+
+    def __init__(self):
+        self.state = WarmState()
+        self.jobs = queue.Queue()
+        self.completed = 0
+        self.failed = 0
+        self.last_job_seconds = None
+        self.busy = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        # Aktif çağrı analizinin bağımlılıklarını ilk işten önce yükle; yükleme hatası
+        # worker'ı durdurmaz, işler kendi import'larında hatayı Future'a taşır
+        try:
+            import scheduler  # noqa: F401
+        except Exception as e:
+            print(f"⚠️ Sıcak worker modülleri önceden yükleyemedi: {str(e)}")
+
+        while True:
+            future, fn, args, kwargs = self.jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            self.busy = True
+            started = time.perf_counter()
+            try:
+                future.set_result(fn(*args, **kwargs))
+                self.completed += 1
+            except Exception as e:
+                future.set_exception(e)
+                self.failed += 1
+            finally:
+                self.last_job_seconds = round(time.perf_counter() - started, 3)
+                self.busy = False
+
+    def submit(self, fn, *args, **kwargs):
+        """fn'i worker iş parçacığında çalıştırmak üzere kuyruğa ekler ve Future döndürür."""
+        future = Future()
+        if not self.thread.is_alive():
+            # Bekleyen çağıran sonsuza kadar askıda kalmasın
+            future.set_exception(RuntimeError("Sıcak worker çalışmıyor"))
+            return future
+        self.jobs.put((future, fn, args, kwargs))
+        return future
+
+    def get_status(self):
+        return {
+            "alive": self.thread.is_alive(),
+            "busy": self.busy,
+            "queued": self.jobs.qsize(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "last_job_seconds": self.last_job_seconds,
+            "state": self.state.get_status(),
+        }
+
+
+def get_worker():
+    """İşlem genelinde paylaşılan sıcak worker'ı döndürür."""
+    global _worker
+
+    with _worker_lock:
+        if _worker is None:
+            _worker = WarmWorker()
+        return _worker
+
+
+def get_worker_status():
+    """Worker başlatıldıysa durumunu döndürür; başlatılmadıysa None."""
+    return _worker.get_status() if _worker else None
+
+
+def get_warm_state():
+    """Paylaşılan worker'ın sıcak durumunu döndürür."""
+    return get_worker().state
@@ -0,0 +1,216 @@
+import heapq
+import itertools
+import os
+import re
+import threading
+from datetime import datetime
+from results_index import extract_call_number, get_connection
+
+# Öncelik ağırlıkları: büyük değer önce analiz edilir
+PRIORITY_ACTIVE = 100.0
+PRIORITY_DEADLINE = 50.0
+PRIORITY_VARIANCE = 40.0
+PRIORITY_STALE = 30.0
+# Çalıştırma sırasında yeni açılan çağrılar kuyruktaki her şeyin önüne geçer
+PRIORITY_PREEMPT = 1000.0
+
+DEADLINE_HORIZON_DAYS = int(os.getenv("TUBITAK_DEADLINE_HORIZON_DAYS", "14"))
+STALE_AFTER_DAYS = int(os.getenv("TUBITAK_STALE_AFTER_DAYS", "30"))
+# Bu standart sapmanın üzerindeki skor dağılımı tam ağırlık alır
+VARIANCE_FULL_STD = 0.25
+
+TURKISH_MONTHS = {"ocak": 1, "şubat": 2, "mart": 3, "nisan": 4, "mayıs": 5, "haziran": 6, "temmuz": 7, "ağustos": 8, "eylül": 9, "ekim": 10, "kasım": 11, "aralık": 12}
+_NUMERIC_DATE = re.compile(r"(\d{1,2})[./](\d{1,2})[./](\d{4})")
+_TEXT_DATE = re.compile(r"(\d{1,2})\s+(" + "|".join(TURKISH_MONTHS) + r")\s+(\d{4})", re.IGNORECASE)
+
+_running_queues = set()
+_running_lock = threading.Lock()
+
+
+def extract_deadline(text):
+    """Metindeki en geç tarihi son başvuru tarihi olarak döndürür; tarih yoksa None.
+
+    "01.10.2026 - 15.11.2026" gibi aralıklarda bitiş tarihi alınır.
+    """
+    dates = []
+    for day, month, year in _NUMERIC_DATE.findall(text or ""):
+        dates.append((int(year), int(month), int(day)))
+    for day, month, year in _TEXT_DATE.findall(text or ""):
+        dates.append((int(year), TURKISH_MONTHS[month.replace("I", "ı").replace("İ", "i").lower()], int(day)))
+
+    valid = []
+    for year, month, day in dates:
+        try:
+            valid.append(datetime(year, month, day, 23, 59))
+        except ValueError:
+            continue
+    return max(valid) if valid else None
+
+
+def _load_last_analyzed():
+    """Her programın en son analiz edildiği zamanı sonuç indeksinden okur."""
+    conn = get_connection()
+    try:
+        rows = conn.execute("SELECT program_name, MAX(created_at) AS last_analyzed FROM results GROUP BY program_name").fetchall()
+    finally:
+        conn.close()
+    return {row["program_name"]: row["last_analyzed"] for row in rows}
+
+
+def _load_score_spread():
+    """Skor geçmişindeki standart sapmaları döndürür; geçmiş okunamazsa boş sözlük."""
+    try:
+        from score_history import get_score_statistics
+
+        return {s["program_name"]: s["std"] for s in get_score_statistics() if s["count"] > 1 and s["std"] is not None}
+    except Exception as e:
+        print(f"Skor geçmişi okunamadı, dağılım önceliği kullanılmayacak: {str(e)}")
+        return {}
+
+
+class ProgramRanker:
+    """Programları aktiflik, son başvuru yakınlığı, skor dağılımı ve eskimeye göre puanlar.
+
+    Sinyaller oluşturulurken bir kez yüklenir; puanlama yalnızca bellekte yapılır.
+    """
+
+    def __init__(self, active_names=(), now=None):
+        self.now = now or datetime.now()
+        self.active_numbers = set()
+        self.active_names = set()
+        self.deadlines = {}
+        for name in active_names:
+            self.add_active(name)
+        self.score_spread = _load_score_spread()
+        self.last_analyzed = _load_last_analyzed()
+
+    def add_active(self, name):
+        """Aktif çağrıyı ve adındaki son başvuru tarihini kaydeder."""
+        number = extract_call_number(name)
+        key = number or name
+        if number:
+            self.active_numbers.add(number)
+        self.active_names.add(name)
+        deadline = extract_deadline(name)
+        if deadline:
+            self.deadlines[key] = deadline
+
+    def is_active(self, program_name):
+        number = extract_call_number(program_name)
+        return (number in self.active_numbers) if number else program_name in self.active_names
+
+    def signals(self, program_name):
+        """Programın öncelik sinyallerini (0-1 arası) döndürür."""
+        signals = {"active": 1.0 if self.is_active(program_name) else 0.0, "deadline": 0.0, "variance": 0.0, "stale": 1.0}
+
+        deadline = self.deadlines.get(extract_call_number(program_name) or program_name)
+        if deadline and deadline >= self.now:
+            days_left = (deadline - self.now).total_seconds() / 86400
+            signals["deadline"] = max(0.0, 1 - days_left / DEADLINE_HORIZON_DAYS)
+
+        spread = self.score_spread.get(program_name)
+        if spread:
+            signals["variance"] = min(1.0, spread / VARIANCE_FULL_STD)
+
+        last_analyzed = self.last_analyzed.get(program_name)
+        if last_analyzed:
+            age_days = (self.now - datetime.strptime(last_analyzed, "%Y-%m-%d %H:%M:%S")).total_seconds() / 86400
+            signals["stale"] = min(1.0, max(0.0, age_days / STALE_AFTER_DAYS))
+        return signals
+
+    def priority(self, program_name):
+        """Programın öncelik puanını döndürür."""
+        signals = self.signals(program_name)
+        return round(
+            PRIORITY_ACTIVE * signals["active"] + PRIORITY_DEADLINE * signals["deadline"] + PRIORITY_VARIANCE * signals["variance"] + PRIORITY_STALE * signals["stale"],
+            3,
+        )
+
+
+class PriorityWorkQueue:
+    """Öncelik sırasına göre iş veren, çalışırken öne alma destekleyen kuyruk.
+
+    Eşit öncelikli işler eklenme sırasıyla çıkar. Öne alınan iş yığında yeni
+    bir kayıtla yer alır; eski kaydı geçersiz sayılır.
+    """
+
+    def __init__(self, name="analysis"):
+        self.name = name
+        self.heap = []
+        self.entries = {}
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.stats = {"pushed": 0, "popped": 0, "preempted": 0}
+
+    def push(self, key, item, priority, call_numbers=()):
+        """İşi kuyruğa ekler; call_numbers öne alma için eşleşecek çağrı numaralarıdır."""
+        with self.lock:
+            entry = [-priority, next(self.sequence), key, item, set(call_numbers), True]
+            self.entries[key] = entry
+            heapq.heappush(self.heap, entry)
+            self.stats["pushed"] += 1
+
+    def pop(self):
+        """En yüksek öncelikli işi (anahtar, iş, öncelik) olarak döndürür; kuyruk boşsa None."""
+        with self.lock:
+            while self.heap:
+                entry = heapq.heappop(self.heap)
+                if entry[5]:
+                    del self.entries[entry[2]]
+                    self.stats["popped"] += 1
+                    return entry[2], entry[3], -entry[0]
+            return None
+
+    def preempt(self, call_numbers):
+        """Verilen çağrı numaralarını içeren bekleyen işleri kuyruğun önüne alır."""
+        call_numbers = set(call_numbers)
+        promoted = 0
+        with self.lock:
+            for key, entry in list(self.entries.items()):
+                if entry[5] and entry[4] & call_numbers and -entry[0] < PRIORITY_PREEMPT:
+                    entry[5] = False
+                    new_entry = [-(PRIORITY_PREEMPT - entry[0]), next(self.sequence), key, entry[3], entry[4], True]
+                    self.entries[key] = new_entry
+                    heapq.heappush(self.heap, new_entry)
+                    promoted += 1
+            self.stats["preempted"] += promoted
+        return promoted
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def get_status(self):
+        with self.lock:
+            return {"name": self.name, "pending": len(self.entries), **self.stats}
+
+
+def register_queue(queue):
+    """Çalışan kuyruğu yeni açılan çağrılarla öne alma için kaydeder."""
+    with _running_lock:
+        _running_queues.add(queue)
+
+
+def unregister_queue(queue):
+    with _running_lock:
+        _running_queues.discard(queue)
+
+
+def preempt_active_calls(calls):
+    """Yeni açılan çağrılara ait bekleyen işleri çalışan tüm kuyruklarda öne alır."""
+    call_numbers = {extract_call_number(call["name"]) for call in calls} - {None}
+    if not call_numbers:
+        return 0
+
+    with _running_lock:
+        queues = list(_running_queues)
+    promoted = sum(queue.preempt(call_numbers) for queue in queues)
+    if promoted:
+        print(f"⏫ {promoted} bekleyen iş yeni açılan çağrılar nedeniyle öne alındı")
+    return promoted
+
+
+def get_queue_status():
+    """Çalışan kuyrukların durumunu döndürür."""
+    with _running_lock:
+        return [queue.get_status() for queue in _running_queues]
@@ -9,10 +9,10 @@ BASE_URL = "http://localhost:3001/api/v1"
 headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
 
 
-def get_next_workspace_name():
+def get_next_workspace_name(base_url=BASE_URL):
     """Mevcut workspace'leri kontrol edip bir sonraki tubitak numarasını döndürür."""
     try:
-        response = requests.get(f"{BASE_URL}/workspaces", headers=headers)
+        response = requests.get(f"{base_url}/workspaces", headers=headers, timeout=30)
         if response.status_code == 200:
             workspaces = response.json()
             existing_names = []
@@ -41,9 +41,9 @@ def get_next_workspace_name():
         return "tubitak1"
 
 
-def create_new_workspace():
+def create_new_workspace(base_url=BASE_URL):
     """Yeni workspace oluşturur ve workspace slug'ını döndürür."""
-    workspace_name = get_next_workspace_name()
+    workspace_name = get_next_workspace_name(base_url)
 
     workspace_data = {
         "name": workspace_name,
@@ -57,8 +57,8 @@ def create_new_workspace():
     }
 
     try:
-        print(f"Yeni workspace oluşturuluyor: {workspace_name}")
-        response = requests.post(f"{BASE_URL}/workspace/new", headers=headers, json=workspace_data, timeout=30)
+        print(f"Yeni workspace oluşturuluyor: {workspace_name} ({base_url})")
+        response = requests.post(f"{base_url}/workspace/new", headers=headers, json=workspace_data, timeout=30)
 
         if response.status_code == 200:
             result = response.json()